@@ -0,0 +1,64 @@
+"""Events/sec of the per-log account normalisation, before and after the cache.
+
+"before" is what the two watchers did for every log: build a hex string
+from the topic, checksum it (one keccak), checksum it again in the
+EnhancedWhaleWatcher and lower-case it for the tracked-wallet lookup.
+"after" slices the topic once and reuses :func:`onchain.addresses.checksum`::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_address_cache.py [n_events] [n_wallets]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from onchain.addresses import log_account  # noqa: E402
+
+
+def make_logs(n_events: int, n_wallets: int):
+    rng = random.Random(1)
+    wallets = [rng.randbytes(20) for _ in range(n_wallets)]
+    return [{"topics": [HexBytes(b"\x00" * 32), HexBytes(b"\x00" * 12 + rng.choice(wallets))]}
+            for _ in range(n_events)], {w for w in wallets[::10]}
+
+
+def before(logs, tracked_lower):
+    hits = 0
+    for log in logs:
+        wallet = Web3.to_checksum_address('0x' + log['topics'][1].hex()[-40:])
+        if wallet.lower() in tracked_lower:
+            hits += 1
+        Web3.to_checksum_address('0x' + log["topics"][1].hex()[-40:])
+    return hits
+
+
+def after(logs, tracked_keys):
+    hits = 0
+    for log in logs:
+        key, wallet = log_account(log)
+        if key in tracked_keys:
+            hits += 1
+        log_account(log)
+    return hits
+
+
+def main(n_events: int = 50_000, n_wallets: int = 2_000):
+    logs, tracked = make_logs(n_events, n_wallets)
+    tracked_lower = {"0x" + w.hex() for w in tracked}
+    print(f"{n_events:,} events over {n_wallets:,} distinct accounts")
+    results = []
+    for label, fn, arg in (("before", before, tracked_lower), ("after", after, tracked)):
+        start = time.perf_counter()
+        results.append(fn(logs, arg))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<8} {n_events / elapsed:12,.0f} events/s")
+    assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
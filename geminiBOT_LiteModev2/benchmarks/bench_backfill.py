@@ -0,0 +1,63 @@
+"""Simulate backfilling one day of Arbitrum blocks against a fake provider.
+
+The fake provider answers ``eth_getLogs`` after ``--latency`` seconds and
+rejects ranges wider than ``--max-range`` blocks, like hosted RPCs do.
+
+    python geminiBOT_LiteModev2/benchmarks/bench_backfill.py --concurrency 4
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from onchain.backfill import LogBackfiller  # noqa: E402
+
+
+class FakeEth:
+    def __init__(self, latency: float, max_range: int, logs_every: int):
+        self.latency = latency
+        self.max_range = max_range
+        self.logs_every = logs_every
+        self.requests = 0
+
+    async def get_logs(self, params):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        start, end = params["fromBlock"], params["toBlock"]
+        if end - start + 1 > self.max_range:
+            raise ValueError("Log response size exceeded. Use a 2K block range")
+        first = -(-start // self.logs_every) * self.logs_every
+        return [{"blockNumber": b, "logIndex": 0} for b in range(first, end + 1, self.logs_every)]
+
+
+async def main(args):
+    eth = FakeEth(args.latency, args.max_range, args.logs_every)
+    backfiller = LogBackfiller(SimpleNamespace(eth=eth), chunk_size=args.chunk, concurrency=args.concurrency)
+    handled = 0
+
+    async def handler(_log):
+        nonlocal handled
+        handled += 1
+
+    start = time.perf_counter()
+    await backfiller.run({}, 0, args.blocks - 1, handler)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.blocks:,} blocks, {handled:,} logs, {eth.requests} requests, "
+        f"concurrency {args.concurrency}: {elapsed:.1f}s (final chunk {backfiller.chunk_size})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=345_600)  # ~1 day at 0.25s blocks
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--max-range", type=int, default=2000)
+    parser.add_argument("--logs-every", type=int, default=20)
+    parser.add_argument("--chunk", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
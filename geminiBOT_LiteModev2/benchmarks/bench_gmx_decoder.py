@@ -0,0 +1,63 @@
+"""Compare the fixed-offset GMX decoder with web3's ``processLog``.
+
+Run from the repository root::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_gmx_decoder.py [n_logs]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from eth_abi import encode  # noqa: E402
+from hexbytes import HexBytes  # noqa: E402
+
+from onchain import gmx_decoder as gd  # noqa: E402
+
+
+def make_logs(n: int) -> list[dict]:
+    logs = []
+    for i in range(n):
+        layout = gd.INCREASE_POSITION if i % 2 == 0 else gd.DECREASE_POSITION
+        values = []
+        for _, _, kind in layout.fields:
+            values.append(bool(i % 3) if kind == "bool" else (-i if kind == "int256" else i * 10**30))
+        logs.append({
+            "address": "0x" + "11" * 20,
+            "topics": [HexBytes(layout.topic)] + [HexBytes(b"\x00" * 12 + bytes([i % 256]) * 20)] * 3,
+            "data": HexBytes(encode([f[2] for f in layout.fields], values)),
+            "blockHash": HexBytes(b"\x01" * 32),
+            "blockNumber": i,
+            "transactionHash": HexBytes(i.to_bytes(32, "big")),
+            "transactionIndex": 0,
+            "logIndex": i,
+        })
+    return logs
+
+
+def bench(label: str, fn, n: int):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {n / elapsed:12,.0f} logs/s")
+    return elapsed
+
+
+def main(n: int = 20_000):
+    logs = make_logs(n)
+    decoder = gd.GMXDecoder()
+    events = {
+        gd.INCREASE_POSITION.topic: decoder.vault.events.IncreasePosition(),
+        gd.DECREASE_POSITION.topic: decoder.vault.events.DecreasePosition(),
+    }
+
+    print(f"Decoding {n:,} GMX vault logs")
+    slow = bench("web3 processLog", lambda: [events[bytes(log["topics"][0])].process_log(log) for log in logs], n)
+    fast = bench("decode_log", lambda: [gd.decode_log(log) for log in logs], n)
+    bench("decode_batch (columnar)", lambda: gd.decode_batch(logs), n)
+    print(f"speed-up: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,145 @@
+"""Compare sentiment backends on a fixed headline corpus: labels, latency, RSS.
+
+Each backend is loaded in a fresh process, so RSS is measured cleanly:
+``pytorch`` (the float32 pipeline), ``int8`` (dynamic quantization) and
+``onnx`` (onnxruntime). The report shows first and cached load time, per
+headline and per batch latency, RSS growth, and label agreement with
+``pytorch``. A different label is printed with both scores::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_sentiment_backends.py [--backends pytorch int8 onnx]
+
+Needs torch (and onnxruntime for ``onnx``). Converted models go to
+``SENTIMENT_MODEL_CACHE``; pass ``--fresh`` to time conversion again.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+CORPUS = [
+    "Bitcoin surges to record high as institutional demand grows",
+    "Ethereum upgrade goes live without a hitch",
+    "Crypto exchange files for bankruptcy after liquidity crunch",
+    "Regulators sue major stablecoin issuer over reserves",
+    "Solana network suffers another multi-hour outage",
+    "Spot ETF approval sparks broad market rally",
+    "Whales accumulate as prices hold key support",
+    "Hackers drain $100 million from cross-chain bridge",
+    "Central bank signals rate cuts, risk assets climb",
+    "Miners capitulate as hash price hits record low",
+    "Payment giant adds support for crypto settlements",
+    "Lending protocol freezes withdrawals amid insolvency fears",
+    "Analysts upgrade outlook on strong on-chain activity",
+    "Token unlock floods market, price tumbles 30%",
+    "Major bank launches tokenized deposit pilot",
+    "Court rules against exchange in landmark securities case",
+    "Layer-2 fees drop to fractions of a cent after upgrade",
+    "Founder arrested on fraud charges",
+    "Record inflows into digital asset funds for fifth week",
+    "Derivatives market sees largest liquidations this year",
+    "Developers ship long-awaited privacy feature",
+    "Trading volume collapses to multi-year lows",
+    "Country adopts bitcoin as legal tender",
+    "Exploit forces DeFi protocol to pause all contracts",
+    "Asset manager files for ether staking fund",
+    "Mining difficulty reaches all-time high",
+    "Retail interest fades as search volume declines",
+    "Stablecoin briefly loses its peg during market turmoil",
+    "Partnership with global retailer boosts token",
+    "Tax authority targets unreported crypto gains",
+    "Quarterly earnings beat expectations at crypto broker",
+    "Network congestion sends transaction fees soaring",
+]
+BATCH = 16
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+
+
+def measure(backend: str, model_name: str, cache_dir: str, out):
+    try:
+        out.put(_measure(backend, model_name, cache_dir))
+    except Exception as e:
+        out.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def _measure(backend: str, model_name: str, cache_dir: str) -> dict:
+    from ai_analysis.inference_backends import load_backend
+
+    base = rss_mb()
+    start = time.perf_counter()
+    model = load_backend(backend, model_name, cache_dir)
+    load = time.perf_counter() - start
+    model(CORPUS[:2], batch_size=2)  # warm-up
+    singles = []
+    for text in CORPUS:
+        t = time.perf_counter()
+        model([text], batch_size=1)
+        singles.append(time.perf_counter() - t)
+    t = time.perf_counter()
+    results = []
+    for i in range(0, len(CORPUS), BATCH):
+        results.extend(model(CORPUS[i:i + BATCH], batch_size=BATCH))
+    batched = (time.perf_counter() - t) / len(CORPUS)
+    singles.sort()
+    return {
+        "load": load, "rss": rss_mb() - base, "p50": singles[len(singles) // 2],
+        "batched": batched, "results": [(r["label"], r["score"]) for r in results],
+    }
+
+
+def run(backend, model_name, cache_dir):
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    proc = ctx.Process(target=measure, args=(backend, model_name, cache_dir, out))
+    proc.start()
+    result = out.get()
+    proc.join()
+    return result
+
+
+def main():
+    from config.settings import BERT_MODEL_NAME, SENTIMENT_MODEL_CACHE
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["pytorch", "int8", "onnx"])
+    parser.add_argument("--model", default=BERT_MODEL_NAME)
+    parser.add_argument("--fresh", action="store_true", help="convert into an empty cache directory")
+    args = parser.parse_args()
+    cache_dir = tempfile.mkdtemp() if args.fresh else SENTIMENT_MODEL_CACHE
+
+    print(f"{args.model}, {len(CORPUS)} headlines, batches of {BATCH}")
+    print(f"{'backend':<8} {'load s':>8} {'cached s':>9} {'ms/text':>8} {'ms/text@16':>11} {'RSS MB':>7} {'agree':>6}")
+    baseline = None
+    try:
+        for backend in args.backends:
+            first = run(backend, args.model, cache_dir)
+            if "error" in first:
+                print(f"{backend:<8} failed: {first['error']}")
+                continue
+            cached = run(backend, args.model, cache_dir)
+            labels = [label for label, _ in first["results"]]
+            baseline = baseline or first["results"]
+            agree = sum(a == b[0] for a, b in zip(labels, baseline)) / len(CORPUS)
+            print(f"{backend:<8} {first['load']:>8.1f} {cached['load']:>9.1f} {first['p50'] * 1e3:>8.1f} "
+                  f"{first['batched'] * 1e3:>11.1f} {cached['rss']:>7.0f} {agree:>6.0%}")
+            for text, ours, ref in zip(CORPUS, first["results"], baseline):
+                if ours[0] != ref[0]:
+                    print(f"    differs: {text!r}: {ours[0]} {ours[1]:.2f} vs {ref[0]} {ref[1]:.2f}")
+    finally:
+        if args.fresh:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    main()
@@ -0,0 +1,119 @@
+"""Sentiment throughput vs micro-batch size, and event-loop lag during inference.
+
+"inline" is the old ``analyze``: the pipeline is called on the event loop,
+one text at a time. The other rows go through
+``SentimentAnalyzer.analyze`` with the inference batcher at each max batch
+size. A ticker task sleeps 5 ms in a loop the whole time; how late it
+wakes up is the lag every other coroutine (watchers, Telegram) would see.
+
+By default the model is simulated: each forward pass sleeps
+``--fixed-ms`` plus ``--per-item-ms`` per text, and like torch it releases
+the GIL. Pass ``--model`` to load the real ``BERT_MODEL_NAME`` pipeline::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_sentiment_batching.py [--texts 512] [--model]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+
+class FakeRedis:
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ex=None):
+        pass
+
+
+sys.modules["aioredis"] = SimpleNamespace(from_url=lambda *a, **k: FakeRedis(), RedisError=Exception)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ai_analysis.sentiment_mobilebert import SentimentAnalyzer  # noqa: E402
+
+HEADLINES = [
+    "Bitcoin rallies past resistance as ETF inflows accelerate",
+    "Regulators open probe into exchange after withdrawal halt",
+    "Ether slides as network fees fall to multi-year lows",
+    "Whale moves 10,000 BTC to cold storage",
+    "Stablecoin issuer reports record reserves",
+    "Major fund cuts crypto exposure citing macro risk",
+    "Layer-2 activity hits all-time high",
+    "Hack drains lending protocol of $40 million",
+]
+
+
+def simulated_pipeline(fixed: float, per_item: float):
+    def run(texts, **kwargs):
+        texts = [texts] if isinstance(texts, str) else texts
+        time.sleep(fixed + per_item * len(texts))
+        return [{"label": "POSITIVE", "score": 0.9} for _ in texts]
+    return run
+
+
+class LagProbe:
+    """Measures how late a 5 ms sleep wakes up."""
+
+    def __init__(self, period: float = 0.005):
+        self.period = period
+        self.lags = []
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.period)
+            self.lags.append(loop.time() - start - self.period)
+
+    def report(self):
+        lags = sorted(self.lags) or [0.0]
+        return lags[min(len(lags) - 1, int(len(lags) * 0.99))] * 1e3, lags[-1] * 1e3
+
+
+async def measure(label, analyze, texts):
+    probe = LagProbe()
+    task = asyncio.create_task(probe.run())
+    await asyncio.sleep(0.02)
+    start = time.perf_counter()
+    await asyncio.gather(*(analyze(t) for t in texts))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.02)  # let the probe record its last, possibly late, wake-up
+    task.cancel()
+    p99, worst = probe.report()
+    print(f"{label:<10} {len(texts) / elapsed:>10,.1f} {p99:>12.1f} {worst:>12.1f}")
+
+
+async def main(args):
+    texts = [f"{HEADLINES[i % len(HEADLINES)]} ({i})" for i in range(args.texts)]
+    analyzer = SentimentAnalyzer()
+    if args.model:
+        await analyzer._load()
+        model = analyzer.pipeline
+    else:
+        model = simulated_pipeline(args.fixed_ms / 1000, args.per_item_ms / 1000)
+    analyzer._loaded = True
+    analyzer.pipeline = model
+
+    print(f"{len(texts)} texts, {'real model' if args.model else 'simulated model'}")
+    print(f"{'batch':<10} {'texts/s':>10} {'lag p99 ms':>12} {'lag max ms':>12}")
+
+    async def inline(text):
+        await asyncio.sleep(0)  # the old analyze() awaited Redis first
+        return model(text[:512])[0]
+
+    await measure("inline", inline, texts)
+    for size in args.sizes:
+        analyzer.batcher.max_batch = size
+        await measure(str(size), analyzer.analyze, texts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    parser.add_argument("--model", action="store_true", help="load the real transformers pipeline")
+    parser.add_argument("--fixed-ms", type=float, default=8.0, help="simulated cost per forward pass")
+    parser.add_argument("--per-item-ms", type=float, default=2.0, help="simulated cost per text")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,151 @@
+"""Cold start of the bot: time to first running component and event, and idle RSS.
+
+"eager" imports every component module before building anything, as
+``main.py`` did before the component registry. "lazy" is the current
+``TradingSystem``. It imports each module off the loop when its component
+is built, and starts that component right away. Each mode runs in a fresh
+interpreter for ``--seconds`` with the current environment (set
+``ENABLE_MOBILEBERT``, ``DISABLED_COMPONENTS`` etc. as in production).
+Times are measured from process spawn::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_startup.py [--seconds 20] [--profile]
+
+``--profile`` also prints the slowest top-level imports from
+``python -X importtime``. Redis is replaced by a stand-in. Without network
+access the watchers keep retrying, so "first event" may stay empty.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+FAKE_REDIS = ("import sys, types; sys.modules['aioredis'] = types.SimpleNamespace("
+              "from_url=lambda *a, **k: None, RedisError=Exception)")
+
+
+def rss_mb(field: str = "VmRSS") -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def child(mode: str, seconds: float, spawned: float) -> dict:
+    sys.modules["aioredis"] = SimpleNamespace(from_url=lambda *a, **k: None, RedisError=Exception)
+    sys.path.insert(0, str(SRC))
+    stamps = {}
+
+    def mark(name):
+        stamps.setdefault(name, time.time() - spawned)
+
+    import main
+    from components import COMPONENTS, enabled_components
+    from event_bus import event_bus
+
+    if mode == "eager":
+        import importlib
+        for spec in enabled_components(COMPONENTS):
+            importlib.import_module(spec.target.partition(":")[0])
+    mark("imported")
+
+    publish = event_bus.publish
+
+    async def first_publish(topic, event):
+        mark("first_event")
+        await publish(topic, event)
+    event_bus.publish = first_publish
+
+    retry = main.run_with_retry
+
+    def first_run(coro_fn):
+        mark("first_component")
+        return retry(coro_fn)
+    main.run_with_retry = first_run
+
+    class System(main.TradingSystem):
+        async def initialize_components(self, tg=None):
+            await super().initialize_components(tg)
+            mark("ready")
+
+    async def run():
+        try:
+            await asyncio.wait_for(System().run(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    stamps["rss"] = rss_mb()
+    stamps["peak"] = rss_mb("VmHWM")
+    return stamps
+
+
+def run_mode(mode: str, seconds: float, verbose: bool) -> dict:
+    spawned = time.time()
+    proc = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--seconds", str(seconds), "--spawned", repr(spawned)],
+        stdout=subprocess.PIPE, stderr=None if verbose else subprocess.DEVNULL, text=True,
+    )
+    lines = proc.stdout.strip().splitlines()
+    return json.loads(lines[-1]) if lines else {"error": f"exit code {proc.returncode}"}
+
+
+def import_profile(top: int) -> None:
+    code = (f"{FAKE_REDIS}; sys.path.insert(0, {str(SRC)!r}); import importlib, main; "
+            "from components import COMPONENTS; "
+            "[importlib.import_module(s.target.partition(':')[0]) for s in COMPONENTS]")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)", line)
+        if m and not m.group(3):  # top level only
+            rows.append((int(m.group(2)), m.group(4)))
+    rows.sort(reverse=True)
+    print(f"\nslowest top-level imports (all component modules, {sum(r[0] for r in rows) / 1e6:.2f}s total)")
+    for cumulative, name in rows[:top]:
+        print(f"  {cumulative / 1e6:>6.2f}s  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20.0, help="run each mode this long")
+    parser.add_argument("--profile", action="store_true", help="print the slowest imports too")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's log output")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--spawned", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.seconds, args.spawned)))
+        return
+
+    def cell(stamps, key):
+        return f"{stamps[key]:.2f}" if key in stamps else "-"
+
+    print(f"ENABLE_MOBILEBERT={os.getenv('ENABLE_MOBILEBERT', '1')} "
+          f"DISABLED_COMPONENTS={os.getenv('DISABLED_COMPONENTS', '')!r}, {args.seconds:.0f}s per mode")
+    print(f"{'mode':<6} {'imports s':>9} {'1st component s':>15} {'1st event s':>11} {'all built s':>11} "
+          f"{'idle RSS MB':>11} {'peak MB':>8}")
+    for mode in ("eager", "lazy"):
+        stamps = run_mode(mode, args.seconds, args.verbose)
+        if "error" in stamps:
+            print(f"{mode:<6} failed: {stamps['error']}")
+            continue
+        print(f"{mode:<6} {cell(stamps, 'imported'):>9} {cell(stamps, 'first_component'):>15} "
+              f"{cell(stamps, 'first_event'):>11} {cell(stamps, 'ready'):>11} "
+              f"{stamps['rss']:>11.0f} {stamps['peak']:>8.0f}")
+    if args.profile:
+        import_profile(args.top)
+
+
+if __name__ == "__main__":
+    main()
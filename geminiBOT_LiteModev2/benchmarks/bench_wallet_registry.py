@@ -0,0 +1,71 @@
+"""Memory per wallet and load time of the tracked-wallet index.
+
+Compares :class:`WalletRegistry` against the previous layout (a set of
+lower-case address strings plus a dict of per-wallet settings dicts)::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_wallet_registry.py [n_wallets]
+"""
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from onchain.wallet_registry import WalletRegistry  # noqa: E402
+
+
+class FakeDB:
+    """Serves keyset pages from pre-built rows, like asyncpg Records would."""
+
+    def __init__(self, n: int):
+        self.rows = [
+            {
+                "id": i, "wallet_address": "0x" + f"{i * 7919:040x}", "min_trade_size": 10000,
+                "alert_direction": "both", "alert_interval": 0, "metadata": None,
+            }
+            for i in range(1, n + 1)
+        ]
+
+    async def fetch(self, query, last_id, limit):
+        return self.rows[last_id:last_id + limit]
+
+
+def legacy_load(rows):
+    tracked, alerts = set(), {}
+    for w in rows:
+        tracked.add(w["wallet_address"].lower())
+        alerts[w["wallet_address"].lower()] = {
+            "min_size": w["min_trade_size"], "direction": w["alert_direction"],
+            "interval": w["alert_interval"], "settings": w["metadata"], "last_sent": 0,
+        }
+    return tracked, alerts
+
+
+def measure(label, n, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    keep = fn()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<16} {elapsed * 1000:8.1f} ms  {size / n:7.1f} bytes/wallet")
+    return keep
+
+
+def main(n: int = 100_000):
+    db = FakeDB(n)
+    print(f"{n:,} tracked wallets")
+    measure("legacy set+dict", n, lambda: legacy_load(db.rows))
+    registry = WalletRegistry(db)
+    measure("WalletRegistry", n, lambda: asyncio.run(registry.load()))
+    probe = db.rows[n // 2]["wallet_address"]
+    start = time.perf_counter()
+    for _ in range(100_000):
+        probe in registry
+    print(f"lookup           {(time.perf_counter() - start) * 10:8.2f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,136 @@
+"""Whale-signal tallying at 10k trades/s: per-trade log line vs sampled batches.
+
+"before" is the old ``process_whale_signal``: one f-string ``logger.info``
+and a ``setdefault`` per trade. "whale" calls the current
+``process_whale_signal`` once per trade, as ``WhaleWatcher`` does for each
+log. "hyperliquid" hands each poll's trades to
+``HyperliquidWatcher._process_trades``, which publishes one columnar batch
+on the event bus. The aggregator then tallies it with one
+``process_whale_signals`` call.
+
+Log records are formatted and written to /dev/null, so their cost counts.
+Each path is fed ``--rate`` trades/s for ``--seconds``. The benchmark
+reports the CPU share that took, then the unpaced throughput::
+
+    python geminiBOT_LiteModev2/benchmarks/bench_whale_signals.py [--rate 10000] [--seconds 3]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# The aggregator builds a SentimentAnalyzer, which opens a Redis client it never uses here
+sys.modules.setdefault("aioredis", SimpleNamespace(from_url=lambda *a, **k: None, RedisError=Exception))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+os.environ.setdefault("ENABLE_MOBILEBERT", "0")
+
+from event_bus import EventBus, COALESCE, WHALE_TRADES  # noqa: E402
+from onchain.hyperliquid_watcher import HyperliquidWatcher  # noqa: E402
+from signal_generation import signal_aggregator as sa  # noqa: E402
+from signal_generation.signal_aggregator import SignalAggregator  # noqa: E402
+
+SYMBOLS = ["BTC", "ETH", "SOL", "ARB", "DOGE", "AVAX", "LINK", "OP"]
+POLL_BATCH = 200
+
+
+def make_trades(n: int):
+    rng = random.Random(1)
+    return [{
+        "id": str(i),
+        "timestamp": 1_700_000_000_000 + i,
+        "symbol": f"{rng.choice(SYMBOLS)}/USDC:USDC",
+        "side": rng.choice(("buy", "sell")),
+        "price": str(rng.uniform(1, 70_000)),
+        "amount": str(rng.uniform(0.01, 50)),
+        "info": {"hash": f"0x{i:064x}"},
+    } for i in range(n)]
+
+
+async def old_process_whale_signal(self, symbol: str, size_usd: float, direction: str):
+    try:
+        sa.logger.info(f"[SignalAggregator] Whale trade {symbol} {direction} ${size_usd:,.2f}")
+        tally = self.trade_tally.setdefault(symbol, {"long": 0, "short": 0})
+        if direction not in tally:
+            tally[direction] = 0
+        tally[direction] += 1
+    except Exception as e:
+        sa.logger.error(f"[SignalAggregator] process_whale_signal error: {e}")
+
+
+def build(path: str):
+    """Return ``feed(trades)`` for a path; ``trades`` is one poll/log burst."""
+    aggregator = SignalAggregator()
+    if path == "hyperliquid":
+        bus = EventBus()
+        queue = bus.subscribe(WHALE_TRADES, "bench", policy=COALESCE)
+        watcher = HyperliquidWatcher(decoder=SimpleNamespace(), bus=bus)
+
+        async def publish_and_tally(trades):
+            await watcher._process_trades(trades)
+            for batch in queue.drain():
+                await aggregator.process_whale_signals(batch.symbols, batch.sizes, batch.directions)
+        return publish_and_tally
+    convert = HyperliquidWatcher._convert_trade
+    if path == "before":
+        signal = old_process_whale_signal.__get__(aggregator)
+    else:
+        signal = aggregator.process_whale_signal
+
+    async def feed(trades):
+        for trade in trades:
+            data = convert(None, trade)
+            await signal(data["symbol"], data["size_usd"], data["direction"])
+    return feed
+
+
+async def paced(feed, trades, rate: float, seconds: float) -> float:
+    """CPU share used feeding ``rate`` trades/s in ``POLL_BATCH`` bursts."""
+    bursts = [trades[i:i + POLL_BATCH] for i in range(0, int(rate * seconds), POLL_BATCH)]
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for i, burst in enumerate(bursts):
+        delay = start + i * POLL_BATCH / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await feed(burst)
+    wall = time.perf_counter() - start
+    return (time.process_time() - cpu) / wall
+
+
+async def flat_out(feed, trades) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(trades), POLL_BATCH):
+        await feed(trades[i:i + POLL_BATCH])
+    return len(trades) / (time.perf_counter() - start)
+
+
+async def main(rate: float, seconds: float):
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    sink = logging.StreamHandler(open(os.devnull, "w"))
+    sink.setFormatter(logging.Formatter("%(asctime)s %(levelname)s:%(name)s:%(message)s"))
+    root.addHandler(sink)
+    root.setLevel(logging.INFO)
+
+    trades = make_trades(int(rate * seconds))
+    print(f"{len(trades):,} trades at {rate:,.0f}/s, {POLL_BATCH} per burst")
+    print(f"{'path':<12} {'CPU at rate':>12} {'max trades/s':>14}")
+    for path in ("before", "whale", "hyperliquid"):
+        feed = build(path)
+        share = await paced(feed, trades, rate, seconds)
+        throughput = await flat_out(build(path), trades)
+        print(f"{path:<12} {share:>11.0%} {throughput:>14,.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10_000, help="trades per second to feed")
+    parser.add_argument("--seconds", type=float, default=3, help="how long to feed them")
+    args = parser.parse_args()
+    asyncio.run(main(args.rate, args.seconds))
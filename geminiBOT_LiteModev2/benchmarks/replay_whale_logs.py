@@ -0,0 +1,290 @@
+"""Replay captured vault logs through the real whale pipeline.
+
+Logs go through ``WhaleWatcher._dispatch`` -> ``handle_log`` -> ``_process_log``
+-> ``write_trade`` / ``send_alert`` / event bus -> ``process_whale_signals``
+exactly as in production. Postgres, Redis and Telegram are replaced by in-process
+stand-ins, so only our own code is measured. Reports throughput, p50/p99 per
+stage and memory growth.
+
+Capture real traffic by running the bot with ``WHALE_CAPTURE_FILE=logs.jsonl``,
+or synthesise a file, then replay it::
+
+    python geminiBOT_LiteModev2/benchmarks/replay_whale_logs.py --generate 20000 --out /tmp/logs.bin
+    python geminiBOT_LiteModev2/benchmarks/replay_whale_logs.py /tmp/logs.bin [--rate 500] [--enhanced]
+
+Files ending in ``.jsonl`` are read as JSON lines, anything else as the
+compact binary format from ``onchain/log_capture.py``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+
+# Redis stand-in for every component that calls aioredis.from_url
+sys.modules["aioredis"] = SimpleNamespace(from_url=lambda *a, **k: FakeRedis(), RedisError=Exception)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+# A URL is needed to build the watcher; nothing connects to it
+os.environ.setdefault("ALCHEMY_WS_URL", "ws://127.0.0.1:0")
+os.environ.setdefault("ENABLE_MOBILEBERT", "0")
+
+from eth_abi import encode  # noqa: E402
+from hexbytes import HexBytes  # noqa: E402
+
+from database.trade_writer import TradeBatchWriter  # noqa: E402
+from event_bus import EventBus  # noqa: E402
+from onchain.backfill import BlockCheckpoint  # noqa: E402
+from onchain.gmx_decoder import INCREASE_POSITION, DECREASE_POSITION, PRICE_PRECISION  # noqa: E402
+from onchain.log_capture import read_logs, write_logs  # noqa: E402
+from onchain.wallet_registry import WalletRegistry, TrackedWallet  # noqa: E402
+from onchain.whale_watcher import WhaleWatcher  # noqa: E402
+from onchain.enhanced_whale_watcher import EnhancedWhaleWatcher  # noqa: E402
+from signal_generation.signal_aggregator import SignalAggregator  # noqa: E402
+from utils.metrics import metrics  # noqa: E402
+
+
+class FakeConn:
+    def __init__(self):
+        self.rows = 0
+        self.staged = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def execute(self, query, *args):
+        # Answer like Postgres so the writer takes its normal path
+        if "INSERT INTO wallet_trades" in query:
+            merged, self.staged = self.staged, 0
+            self.rows += merged
+            return f"INSERT 0 {merged}"
+        return "UPDATE 1"
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.staged = len(records)
+
+
+class FakeDB:
+    """Postgres stand-in: accepts writes, returns empty reads."""
+
+    def __init__(self):
+        self.conn = FakeConn()
+        self.pool = self
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+    async def connect(self):
+        pass
+
+    async def fetch(self, *args):
+        return []
+
+    async def fetchrow(self, *args):
+        return None
+
+    async def fetchval(self, *args):
+        return None
+
+    async def execute(self, *args):
+        return "OK"
+
+    async def stream(self, *args, **kwargs):
+        return
+        yield
+
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent = 0
+
+    async def send_alert(self, message: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent += 1
+
+
+def generate(n: int, wallets: int, seed: int = 1):
+    """Synthetic IncreasePosition/DecreasePosition logs over known markets."""
+    rng = random.Random(seed)
+    accounts = [rng.randbytes(20) for _ in range(wallets)]
+    index_tokens = [bytes.fromhex(a[2:]) for a in (
+        "0x82aF49447D8a07e3bd95BD0d56f35241523fBab1", "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f",
+        "0xf97f4df75117a78c1A5a0DBb814Af92458539FB4",
+    )]
+    collateral = bytes.fromhex("FF970A61A04b1cA14834A43f5dE4533eBDDB5CC8")
+    for i in range(n):
+        is_long = rng.random() < 0.5
+        index = rng.choice(index_tokens)
+        size = rng.randint(1_000, 2_000_000) * PRICE_PRECISION
+        price = rng.randint(10, 70_000) * PRICE_PRECISION
+        if rng.random() < 0.6:
+            layout = INCREASE_POSITION
+            values = [size, size // 10, price, 0, 0, price, is_long, size // 1000]
+        else:
+            layout = DECREASE_POSITION
+            values = [size, 0, price, 0, 0, price, size // 1000, rng.randint(-10**5, 10**5) * PRICE_PRECISION,
+                      is_long, i]
+        types = [f[2] for f in layout.fields]
+        yield {
+            "address": "0x489ee077994B6658eAfA855C308275EAd8097C4A",
+            "topics": [HexBytes(layout.topic)] + [
+                HexBytes(b"\x00" * 12 + a) for a in (rng.choice(accounts), collateral, index)
+            ],
+            "data": HexBytes(encode(types, values)),
+            "blockNumber": 100_000_000 + i // 2,
+            "blockHash": HexBytes(rng.randbytes(32)),
+            "transactionHash": HexBytes(rng.randbytes(32)),
+            "logIndex": i % 2,
+        }
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def wrap(self, name, fn):
+        samples = self.samples[name]
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter() - start)
+        return timed
+
+    def report(self):
+        print(f"{'stage':<10} {'count':>8} {'p50 us':>10} {'p99 us':>10} {'max us':>10}")
+        for name, values in self.samples.items():
+            if not values:
+                continue
+            values = sorted(values)
+            p50 = values[len(values) // 2]
+            p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+            print(f"{name:<10} {len(values):>8,} {p50 * 1e6:>10.1f} {p99 * 1e6:>10.1f} {values[-1] * 1e6:>10.1f}")
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_watcher(enhanced: bool, logs, telegram: FakeTelegram, track_every: int):
+    db = FakeDB()
+    cls = EnhancedWhaleWatcher if enhanced else WhaleWatcher
+    watcher = cls(telegram)
+    watcher.db = db
+    watcher.trade_writer = TradeBatchWriter(db)
+    watcher.checkpoint = BlockCheckpoint(db, "replay")
+    watcher.bus = EventBus()
+
+    watcher._record_latency = lambda *args: None
+    if enhanced:
+        watcher.wallets = WalletRegistry(db)
+        for log in logs[::track_every]:
+            watcher.wallets.upsert(bytes(log["topics"][1])[-20:], TrackedWallet(label="replay", min_size=0))
+    return watcher
+
+
+async def replay(args):
+    logs = list(read_logs(args.path))
+    telegram = FakeTelegram(args.alert_latency)
+    watcher = build_watcher(args.enhanced, logs, telegram, args.track_every)
+    timer = StageTimer()
+    watcher._process_log = timer.wrap("process", watcher._process_log)
+    watcher.write_trade = timer.wrap("write", watcher.write_trade)
+    watcher.link_pnl = timer.wrap("close", watcher.link_pnl)
+    telegram.send_alert = timer.wrap("alert", telegram.send_alert)
+    aggregator = SignalAggregator(bus=watcher.bus)
+    aggregator.process_whale_signals = timer.wrap("signal", aggregator.process_whale_signals)
+    watcher.trade_writer.flush = timer.wrap("flush", watcher.trade_writer.flush)
+    dispatch = timer.wrap("dispatch", watcher._dispatch)
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_before = rss_mb()
+    rejected_before = metrics.get("trades_rejected") + metrics.get("trade_flush_errors")
+    writer_task = asyncio.create_task(watcher.trade_writer.run())
+    signal_task = asyncio.create_task(aggregator._whale_trade_loop())
+    start = time.perf_counter()
+    for i, log in enumerate(logs):
+        if args.rate:
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            # A socket read yields to the loop once per message; so do we,
+            # which lets the writer task flush in the background
+            await asyncio.sleep(0)
+        await dispatch(log, "replay")
+    await watcher.trade_writer.flush()
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    writer_task.cancel()
+    signal_task.cancel()
+    await asyncio.gather(writer_task, signal_task, return_exceptions=True)
+    rss_after = rss_mb()
+    # A rejected batch is bisected row by row, which would time the failure path
+    rejected = metrics.get("trades_rejected") + metrics.get("trade_flush_errors") - rejected_before
+    assert rejected == 0, f"{rejected:,} trade rows or flushes were rejected"
+
+    print(f"{len(logs):,} logs in {elapsed:.2f}s -> {len(logs) / elapsed:,.0f} logs/s"
+          f" ({'enhanced' if args.enhanced else 'base'} watcher)")
+    print(f"rows written {watcher.db.conn.rows:,}, alerts {telegram.sent:,}, open positions {len(watcher.ledger):,}")
+    timer.report()
+    print(f"RSS {rss_before:.1f} -> {rss_after:.1f} MB (+{rss_after - rss_before:.1f}), "
+          f"peak {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"python heap growth {current / 2**20:.1f} MB, peak {peak / 2**20:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", help="capture file to replay")
+    parser.add_argument("--rate", type=float, default=0, help="logs per second (0 = as fast as possible)")
+    parser.add_argument("--enhanced", action="store_true", help="replay through EnhancedWhaleWatcher")
+    parser.add_argument("--track-every", type=int, default=10, help="track every Nth account (enhanced)")
+    parser.add_argument("--alert-latency", type=float, default=0.0, help="simulated Telegram latency (s)")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report Python heap growth")
+    parser.add_argument("--generate", type=int, help="write N synthetic logs to --out and exit")
+    parser.add_argument("--wallets", type=int, default=5000, help="distinct accounts for --generate")
+    parser.add_argument("--out", help="output file for --generate")
+    args = parser.parse_args()
+    if args.generate:
+        count = write_logs(args.out, generate(args.generate, args.wallets))
+        print(f"wrote {count:,} logs to {args.out}")
+        return
+    if not args.path:
+        parser.error("a capture file is required")
+    asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
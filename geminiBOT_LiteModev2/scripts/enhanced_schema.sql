@@ -84,6 +84,8 @@ INSERT INTO whale_patterns (pattern_name, description, detection_criteria) VALUE
 
 CREATE INDEX idx_tracked_wallets_category ON tracked_wallets(category) WHERE tracking_enabled = true;
 CREATE INDEX idx_tracked_wallets_tags ON tracked_wallets USING GIN(tags);
+-- WalletRegistry.refresh matches addresses case-insensitively
+CREATE INDEX idx_tracked_wallets_address_lower ON tracked_wallets(lower(wallet_address));
 CREATE INDEX idx_wallet_performance_period ON wallet_performance(wallet_address, period);
 CREATE INDEX idx_wallet_patterns_detected ON wallet_patterns(wallet_address, last_detected DESC);
 CREATE INDEX idx_ai_analysis_wallet_type ON ai_analysis(wallet_address, analysis_type, analyzed_at DESC);
@@ -124,3 +126,37 @@ BEGIN
         calculated_at = NOW();
 END;
 $$ LANGUAGE plpgsql;
+
+-- Push tracked wallet changes to running bots (see onchain/wallet_registry.py).
+-- Updates that only touch bookkeeping columns such as last_activity are skipped.
+CREATE OR REPLACE FUNCTION notify_tracked_wallet_change()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF (NEW.wallet_address, NEW.tracking_enabled, NEW.min_trade_size, NEW.alert_direction,
+            NEW.alert_interval, NEW.label, NEW.category, NEW.tags, NEW.metadata)
+           IS NOT DISTINCT FROM
+           (OLD.wallet_address, OLD.tracking_enabled, OLD.min_trade_size, OLD.alert_direction,
+            OLD.alert_interval, OLD.label, OLD.category, OLD.tags, OLD.metadata) THEN
+            RETURN NEW;
+        END IF;
+        IF NEW.wallet_address <> OLD.wallet_address THEN
+            PERFORM pg_notify('tracked_wallets_changed',
+                json_build_object('op', 'DELETE', 'wallet_address', OLD.wallet_address)::text);
+        END IF;
+    END IF;
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('tracked_wallets_changed',
+            json_build_object('op', TG_OP, 'wallet_address', OLD.wallet_address)::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('tracked_wallets_changed',
+        json_build_object('op', TG_OP, 'wallet_address', NEW.wallet_address)::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tracked_wallets_notify ON tracked_wallets;
+CREATE TRIGGER tracked_wallets_notify
+    AFTER INSERT OR UPDATE OR DELETE ON tracked_wallets
+    FOR EACH ROW EXECUTE FUNCTION notify_tracked_wallet_change();
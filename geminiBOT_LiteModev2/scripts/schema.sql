@@ -10,10 +10,27 @@ CREATE TABLE IF NOT EXISTS wallet_trades (
   leverage DOUBLE PRECISION,
   direction VARCHAR(8),
   pnl DOUBLE PRECISION,
-  tx_hash VARCHAR(66) UNIQUE,
+  tx_hash VARCHAR(66),
   timestamp TIMESTAMPTZ DEFAULT NOW()
 );
 
-CREATE UNIQUE INDEX IF NOT EXISTS idx_wallet_trades_tx_hash ON wallet_trades (tx_hash);
+-- Position key and prices, used to rebuild the open-position ledger on startup
+ALTER TABLE wallet_trades ADD COLUMN IF NOT EXISTS collateral_token VARCHAR(42);
+ALTER TABLE wallet_trades ADD COLUMN IF NOT EXISTS index_token VARCHAR(42);
+ALTER TABLE wallet_trades ADD COLUMN IF NOT EXISTS price DOUBLE PRECISION;
+ALTER TABLE wallet_trades ADD COLUMN IF NOT EXISTS block_number BIGINT;
+ALTER TABLE wallet_trades ADD COLUMN IF NOT EXISTS log_index INTEGER NOT NULL DEFAULT 0;
+
+-- One row per log: a transaction can open or close several positions
+ALTER TABLE wallet_trades DROP CONSTRAINT IF EXISTS wallet_trades_tx_hash_key;
+DROP INDEX IF EXISTS idx_wallet_trades_tx_hash;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_wallet_trades_tx_log ON wallet_trades (tx_hash, log_index);
 CREATE INDEX IF NOT EXISTS idx_wallet_trades_protocol_address ON wallet_trades (protocol, wallet_address);
 
+
+-- Last fully processed block per on-chain watcher, used for backfill on restart
+CREATE TABLE IF NOT EXISTS watcher_checkpoints (
+  name VARCHAR(64) PRIMARY KEY,
+  block_number BIGINT NOT NULL,
+  updated_at TIMESTAMPTZ DEFAULT NOW()
+);
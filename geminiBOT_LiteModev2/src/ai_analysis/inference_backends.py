@@ -0,0 +1,118 @@
+# src/ai_analysis/inference_backends.py
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# A backend is called like a transformers pipeline:
+# model(texts, batch_size=n, truncation=True) -> [{"label": str, "score": float}, ...]
+Backend = Callable[..., List[Dict]]
+
+MAX_TOKENS = 512
+
+
+def _artifact_dir(cache_dir: str, model_name: str, backend: str) -> Path:
+    return Path(cache_dir) / f"{re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)}-{backend}"
+
+
+def load_pytorch(model_name: str, cache_dir: str) -> Backend:
+    """The float32 transformers pipeline (the original behaviour)."""
+    from transformers import pipeline
+
+    return pipeline("sentiment-analysis", model=model_name, device=-1)
+
+
+def load_int8(model_name: str, cache_dir: str) -> Backend:
+    """Dynamically quantized (INT8 ``nn.Linear``) model; saved after the first conversion."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+    target = _artifact_dir(cache_dir, model_name, "int8")
+    weights = target / "model.pt"
+    if weights.exists():
+        model = torch.load(weights, weights_only=False)
+        tokenizer = AutoTokenizer.from_pretrained(target)
+    else:
+        start = time.perf_counter()
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        target.mkdir(parents=True, exist_ok=True)
+        tokenizer.save_pretrained(target)
+        torch.save(model, target / "model.pt.tmp")
+        os.replace(target / "model.pt.tmp", weights)
+        logger.info(f"[InferenceBackends] Quantized {model_name} in {time.perf_counter() - start:.1f}s -> {target}")
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=-1)
+
+
+def _export_onnx(model_name: str, target: Path) -> None:
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    target.mkdir(parents=True, exist_ok=True)
+    tmp = target / "model.onnx.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model, (sample["input_ids"], sample["attention_mask"]), str(tmp),
+            input_names=["input_ids", "attention_mask"], output_names=["logits"],
+            dynamic_axes={"input_ids": {0: "batch", 1: "tokens"},
+                          "attention_mask": {0: "batch", 1: "tokens"}, "logits": {0: "batch"}},
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(target)
+    model.config.save_pretrained(target)
+    # Renamed last, so an interrupted export is redone on the next start
+    os.replace(tmp, target / "model.onnx")
+    logger.info(f"[InferenceBackends] Exported {model_name} to ONNX in {time.perf_counter() - start:.1f}s -> {target}")
+
+
+def load_onnx(model_name: str, cache_dir: str) -> Backend:
+    """ONNX export of the model run by onnxruntime on CPU; exported once."""
+    import numpy as np
+    import onnxruntime as ort
+    from transformers import AutoConfig, AutoTokenizer
+
+    target = _artifact_dir(cache_dir, model_name, "onnx")
+    if not (target / "model.onnx").exists():
+        _export_onnx(model_name, target)
+    tokenizer = AutoTokenizer.from_pretrained(target)
+    labels = AutoConfig.from_pretrained(target).id2label
+    options = ort.SessionOptions()
+    threads = int(os.getenv("OMP_NUM_THREADS", "0"))
+    if threads:
+        options.intra_op_num_threads = threads
+    session = ort.InferenceSession(str(target / "model.onnx"), options, providers=["CPUExecutionProvider"])
+
+    def run(texts, batch_size=None, **kwargs):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        encoded = tokenizer(texts, padding=True, truncation=True, max_length=MAX_TOKENS, return_tensors="np")
+        logits = session.run(["logits"], {"input_ids": encoded["input_ids"].astype(np.int64),
+                                          "attention_mask": encoded["attention_mask"].astype(np.int64)})[0]
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp / exp.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return [{"label": labels[int(i)], "score": float(p[i])} for i, p in zip(best, probs)]
+    run.tokenizer = tokenizer
+    return run
+
+
+BACKENDS = {"pytorch": load_pytorch, "int8": load_int8, "onnx": load_onnx}
+
+
+def load_backend(backend: str, model_name: str, cache_dir: str) -> Backend:
+    try:
+        loader = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown sentiment backend {backend!r}; expected one of {sorted(BACKENDS)}")
+    logger.info(f"[InferenceBackends] Loading {model_name} with the {backend} backend")
+    return loader(model_name, cache_dir)
@@ -0,0 +1,106 @@
+# src/ai_analysis/inference_batcher.py
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, List
+
+from utils.metrics import metrics
+
+
+class InferenceBatcher:
+    """Run a blocking ``predict(list[str]) -> list`` on micro-batches.
+
+    Concurrent :meth:`submit` calls are queued. A worker takes up to
+    ``max_batch`` of them, or whatever arrived within ``max_wait``
+    seconds of the first, and runs ``predict`` on the batch in
+    ``executor``. The event loop keeps running meanwhile. Each caller's
+    future gets its own result, or the batch's exception.
+
+    Up to ``concurrency`` batches run at once (one per worker process in
+    pool mode). While all are busy, new requests keep queueing and go
+    out together as the next batch.
+    """
+
+    def __init__(self, predict: Callable[[List[str]], List[Any]], max_batch: int = 16,
+                 max_wait: float = 0.01, executor: Executor | None = None, name: str = "sentiment",
+                 concurrency: int = 1):
+        self.predict = predict
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix=f"{name}-infer"
+        )
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    def __len__(self):
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, text: str) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _next_batch(self) -> list:
+        queue = self._queue
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            await slots.acquire()
+            batch = await self._next_batch()
+            # Callers that gave up while queued need no inference
+            batch = [(text, fut) for text, fut in batch if not fut.done()]
+            if not batch:
+                slots.release()
+                continue
+            if self.concurrency == 1:
+                await self._infer(loop, batch, slots)
+            else:
+                task = loop.create_task(self._infer(loop, batch, slots))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _infer(self, loop, batch: list, slots: asyncio.Semaphore) -> None:
+        metrics.observe(f"{self.name}_batch_size", len(batch))
+        metrics.set(f"{self.name}_queue_depth", self._queue.qsize())
+        start = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self.executor, self.predict, [t for t, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"predict returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            slots.release()
+            metrics.observe(f"{self.name}_inference_seconds", time.perf_counter() - start)
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
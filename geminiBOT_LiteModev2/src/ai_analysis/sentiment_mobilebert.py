@@ -3,52 +3,154 @@
 import asyncio
 import hashlib
 import json
-from transformers import pipeline
 import aioredis
 from utils.logger import get_logger
-from config.settings import ENABLE_MOBILEBERT, BERT_MODEL_NAME
+from utils.metrics import metrics
+from utils.cache import LRUCache
+from config.settings import (
+    ENABLE_MOBILEBERT, BERT_MODEL_NAME, SENTIMENT_BACKEND, SENTIMENT_MODEL_CACHE,
+    SENTIMENT_BATCH_SIZE, SENTIMENT_BATCH_WAIT_MS, SENTIMENT_WORKERS, SENTIMENT_WORKER_THREADS,
+    SENTIMENT_WORKER_IDLE_SECONDS, SENTIMENT_CACHE_SIZE, SENTIMENT_WINDOW_OVERLAP, SENTIMENT_MAX_WINDOWS,
+)
+from ai_analysis.inference_backends import MAX_TOKENS, load_backend
+from ai_analysis.inference_batcher import InferenceBatcher
+from ai_analysis.sentiment_workers import SentimentWorkerPool
+from ai_analysis.text_windows import TokenWindows, combine
 
 logger = get_logger(__name__)
 
+NEUTRAL = {"label": "NEUTRAL", "score": 0.5}
+
+
+def cache_key(text: str) -> str:
+    """``sentiment:<sha256>`` of the text with case and whitespace folded."""
+    normalized = " ".join(text.split()).lower()
+    return "sentiment:" + hashlib.sha256(normalized.encode()).hexdigest()
+
+
 class SentimentAnalyzer:
     """
     Async MobileBERT sentiment analyzer.
-    Uses CPU only.
+    Uses CPU only. Inference runs in a worker thread on micro-batches of
+    concurrent requests, so the event loop is never blocked by the model.
+    With ``workers`` > 0 the model runs in that many separate processes
+    (see :class:`~ai_analysis.sentiment_workers.SentimentWorkerPool`).
+
+    Results are cached in-process (LRU with the same TTL) in front of
+    Redis, both keyed by :func:`cache_key`. Texts longer than the model's
+    token limit are scored as overlapping windows (see
+    :class:`~ai_analysis.text_windows.TokenWindows`).
     """
 
-    def __init__(self, redis_url="redis://localhost"):
+    def __init__(self, redis_url="redis://localhost", batch_size: int = SENTIMENT_BATCH_SIZE,
+                 batch_wait_ms: float = SENTIMENT_BATCH_WAIT_MS, workers: int = SENTIMENT_WORKERS):
         self.pipeline = None
         self._loaded = False
+        # Concurrent first calls share one load (and one worker pool)
+        self._load_lock = asyncio.Lock()
         self.redis = aioredis.from_url(redis_url)
         self.cache_ttl = 900  # 15 minutes
+        self.local = LRUCache(SENTIMENT_CACHE_SIZE, ttl=self.cache_ttl)
+        self.workers = workers
+        self.pool: SentimentWorkerPool | None = None
+        self.windows: TokenWindows | None = None
+        self.batcher = InferenceBatcher(self._predict, batch_size, batch_wait_ms / 1000,
+                                        concurrency=max(1, workers))
 
     async def _load(self):
         if self._loaded:
             return
+        async with self._load_lock:
+            if not self._loaded:
+                await self._load_model()
+
+    async def _load_model(self):
         if not ENABLE_MOBILEBERT:
             logger.warning("[SentimentAnalyzer] MobileBERT disabled via config")
-            self.pipeline = lambda text: [{"label": "NEUTRAL", "score": 0.0}]
+            self.pipeline = lambda texts, **kwargs: [{"label": "NEUTRAL", "score": 0.0} for _ in texts]
             self._loaded = True
             return
-        logger.info("[SentimentAnalyzer] Loading MobileBERT...")
-        self.pipeline = pipeline(
-            "sentiment-analysis",
-            model=BERT_MODEL_NAME,
-            device=-1,
+        if self.workers > 0:
+            logger.info(f"[SentimentAnalyzer] Starting {self.workers} MobileBERT worker processes...")
+            self.pool = SentimentWorkerPool.for_model(
+                BERT_MODEL_NAME, self.workers, SENTIMENT_BACKEND, SENTIMENT_MODEL_CACHE,
+                threads=SENTIMENT_WORKER_THREADS or None,
+                idle_timeout=SENTIMENT_WORKER_IDLE_SECONDS,
+            )
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.batcher.executor, self.pool.start)
+            # The model lives in the workers; windowing only needs the tokenizer here
+            self._set_windows(await loop.run_in_executor(self.batcher.executor, self._load_tokenizer))
+            self.pipeline = self.pool
+            self._loaded = True
+            return
+        logger.info(f"[SentimentAnalyzer] Loading MobileBERT ({SENTIMENT_BACKEND})...")
+        # Loading takes seconds; keep the loop running meanwhile
+        self.pipeline = await asyncio.get_running_loop().run_in_executor(
+            self.batcher.executor, load_backend, SENTIMENT_BACKEND, BERT_MODEL_NAME, SENTIMENT_MODEL_CACHE,
         )
+        self._set_windows(getattr(self.pipeline, "tokenizer", None))
         self._loaded = True
         logger.info("[SentimentAnalyzer] MobileBERT model loaded.")
 
     async def run(self):
         await self._load()
         while True:
-            await asyncio.sleep(3600)
+            if self.pool is None:
+                await asyncio.sleep(3600)
+                continue
+            await asyncio.sleep(self.pool.idle_timeout / 2)
+            await asyncio.get_running_loop().run_in_executor(None, self.pool.reap_idle)
+
+    @staticmethod
+    def _load_tokenizer():
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(BERT_MODEL_NAME)
+
+    def _set_windows(self, tokenizer) -> None:
+        if tokenizer is not None:
+            self.windows = TokenWindows(tokenizer, MAX_TOKENS, SENTIMENT_WINDOW_OVERLAP, SENTIMENT_MAX_WINDOWS)
+
+    def _predict(self, texts: list[str]) -> list[dict]:
+        """Score a batch in one forward pass; runs in the batcher's thread.
+
+        Every window of every text goes into the same pass; each text's
+        windows are then combined into one result.
+        """
+        if self.windows is None:
+            return self.pipeline(texts, batch_size=len(texts), truncation=True)
+        split = [self.windows.split(text) for text in texts]
+        flat = [window for windows, _ in split for window in windows]
+        scored = self.pipeline(flat, batch_size=len(flat), truncation=True)
+        results, start = [], 0
+        for windows, tokens in split:
+            results.append(combine(scored[start:start + len(windows)], tokens))
+            start += len(windows)
+        return results
+
+    def _count(self, tier: str, n: int = 1) -> None:
+        """Count lookups served by ``tier`` and export both tiers' hit rates."""
+        if not n:
+            return
+        metrics.inc(f"sentiment_cache_{tier}", n)
+        local = metrics.get("sentiment_cache_local_hits")
+        remote = metrics.get("sentiment_cache_redis_hits")
+        misses = metrics.get("sentiment_cache_misses")
+        total = local + remote + misses
+        metrics.set("sentiment_cache_local_hit_rate", local / total)
+        if remote + misses:
+            metrics.set("sentiment_cache_redis_hit_rate", remote / (remote + misses))
 
     async def analyze(self, text: str) -> dict:
         if not self._loaded:
             await self._load()
 
-        key = "sentiment:" + hashlib.sha256(text.encode()).hexdigest()
+        key = cache_key(text)
+        result = self.local.get(key)
+        if result is not None:
+            self._count("local_hits")
+            return result
 
         try:
             cached = await self.redis.get(key)
@@ -58,20 +160,81 @@ class SentimentAnalyzer:
 
         if cached:
             try:
-                return json.loads(cached)
+                result = json.loads(cached)
+                self.local.set(key, result)
+                self._count("redis_hits")
+                return result
             except Exception as e:
                 logger.exception(f"[SentimentAnalyzer] Cache decode error: {e}")
 
+        self._count("misses")
         try:
-            result = self.pipeline(text[:512])[0]
+            result = await self.batcher.submit(text)
             logger.debug(f"[SentimentAnalyzer] {result}")
         except Exception as e:
             logger.error(f"[SentimentAnalyzer] Error: {e}")
-            return {"label": "NEUTRAL", "score": 0.5}
+            return dict(NEUTRAL)
 
+        self.local.set(key, result)
         try:
             await self.redis.set(key, json.dumps(result), ex=self.cache_ttl)
         except aioredis.RedisError as e:
             logger.exception(f"[SentimentAnalyzer] Redis set error: {e}")
 
         return result
+
+    async def analyze_many(self, texts: list[str]) -> list[dict]:
+        """Score ``texts`` with one ``MGET`` and one pipelined ``SET`` at most.
+
+        Lookups go in-process cache, then Redis for what is left. The
+        remaining texts are scored together and written back.
+        """
+        if not self._loaded:
+            await self._load()
+        keys = [cache_key(t) for t in texts]
+        found: dict[str, dict] = {}
+        for key in keys:
+            result = self.local.get(key)
+            if result is not None:
+                found[key] = result
+        self._count("local_hits", sum(1 for k in keys if k in found))
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            try:
+                values = await self.redis.mget(*missing)
+            except aioredis.RedisError as e:
+                logger.exception(f"[SentimentAnalyzer] Redis mget error: {e}")
+                values = [None] * len(missing)
+            for key, value in zip(missing, values):
+                if value:
+                    try:
+                        found[key] = json.loads(value)
+                        self.local.set(key, found[key])
+                    except Exception as e:
+                        logger.exception(f"[SentimentAnalyzer] Cache decode error: {e}")
+            self._count("redis_hits", sum(1 for k in missing if k in found))
+
+        to_score = {k: t for k, t in zip(keys, texts) if k not in found}
+        self._count("misses", len(to_score))
+        if to_score:
+            results = await asyncio.gather(
+                *(self.batcher.submit(t) for t in to_score.values()), return_exceptions=True
+            )
+            fresh = {}
+            for key, result in zip(to_score, results):
+                if isinstance(result, Exception):
+                    logger.error(f"[SentimentAnalyzer] Error: {result}")
+                    found[key] = dict(NEUTRAL)
+                    continue
+                found[key] = fresh[key] = result
+                self.local.set(key, result)
+            if fresh:
+                try:
+                    pipe = self.redis.pipeline(transaction=False)
+                    for key, result in fresh.items():
+                        pipe.set(key, json.dumps(result), ex=self.cache_ttl)
+                    await pipe.execute()
+                except aioredis.RedisError as e:
+                    logger.exception(f"[SentimentAnalyzer] Redis pipeline error: {e}")
+        return [found[k] for k in keys]
@@ -0,0 +1,198 @@
+# src/ai_analysis/sentiment_workers.py
+
+import multiprocessing as mp
+import os
+import threading
+import time
+from functools import partial
+from typing import Callable, List
+
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# spawn, not fork: the parent runs an event loop and executor threads
+_ctx = mp.get_context("spawn")
+
+
+def load_pipeline(model_name: str, backend: str = "pytorch", cache_dir: str = ""):
+    from ai_analysis.inference_backends import load_backend
+
+    return load_backend(backend, model_name, cache_dir)
+
+
+def _limit_threads(threads: int) -> None:
+    """Pin BLAS/torch to ``threads`` cores before the model is loaded."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:  # already set by an earlier torch call
+        pass
+
+
+def _worker_main(loader: Callable, threads: int, conn) -> None:
+    """Worker process: load the model once, then score batches until told to stop.
+
+    Requests are lists of strings; replies are ``(label, score)`` tuples,
+    or an ``Exception`` for a failed batch.
+    """
+    _limit_threads(threads)
+    model = loader()
+    conn.send("ready")
+    while True:
+        try:
+            texts = conn.recv()
+        except EOFError:
+            return
+        if texts is None:
+            return
+        try:
+            conn.send([(r["label"], float(r["score"])) for r in model(texts, batch_size=len(texts), truncation=True)])
+        except Exception as e:
+            conn.send(RuntimeError(f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "busy", "last_used")
+
+    def __init__(self):
+        self.process = None
+        self.conn = None
+        self.busy = False
+        self.last_used = 0.0
+
+
+class SentimentWorkerPool:
+    """``workers`` model processes behind a pipeline-compatible call.
+
+    ``pool(texts, batch_size=...)`` returns the same ``[{"label", "score"}]``
+    list as a transformers pipeline, so :class:`SentimentAnalyzer` and its
+    batcher use it unchanged. The caller blocks on an idle worker, which
+    is why the batcher runs one executor thread per worker. Each process
+    is limited to ``threads`` torch threads. A worker idle for
+    ``idle_timeout`` seconds is stopped by :meth:`reap_idle` and restarted
+    on demand, as is one that crashed.
+    """
+
+    def __init__(self, workers: int, loader: Callable, threads: int | None = None,
+                 idle_timeout: float = 600.0, start_timeout: float = 300.0):
+        self.loader = loader
+        self.threads = threads or max(1, (os.cpu_count() or 1) // workers)
+        self.idle_timeout = idle_timeout
+        self.start_timeout = start_timeout
+        self._workers = [_Worker() for _ in range(workers)]
+        self._cond = threading.Condition()
+
+    @classmethod
+    def for_model(cls, model_name: str, workers: int, backend: str = "pytorch", cache_dir: str = "",
+                  **kwargs) -> "SentimentWorkerPool":
+        return cls(workers, partial(load_pipeline, model_name, backend, cache_dir), **kwargs)
+
+    def __len__(self):
+        return len(self._workers)
+
+    @property
+    def alive(self) -> int:
+        return sum(1 for w in self._workers if w.process is not None and w.process.is_alive())
+
+    def start(self) -> None:
+        """Start every worker now so the models load up front."""
+        for worker in self._workers:
+            self._spawn(worker)
+        logger.info(f"[SentimentWorkerPool] {len(self._workers)} workers up, {self.threads} threads each")
+
+    def _spawn(self, worker: _Worker) -> None:
+        if worker.process is not None and worker.process.is_alive():
+            return
+        parent, child = _ctx.Pipe()
+        process = _ctx.Process(target=_worker_main, args=(self.loader, self.threads, child), daemon=True)
+        process.start()
+        child.close()
+        if not parent.poll(self.start_timeout) or parent.recv() != "ready":
+            process.kill()
+            raise RuntimeError("sentiment worker failed to start")
+        worker.process, worker.conn, worker.last_used = process, parent, time.monotonic()
+        metrics.inc("sentiment_worker_starts")
+
+    @staticmethod
+    def _detach(worker: _Worker) -> tuple:
+        """Take the process off ``worker`` (under ``_cond``); stop it with :meth:`_stop`."""
+        detached = (worker.process, worker.conn)
+        worker.process = worker.conn = None
+        return detached
+
+    @staticmethod
+    def _stop(process, conn) -> None:
+        """Ask a detached worker to exit; may block for seconds, so never under ``_cond``."""
+        try:
+            conn.send(None)
+        except (OSError, ValueError):
+            pass
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+        conn.close()
+
+    def _checkout(self) -> _Worker:
+        with self._cond:
+            while True:
+                idle = [w for w in self._workers if not w.busy]
+                if idle:
+                    # Prefer a live worker so a recycled one stays down while others cope
+                    worker = next((w for w in idle if w.process is not None), idle[0])
+                    worker.busy = True
+                    return worker
+                self._cond.wait()
+
+    def _checkin(self, worker: _Worker) -> None:
+        with self._cond:
+            worker.busy = False
+            worker.last_used = time.monotonic()
+            self._cond.notify()
+
+    def __call__(self, texts: List[str], batch_size: int | None = None, **kwargs) -> List[dict]:
+        worker = self._checkout()
+        try:
+            self._spawn(worker)
+            worker.conn.send(list(texts))
+            reply = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            # Crashed mid-batch; restarted on its next checkout
+            logger.error(f"[SentimentWorkerPool] worker died: {e}")
+            metrics.inc("sentiment_worker_crashes")
+            if worker.process is not None:
+                worker.process.kill()
+                worker.process = worker.conn = None
+            raise RuntimeError("sentiment worker died") from e
+        finally:
+            self._checkin(worker)
+        if isinstance(reply, Exception):
+            raise reply
+        return [{"label": label, "score": score} for label, score in reply]
+
+    def reap_idle(self) -> int:
+        """Stop workers idle longer than ``idle_timeout``; returns how many."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._cond:
+            detached = [self._detach(w) for w in self._workers
+                        if not w.busy and w.process is not None and w.last_used < cutoff]
+        for process, conn in detached:
+            self._stop(process, conn)
+        stopped = len(detached)
+        if stopped:
+            logger.info(f"[SentimentWorkerPool] Recycled {stopped} idle workers")
+            metrics.inc("sentiment_worker_recycled", stopped)
+        return stopped
+
+    def close(self) -> None:
+        with self._cond:
+            detached = [self._detach(w) for w in self._workers if w.process is not None]
+        for process, conn in detached:
+            self._stop(process, conn)
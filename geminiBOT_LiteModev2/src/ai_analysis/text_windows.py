@@ -0,0 +1,92 @@
+# src/ai_analysis/text_windows.py
+
+import hashlib
+import threading
+from typing import Dict, List, Tuple
+
+from utils.cache import LRUCache
+from utils.metrics import metrics
+
+
+class TokenWindows:
+    """Split texts into overlapping windows that fit the model's token limit.
+
+    A text is tokenized once. If it fits in ``max_tokens`` (special tokens
+    included) it is scored whole. Otherwise it becomes windows of that
+    size, each starting ``max_tokens - overlap`` tokens after the last.
+    At most ``max_windows`` windows are kept, spread evenly over the
+    text. Windows are cached per text, so repeated long texts are not
+    tokenized again.
+
+    The model takes text, so windows are decoded back to text. Decoding
+    and re-encoding is not exact at every boundary (a window can start
+    inside a word), so a window whose text re-encodes past the limit is
+    shortened until it fits. ``split`` may be called from several
+    executor threads; the tokenizer and cache are used under one lock.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int = 512, overlap: int = 64, max_windows: int = 8,
+                 cache_size: int = 1024):
+        self.tokenizer = tokenizer
+        self.body = max_tokens - tokenizer.num_special_tokens_to_add()
+        self.overlap = min(overlap, self.body // 2)
+        self.max_windows = max(1, max_windows)
+        self._cache = LRUCache(cache_size)
+        self._lock = threading.Lock()
+
+    def split(self, text: str) -> Tuple[List[str], List[int]]:
+        """Window texts and their token counts for ``text``."""
+        key = hashlib.sha256(text.encode()).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                metrics.inc("sentiment_token_cache_hits")
+                return cached
+            result = self._split(text)
+            self._cache.set(key, result)
+            return result
+
+    def _split(self, text: str) -> Tuple[List[str], List[int]]:
+        ids = self._encode(text)
+        if len(ids) <= self.body:
+            result = ([text], [max(1, len(ids))])
+        else:
+            step = self.body - self.overlap
+            starts = list(range(0, len(ids) - self.overlap, step))
+            if len(starts) > self.max_windows:
+                last = len(starts) - 1
+                starts = [starts[round(i * last / (self.max_windows - 1))] for i in range(self.max_windows)] \
+                    if self.max_windows > 1 else starts[:1]
+            windows = [self._decode(ids[s:s + self.body]) for s in starts]
+            result = ([w for w, _ in windows], [n for _, n in windows])
+            metrics.inc("sentiment_windowed_texts")
+        return result
+
+    def _encode(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def _decode(self, chunk: List[int]) -> Tuple[str, int]:
+        """Text for ``chunk`` and its token count once the model re-encodes it."""
+        while True:
+            window = self.tokenizer.decode(chunk)
+            tokens = len(self._encode(window))
+            excess = tokens - self.body
+            if excess <= 0 or excess >= len(chunk):
+                return window, min(tokens, self.body)
+            metrics.inc("sentiment_windows_shortened")
+            chunk = chunk[:-excess]
+
+
+def combine(results: List[Dict], weights: List[int]) -> Dict:
+    """Confidence-weighted vote over window results.
+
+    Each window backs its label with ``score * tokens``. The label with
+    the most support wins, and its support over all tokens is the score.
+    """
+    if len(results) == 1:
+        return results[0]
+    support: Dict[str, float] = {}
+    for result, tokens in zip(results, weights):
+        support[result["label"]] = support.get(result["label"], 0.0) + result["score"] * tokens
+    label = max(support, key=support.get)
+    return {"label": label, "score": support[label] / sum(weights)}
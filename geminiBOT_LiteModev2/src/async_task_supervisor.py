@@ -7,7 +7,7 @@ logger = get_logger(__name__)
 
 async def run_with_retry(task_coro, *, base_delay: float = 5, max_delay: float = 60,
                         reset_time: float = 60):
-    """Run a coroutine forever, restarting on failure.
+    """Run a coroutine until it returns, restarting on failure.
 
     Parameters
     ----------
@@ -39,4 +39,7 @@ async def run_with_retry(task_coro, *, base_delay: float = 5, max_delay: float =
             await asyncio.sleep(next_delay)
             delay = next_delay
         else:
-            delay = base_delay
+            # Finished on its own (e.g. a component disabled by missing config);
+            # restarting it straight away would spin the event loop
+            logger.info(f"[Supervisor] {getattr(task_coro, '__qualname__', task_coro)} finished")
+            return
@@ -0,0 +1,73 @@
+# src/components.py
+
+import asyncio
+import importlib
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from config.settings import DISABLED_COMPONENTS, ENABLE_METRICS_SERVER, METRICS_PORT
+from event_bus import event_bus
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ComponentSpec:
+    """How :class:`~main.TradingSystem` builds one component.
+
+    ``target`` is ``"module:Class"``; the module is imported only when the
+    component is built, so a disabled component never loads its libraries.
+    ``needs`` names components passed to the constructor positionally.
+    """
+    name: str
+    target: str
+    needs: Tuple[str, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    enabled: bool = True
+
+
+# Start order: cheap components first so the bus carries events while the
+# ones importing telegram and web3 are still loading. The aggregator
+# comes before the watchers so its subscription exists when they publish.
+COMPONENTS: List[ComponentSpec] = [
+    ComponentSpec("metrics_server", "monitoring.metrics_server:MetricsServer", kwargs={"port": METRICS_PORT},
+                  enabled=ENABLE_METRICS_SERVER),
+    ComponentSpec("system_monitor", "monitoring.system_monitor:SystemMonitor"),
+    ComponentSpec("api_monitor", "monitoring.api_monitor:ApiMonitor"),
+    ComponentSpec("ensemble", "ai_analysis.ensemble_manager:EnsembleManager"),
+    # The only aggregator (and so the only sentiment model); watchers and
+    # news reach it through the event bus
+    ComponentSpec("signal_aggregator", "signal_generation.signal_aggregator:SignalAggregator",
+                  kwargs={"bus": event_bus}),
+    # Before hyperliquid: that package swaps its own ``ccxt`` into sys.modules,
+    # which has no kraken
+    ComponentSpec("paper_trader", "execution.paper_trader:PaperTrader"),
+    ComponentSpec("portfolio_monitor", "risk_management.portfolio_monitor:PortfolioMonitor"),
+    ComponentSpec("hyperliquid", "onchain.hyperliquid_watcher:HyperliquidWatcher", kwargs={"bus": event_bus}),
+    ComponentSpec("telegram_bot", "execution.telegram_bot:TelegramBot"),
+    ComponentSpec("news", "data_ingestion.news_aggregator:NewsAggregator", needs=("telegram_bot",),
+                  kwargs={"bus": event_bus}),
+    ComponentSpec("whale_watcher", "onchain.enhanced_whale_watcher:EnhancedWhaleWatcher", needs=("telegram_bot",)),
+]
+
+
+def enabled_components(registry: List[ComponentSpec] = COMPONENTS,
+                       disabled=DISABLED_COMPONENTS) -> List[ComponentSpec]:
+    """Specs switched on by their flag and not listed in ``DISABLED_COMPONENTS``."""
+    return [spec for spec in registry if spec.enabled and spec.name not in disabled]
+
+
+async def build_component(spec: ComponentSpec, deps: Dict[str, Any]):
+    """Import ``spec``'s module off the loop, then construct the component."""
+    module_name, _, attr = spec.target.partition(":")
+    start = time.perf_counter()
+    # Imports of telegram/web3/ccxt take seconds; running components keep going
+    module = await asyncio.to_thread(importlib.import_module, module_name)
+    component = getattr(module, attr)(*(deps[name] for name in spec.needs), **spec.kwargs)
+    elapsed = time.perf_counter() - start
+    metrics.set(f"startup_{spec.name}_seconds", elapsed)
+    logger.info(f"[Components] {spec.name} ready in {elapsed:.2f}s")
+    return component
@@ -1,13 +1,83 @@
 import asyncio
+import calendar
+import hashlib
+import time
+from urllib.parse import urlparse
+import aiohttp
 import feedparser
 import aioredis
+from config.settings import NEWS_FEED_TIMEOUT, NEWS_STREAM_MAXLEN, NEWS_SEEN_SIZE
+from utils.cache import LRUCache
 from utils.logger import get_logger
+from utils.metrics import metrics
+from event_bus import event_bus, NEWS_ITEMS, NewsItem
 
 logger = get_logger(__name__)
 
+STREAM_KEY = "news:items"
+SEEN_KEY = "news:seen"
+ALERT_CURSOR_KEY = "news:cursor:telegram"
+# Telegram rejects messages longer than this
+ALERT_MAX_CHARS = 4096
+
+
+def item_hash(title: str, link: str = "") -> str:
+    """Identity of a headline: its link, or its case/whitespace-folded title."""
+    key = link or " ".join(title.split()).lower()
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def item_from_entry(entry_id, fields: dict) -> NewsItem:
+    """A :class:`NewsItem` from one ``XRANGE`` entry."""
+    fields = {_text(k): _text(v) for k, v in fields.items()}
+    return NewsItem(
+        fields["title"], fields.get("source", ""), fields.get("link", ""),
+        float(fields["published"]) if fields.get("published") else None,
+        fields.get("hash", ""), _text(entry_id),
+    )
+
+
+def alert_chunks(items: list[NewsItem], limit: int = ALERT_MAX_CHARS) -> list[tuple[str, str]]:
+    """Headlines joined into messages of at most ``limit`` characters.
+
+    Each message comes with the stream id of its last item, the cursor to
+    store once it is sent.
+    """
+    chunks, lines, size = [], [], 0
+    last_id = None
+    for item in items:
+        line = item.title[:limit]
+        if lines and size + 1 + len(line) > limit:
+            chunks.append(("\n".join(lines), last_id))
+            lines, size = [], 0
+        size += len(line) + (1 if lines else 0)
+        lines.append(line)
+        last_id = item.id
+    if lines:
+        chunks.append(("\n".join(lines), last_id))
+    return chunks
+
 
 class NewsAggregator:
-    """Fetch and cache market-moving news from multiple RSS feeds."""
+    """Fetch and cache market-moving news from multiple RSS feeds.
+
+    Feeds are fetched concurrently on one HTTP session, each with its own
+    timeout. Requests carry the feed's last ``ETag``/``Last-Modified``, so
+    an unchanged feed answers 304 and its previous entries are reused
+    without parsing. Parsing runs in a worker thread.
+
+    Headlines not seen before (see :meth:`filter_new`) are appended to the
+    ``news:items`` Redis stream, then published on the bus one by one
+    without yielding in between, so the signal aggregator drains them from
+    its queue and scores them in one batch. Readers page through the
+    stream with :meth:`items_since`.
+    """
+
+    alert_max_chars = ALERT_MAX_CHARS
 
     FEEDS = [
         "https://feeds.bbci.co.uk/news/world/rss.xml",
@@ -15,45 +85,159 @@ class NewsAggregator:
         "https://www.reuters.com/rssFeed/marketsNews",
     ]
 
-    def __init__(self, tg_bot=None, redis_url: str = "redis://localhost", limit: int = 5) -> None:
+    def __init__(self, tg_bot=None, redis_url: str = "redis://localhost", limit: int = 5, bus=None,
+                 timeout: float = NEWS_FEED_TIMEOUT, session=None, stream_maxlen: int = NEWS_STREAM_MAXLEN,
+                 seen_size: int = NEWS_SEEN_SIZE) -> None:
         self.tg_bot = tg_bot
+        self.bus = bus if bus is not None else event_bus
         self.redis = aioredis.from_url(redis_url)
-        self.cache_ttl = 600
         self.limit = limit
+        self.stream_maxlen = stream_maxlen
+        self.seen_size = seen_size
+        # Spares a Redis round-trip for headlines already seen by this process
+        self.seen = LRUCache(seen_size)
+        self.timeout = timeout
+        self.session = session
+        # url -> (ETag, Last-Modified) of the last 200, and the entries it held
+        self.validators: dict[str, tuple] = {}
+        self.entries: dict[str, list] = {}
 
     async def run(self) -> None:
-        while True:
-            await self.update_news()
-            await asyncio.sleep(300)
+        try:
+            while True:
+                await self.update_news()
+                await asyncio.sleep(300)
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
 
     async def update_news(self) -> None:
         try:
             items = await self.fetch_all()
-            await self.redis.set("latest_news", items, ex=self.cache_ttl)
-            logger.info("[NewsAggregator] Cached %d headlines", len(items))
+            new = await self.filter_new(items)
+            if new:
+                await self.store(new)
+            logger.info("[NewsAggregator] %d new of %d headlines", len(new), len(items))
+            for item in new:
+                await self.bus.publish(NEWS_ITEMS, item)
         except Exception as e:  # pragma: no cover - network, redis errors
             logger.error("[NewsAggregator] update error: %s", e)
 
-    async def fetch_all(self) -> str:
-        headlines = []
-        for url in self.FEEDS:
-            try:
-                feed = feedparser.parse(url)
-                for entry in feed.entries[: self.limit]:
-                    headlines.append(entry.title)
-            except Exception as e:  # pragma: no cover - network errors
-                logger.error("[NewsAggregator] feed error: %s", e)
-        data = "\n".join(headlines)
-        return data
+    async def fetch_all(self) -> list[NewsItem]:
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        results = await asyncio.gather(*(self.fetch_feed(url) for url in self.FEEDS), return_exceptions=True)
+        items = []
+        for url, result in zip(self.FEEDS, results):
+            if isinstance(result, BaseException):
+                metrics.inc("news_feed_errors")
+                logger.error("[NewsAggregator] feed error %s: %r", url, result)
+                continue
+            source = urlparse(url).netloc or url
+            for entry in result:
+                link = entry.get("link", "")
+                published = entry.get("published_parsed")
+                items.append(NewsItem(
+                    entry.title, source, link, float(calendar.timegm(published)) if published else None,
+                    item_hash(entry.title, link),
+                ))
+        return items
+
+    async def fetch_feed(self, url: str) -> list:
+        """Latest ``limit`` entries of one feed; a 304 returns the previous ones."""
+        start = time.perf_counter()
+        headers = {}
+        etag, modified = self.validators.get(url, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+        async with self.session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+            if resp.status == 304:
+                metrics.inc("news_feed_not_modified")
+                metrics.observe("news_feed_seconds", time.perf_counter() - start)
+                return self.entries[url]
+            resp.raise_for_status()
+            body = await resp.read()
+            content_type = resp.headers.get("Content-Type", "")
+            validators = (resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        feed = await asyncio.to_thread(feedparser.parse, body, response_headers={"content-type": content_type})
+        # Stored together, so a 304 always has entries to return
+        self.entries[url] = feed.entries[: self.limit]
+        self.validators[url] = validators
+        metrics.observe("news_feed_seconds", time.perf_counter() - start)
+        return self.entries[url]
+
+    async def filter_new(self, items: list[NewsItem]) -> list[NewsItem]:
+        """Items whose hash is in neither the local LRU nor the ``news:seen`` set.
+
+        Only reads: hashes are marked seen by :meth:`store`, so a headline
+        that fails to store is offered again on the next update.
+        """
+        fresh = {}
+        for item in items:
+            if item.hash not in fresh and self.seen.get(item.hash) is None:
+                fresh[item.hash] = item
+        if fresh:
+            pipe = self.redis.pipeline(transaction=False)
+            for h in fresh:
+                pipe.zscore(SEEN_KEY, h)
+            scores = await pipe.execute()
+            for h, score in zip(list(fresh), scores):
+                if score is not None:
+                    self.seen.set(h, True)
+                    del fresh[h]
+        metrics.inc("news_duplicates", len(items) - len(fresh))
+        return list(fresh.values())
+
+    async def store(self, items: list[NewsItem]) -> None:
+        """Append ``items`` to the stream and mark them seen, in one transaction.
+
+        The stream is capped near ``stream_maxlen`` and ``news:seen`` is
+        trimmed to the ``seen_size`` most recent hashes. Sets each item's id.
+        """
+        pipe = self.redis.pipeline(transaction=True)
+        for item in items:
+            pipe.xadd(STREAM_KEY, {
+                "title": item.title, "source": item.source, "link": item.link,
+                "published": "" if item.published is None else str(item.published), "hash": item.hash,
+            }, maxlen=self.stream_maxlen, approximate=True)
+        now = time.time()
+        pipe.zadd(SEEN_KEY, {item.hash: now for item in items})
+        pipe.zremrangebyrank(SEEN_KEY, 0, -self.seen_size - 1)
+        for item, entry_id in zip(items, await pipe.execute()):
+            item.id = _text(entry_id)
+            self.seen.set(item.hash, True)
+
+    async def items_since(self, cursor: str = "0", count: int = 100) -> tuple[list[NewsItem], str]:
+        """Up to ``count`` items stored after ``cursor``, and the cursor to pass next time."""
+        start = "-" if cursor in ("", "0", "0-0") else f"({cursor}"
+        entries = await self.redis.xrange(STREAM_KEY, min=start, max="+", count=count)
+        items = [item_from_entry(entry_id, fields) for entry_id, fields in entries]
+        return items, items[-1].id if items else cursor
 
     async def alert_cached_news(self) -> None:
+        """Send the headlines stored since the last alert.
+
+        Long batches go out as several messages (see :func:`alert_chunks`).
+        The cursor only moves past a message once Telegram accepted it, so
+        an undelivered one is retried on the next call.
+        """
         if not self.tg_bot:
             return
         try:
-            headlines = await self.redis.get("latest_news")
-            if headlines:
-                if isinstance(headlines, bytes):
-                    headlines = headlines.decode()
-                await self.tg_bot.send_alert(str(headlines))
+            cursor = _text(await self.redis.get(ALERT_CURSOR_KEY)) or "0"
+            items, _ = await self.items_since(cursor)
+            for text, last_id in alert_chunks(items, self.alert_max_chars):
+                # Plain text: headlines are not valid Markdown
+                if not await self.tg_bot.send_alert(text, parse_mode=None):
+                    logger.warning("[NewsAggregator] alert not delivered - retrying after %s next time", cursor)
+                    return
+                cursor = last_id
+                await self.redis.set(ALERT_CURSOR_KEY, cursor)
         except Exception as e:  # pragma: no cover - redis errors
             logger.error("[NewsAggregator] alert error: %s", e)
@@ -50,5 +50,25 @@ class DBManager:
         async with self.pool.acquire() as conn:
             return await conn.execute(query, *args)
 
+    async def stream(self, query: str, *args, prefetch: int = 1000):
+        """Yield rows from a server-side cursor, ``prefetch`` rows at a time."""
+        await self.connect()
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                async for row in conn.cursor(query, *args, prefetch=prefetch):
+                    yield row
+
+    async def listen(self, channel: str, callback):
+        """Open a dedicated connection that LISTENs on ``channel``.
+
+        The connection lives outside the pool so a long-lived listener does
+        not hold one of the ``DB_POOL_MAX_SIZE`` slots. Callers own it and
+        must close it.
+        """
+        conn = await asyncpg.connect(dsn=DATABASE_URL)
+        await conn.add_listener(channel, callback)
+        logger.info(f"[DBManager] Listening on {channel}")
+        return conn
+
 # Global instance
 db = DBManager()
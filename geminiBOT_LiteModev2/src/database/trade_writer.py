@@ -0,0 +1,213 @@
+# src/database/trade_writer.py
+
+import asyncio
+import time
+import asyncpg
+from config.settings import TRADE_BATCH_SIZE, TRADE_FLUSH_INTERVAL
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+TRADE_COLUMNS = [
+    "wallet_address", "protocol", "action", "symbol",
+    "size_usd", "leverage", "direction", "collateral_token", "index_token",
+    "price", "pnl", "block_number", "log_index", "tx_hash",
+]
+
+_CREATE_STAGING = """
+    CREATE TEMP TABLE IF NOT EXISTS wallet_trades_staging (
+        wallet_address VARCHAR(64),
+        protocol VARCHAR(32),
+        action VARCHAR(32),
+        symbol VARCHAR(16),
+        size_usd DOUBLE PRECISION,
+        leverage DOUBLE PRECISION,
+        direction VARCHAR(8),
+        collateral_token VARCHAR(42),
+        index_token VARCHAR(42),
+        price DOUBLE PRECISION,
+        pnl DOUBLE PRECISION,
+        block_number BIGINT,
+        log_index INTEGER,
+        tx_hash VARCHAR(66)
+    ) ON COMMIT DELETE ROWS
+"""
+
+_MERGE_STAGING = f"""
+    INSERT INTO wallet_trades({", ".join(TRADE_COLUMNS)})
+    SELECT {", ".join(TRADE_COLUMNS)} FROM wallet_trades_staging
+    ON CONFLICT DO NOTHING
+"""
+
+_TOUCH_WALLETS = """
+    UPDATE tracked_wallets SET last_activity=NOW()
+    WHERE wallet_address = ANY($1::text[])
+"""
+
+# Errors the server raises for the rows themselves (bad value, too long,
+# constraint); anything else is treated as the database being unavailable
+_ROW_ERRORS = (
+    asyncpg.exceptions.DataError,
+    asyncpg.exceptions.IntegrityConstraintViolationError,
+)
+
+
+def _rows_inserted(statuses) -> int:
+    """Sum merge statuses ("INSERT 0 <n>"); rows skipped by ON CONFLICT are not counted."""
+    return sum(int(status.split()[-1]) for status in statuses if status)
+
+
+class TradeBatchWriter:
+    """Write-behind buffer for ``wallet_trades`` rows.
+
+    Trades are queued in memory and flushed when ``max_batch`` rows are
+    pending or every ``flush_interval`` seconds.  A flush COPYs the rows into
+    a per-connection temp staging table, merges them into ``wallet_trades``
+    and bumps ``tracked_wallets.last_activity`` for every touched wallet with
+    a single UPDATE, all in one transaction.
+    """
+
+    def __init__(self, db, max_batch: int = TRADE_BATCH_SIZE,
+                 flush_interval: float = TRADE_FLUSH_INTERVAL, max_pending: int | None = None):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending or max_batch * 20
+        self._trades: list[tuple] = []
+        self._wallets: set[str] = set()
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._trades)
+
+    def add_trade(self, wallet: str, protocol: str, action: str, data: dict):
+        self._trades.append((
+            wallet, protocol, action, data.get("symbol"),
+            data.get("size_usd"), data.get("leverage"), data.get("direction"),
+            data.get("collateral_token"), data.get("index_token"), data.get("price"),
+            data.get("pnl"), data.get("block_number"), data.get("log_index") or 0, data.get("tx_hash"),
+        ))
+        if len(self._trades) >= self.max_batch:
+            self._flush_event.set()
+
+    def discard(self, tx_hash: str, log_index: int | None = None) -> bool:
+        """Drop queued rows for ``tx_hash`` (one log if ``log_index`` is given); False if none were pending."""
+        kept = [t for t in self._trades if t[-1] != tx_hash or (log_index is not None and t[-2] != log_index)]
+        dropped = len(self._trades) - len(kept)
+        self._trades = kept
+        return dropped > 0
+
+    def touch_wallet(self, wallet: str):
+        """Queue a ``last_activity`` bump; repeated touches coalesce."""
+        self._wallets.add(wallet)
+
+    async def run(self):
+        logger.info("[TradeBatchWriter] Running...")
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._flush_event.clear()
+                await self.flush()
+        except asyncio.CancelledError:
+            await self.flush()
+            raise
+
+    async def flush(self) -> int:
+        """Write everything pending; returns the number of rows inserted.
+
+        If the batch is rejected because of its contents it is bisected and
+        only the rows that fail on their own are dropped. Any other error
+        puts the unwritten rows back at the head of the queue. A merge status
+        that cannot be parsed raises after the rows are committed.
+        """
+        async with self._flush_lock:
+            if not self._trades and not self._wallets:
+                return 0
+            trades, self._trades = self._trades, []
+            wallets, self._wallets = self._wallets, set()
+            start = time.perf_counter()
+            try:
+                try:
+                    statuses = [await self._write(trades, wallets)]
+                except _ROW_ERRORS as e:
+                    logger.warning(f"[TradeBatchWriter] batch of {len(trades)} rejected ({e}) - isolating bad rows")
+                    await self._write([], wallets)
+                    wallets = set()
+                    statuses = await self._write_isolating(trades)
+            except Exception as e:
+                logger.error(f"[TradeBatchWriter] flush error: {e}")
+                metrics.inc("trade_flush_errors")
+                self._requeue(trades, wallets)
+                return 0
+            inserted = _rows_inserted(statuses)
+            elapsed = time.perf_counter() - start
+            metrics.inc("trades_recorded", inserted)
+            metrics.observe("trade_flush_size", len(trades))
+            metrics.observe("trade_flush_latency", elapsed)
+            logger.debug(
+                f"[TradeBatchWriter] Flushed {len(trades)} trades ({inserted} new), {len(wallets)} wallets "
+                f"in {elapsed * 1000:.1f}ms"
+            )
+            return inserted
+
+    async def _write(self, trades: list, wallets):
+        """COPY + merge ``trades`` and touch ``wallets`` in one transaction.
+
+        Returns the merge command status, or None if there were no trades.
+        """
+        status = None
+        await self.db.connect()
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                if trades:
+                    await conn.execute(_CREATE_STAGING)
+                    await conn.copy_records_to_table(
+                        "wallet_trades_staging", records=trades, columns=TRADE_COLUMNS
+                    )
+                    status = await conn.execute(_MERGE_STAGING)
+                if wallets:
+                    await conn.execute(_TOUCH_WALLETS, list(wallets))
+        return status
+
+    async def _write_isolating(self, trades: list) -> list:
+        """Bisect a rejected batch, dropping single rows that still fail.
+
+        Returns the merge statuses of the chunks written. Rows not yet
+        written when a non-row error occurs are requeued.
+        """
+        statuses = []
+        stack = [trades]
+        while stack:
+            chunk = stack.pop()
+            try:
+                statuses.append(await self._write(chunk, ()))
+            except _ROW_ERRORS as e:
+                if len(chunk) == 1:
+                    logger.error(f"[TradeBatchWriter] dropping bad trade {chunk[0]!r}: {e}")
+                    metrics.inc("trades_rejected")
+                    continue
+                mid = len(chunk) // 2
+                stack += [chunk[mid:], chunk[:mid]]
+            except Exception as e:
+                logger.error(f"[TradeBatchWriter] flush error: {e}")
+                metrics.inc("trade_flush_errors")
+                self._requeue([row for part in [chunk, *reversed(stack)] for row in part], set())
+                break
+        return statuses
+
+    def _requeue(self, trades: list, wallets: set):
+        self._wallets |= wallets
+        room = self.max_pending - len(self._trades)
+        if room <= 0:
+            metrics.inc("trades_dropped", len(trades))
+            return
+        if len(trades) > room:
+            metrics.inc("trades_dropped", len(trades) - room)
+            trades = trades[-room:]
+        self._trades[:0] = trades
@@ -0,0 +1,232 @@
+# src/event_bus.py
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, Type, TypeVar
+
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+COALESCE = "coalesce"
+POLICIES = (DROP_OLDEST, BLOCK, COALESCE)
+
+
+@dataclass(slots=True)
+class WhaleTrades:
+    """A batch of whale trades as parallel columns."""
+    source: str
+    symbols: List[str]
+    sizes: List[float]
+    directions: List[str]
+
+    @classmethod
+    def one(cls, source: str, symbol: str, size_usd: float, direction: str) -> "WhaleTrades":
+        return cls(source, [symbol], [size_usd], [direction])
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def copy(self) -> "WhaleTrades":
+        return WhaleTrades(self.source, list(self.symbols), list(self.sizes), list(self.directions))
+
+    def merge(self, newer: "WhaleTrades") -> None:
+        """Append ``newer`` in place; only call this on a batch you own."""
+        if self.source != newer.source:
+            self.source = "mixed"
+        self.symbols.extend(newer.symbols)
+        self.sizes.extend(newer.sizes)
+        self.directions.extend(newer.directions)
+
+
+@dataclass(slots=True)
+class NewsItem:
+    title: str
+    source: str = ""
+    link: str = ""
+    published: Optional[float] = None
+    hash: str = ""
+    id: str = ""  # stream entry id once stored
+
+
+@dataclass(slots=True)
+class SentimentResult:
+    text: str
+    label: str
+    score: float
+    symbol: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Signal:
+    symbol: str
+    kind: str
+    value: Any = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Topic(Generic[T]):
+    """A named stream of one event type.
+
+    ``merge(older, newer)`` folds ``newer`` into ``older`` in place for
+    ``coalesce`` subscribers; a published event is shared by every queue,
+    so the subscription merges into its own ``copy(older)``. Without
+    ``merge``, the newer event replaces the older one.
+    """
+    name: str
+    event_type: Type[T]
+    merge: Optional[Callable[[T, T], None]] = None
+    copy: Optional[Callable[[T], T]] = None
+
+
+WHALE_TRADES = Topic("whale_trades", WhaleTrades, WhaleTrades.merge, WhaleTrades.copy)
+NEWS_ITEMS = Topic("news_items", NewsItem)
+SENTIMENT_RESULTS = Topic("sentiment_results", SentimentResult)
+SIGNALS = Topic("signals", Signal)
+
+
+class Subscription(Generic[T]):
+    """One subscriber's bounded queue on one topic.
+
+    When the queue is full, ``drop_oldest`` discards the head and
+    ``block`` makes the publisher wait. ``coalesce`` folds the new event
+    into the newest queued one with the topic's ``merge``; once that
+    holds ``merge_limit`` entries further events are dropped.
+    """
+
+    def __init__(self, topic: Topic[T], name: str, maxsize: int, policy: str, merge_limit: int = 10000):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy {policy!r}")
+        self.topic = topic
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.merge_limit = merge_limit
+        self.dropped = 0
+        self._items: deque = deque()
+        self._owned = None  # queued event already copied for merging
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._space.set()
+        self._metric = f"bus_depth_{topic.name}_{name}"
+
+    def __len__(self):
+        return len(self._items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> T:
+        return await self.get()
+
+    def _offer(self, event: T) -> None:
+        items = self._items
+        if len(items) >= self.maxsize:
+            if self.policy == COALESCE:
+                self._coalesce(event)
+                return
+            items.popleft()
+            self.dropped += 1
+            metrics.inc(f"bus_dropped_{self.topic.name}")
+        items.append(event)
+        self._ready.set()
+        metrics.set(self._metric, len(items))
+
+    def _coalesce(self, event: T) -> None:
+        items = self._items
+        merge = self.topic.merge
+        if merge is None:
+            items[-1] = event
+        else:
+            if len(items[-1]) + len(event) > self.merge_limit:
+                self.dropped += 1
+                metrics.inc(f"bus_dropped_{self.topic.name}")
+                return
+            if items[-1] is not self._owned:
+                # Copy once; later merges extend the copy in place
+                items[-1] = self._owned = self.topic.copy(items[-1])
+            merge(items[-1], event)
+        metrics.inc(f"bus_coalesced_{self.topic.name}")
+
+    async def put(self, event: T) -> None:
+        while self.policy == BLOCK and len(self._items) >= self.maxsize:
+            self._space.clear()
+            await self._space.wait()
+        self._offer(event)
+
+    def get_nowait(self) -> T:
+        event = self._items.popleft()
+        if event is self._owned:
+            self._owned = None
+        self._space.set()
+        metrics.set(self._metric, len(self._items))
+        return event
+
+    async def get(self) -> T:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.get_nowait()
+
+    def drain(self) -> List[T]:
+        """Everything queued right now, oldest first."""
+        events = list(self._items)
+        self._items.clear()
+        self._owned = None
+        self._space.set()
+        metrics.set(self._metric, 0)
+        return events
+
+
+class EventBus:
+    """In-process publish/subscribe between components.
+
+    Producers never call consumers. Each subscriber reads its own
+    bounded queue, so a slow consumer only loses, merges or holds back
+    its own events (see :class:`Subscription`). Only a ``block``
+    subscriber can make a publisher wait.
+    """
+
+    def __init__(self):
+        self._subs: Dict[str, Dict[str, Subscription]] = {}
+
+    def subscribe(self, topic: Topic[T], name: str, maxsize: int = 1000,
+                  policy: str = DROP_OLDEST, merge_limit: int = 10000) -> Subscription[T]:
+        """Queue for ``name`` on ``topic``; subscribing twice returns the same queue."""
+        subs = self._subs.setdefault(topic.name, {})
+        sub = subs.get(name)
+        if sub is None:
+            sub = subs[name] = Subscription(topic, name, maxsize, policy, merge_limit)
+            logger.info(f"[EventBus] {name} subscribed to {topic.name} ({policy}, max {sub.maxsize})")
+        return sub
+
+    def unsubscribe(self, topic: Topic, name: str) -> None:
+        self._subs.get(topic.name, {}).pop(name, None)
+
+    def subscribers(self, topic: Topic) -> Tuple[str, ...]:
+        return tuple(self._subs.get(topic.name, ()))
+
+    async def publish(self, topic: Topic[T], event: T) -> None:
+        if not isinstance(event, topic.event_type):
+            raise TypeError(f"{topic.name} carries {topic.event_type.__name__}, not {type(event).__name__}")
+        metrics.inc(f"bus_published_{topic.name}")
+        subs = self._subs.get(topic.name)
+        if not subs:
+            return
+        for sub in list(subs.values()):
+            if sub.policy == BLOCK:
+                await sub.put(event)
+            else:
+                sub._offer(event)
+        metrics.set(f"bus_depth_{topic.name}", sum(len(s) for s in subs.values()))
+
+
+# Shared by every component in the process
+event_bus = EventBus()
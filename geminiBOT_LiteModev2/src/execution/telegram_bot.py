@@ -5,10 +5,29 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, ContextTypes
 from execution.telegram_wallet_manager import WalletManager
 from config.settings import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from signal_generation.whale_flow import whale_flow, sentiment_label
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+
+def flow_text(symbol: str | None = None, flow=whale_flow) -> str:
+    """One line per window: long ratio by volume, trade counts and volume."""
+    title = symbol or "all markets"
+    if symbol:
+        markets = flow.matching(symbol)
+        if markets != [symbol]:
+            title += f" ({', '.join(markets) or 'no trades yet'})"
+    lines = [f"🐋 Whale flow {title}"]
+    for window in flow.windows:
+        st = flow.stats(window, symbol)
+        lines.append(
+            f"{window}: {st['long_ratio']:.0%} long ({sentiment_label(st['long_ratio'])}) "
+            f"{st['long_count']}L/{st['short_count']}S ${st['long_usd'] + st['short_usd']:,.0f}"
+        )
+    return "\n".join(lines)
+
+
 class TelegramBot:
     def __init__(self):
         if not TELEGRAM_BOT_TOKEN:
@@ -23,6 +42,7 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("status", self.status_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
+        self.application.add_handler(CommandHandler("flow", self.flow_command))
 
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         user = update.effective_user
@@ -32,7 +52,12 @@ class TelegramBot:
         await update.message.reply_text("✅ Status: Online | Mode: Paper")
 
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        await update.message.reply_text("/start /status /help")
+        await update.message.reply_text("/start /status /flow [symbol] /help")
+
+    async def flow_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        # Matched case-insensitively, by base asset unless an exact market is given
+        symbol = context.args[0] if context.args else None
+        await update.message.reply_text(flow_text(symbol))
 
     async def run(self):
         if not self.application:
@@ -44,10 +69,13 @@ class TelegramBot:
         while True:
             await asyncio.sleep(3600)
 
-    async def send_alert(self, message: str):
+    async def send_alert(self, message: str, parse_mode: str | None = 'Markdown') -> bool:
+        """Send ``message`` to the alert chat; False if it was not delivered."""
         if not self.application:
-            return
+            return False
         try:
-            await self.application.bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message, parse_mode='Markdown')
+            await self.application.bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message, parse_mode=parse_mode)
         except Exception as e:
             logger.error(f"[TelegramBot] send_alert error: {e}")
+            return False
+        return True
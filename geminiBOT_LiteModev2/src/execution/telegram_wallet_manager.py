@@ -9,8 +9,8 @@ from telegram.ext import (
     CallbackQueryHandler,
 )
 from database.db_manager import db
+from onchain.wallet_registry import wallet_registry
 from utils.logger import get_logger
-from ai_analysis.whale_behavior_analyzer import WhaleBehaviorAnalyzer
 
 logger = get_logger(__name__)
 
@@ -31,9 +31,18 @@ FIELD_MAP = {
 class WalletManager:
     def __init__(self, telegram_bot):
         self.bot = telegram_bot
-        self.analyzer = WhaleBehaviorAnalyzer()
+        self._analyzer = None
         self._setup_handlers()
 
+    @property
+    def analyzer(self):
+        # numpy/sklearn load on the first analysis command, not at bot start
+        if self._analyzer is None:
+            from ai_analysis.whale_behavior_analyzer import WhaleBehaviorAnalyzer
+
+            self._analyzer = WhaleBehaviorAnalyzer()
+        return self._analyzer
+
     def _setup_handlers(self):
         self.bot.application.add_handler(
             CommandHandler("wallets", self.list_wallets_command)
@@ -263,6 +272,7 @@ class WalletManager:
                 context.user_data["wallet_tags"],
                 str(update.effective_user.id),
             )
+            await wallet_registry.invalidate(context.user_data["wallet_address"])
             await self.analyzer.start_tracking(context.user_data["wallet_address"])
             await query.edit_message_text("Wallet added")
         except Exception as e:
@@ -374,6 +384,8 @@ class WalletManager:
             search_term,
         )
         if result:
+            # A re-read finding no row never evicts, so drop it explicitly
+            wallet_registry.remove(result["wallet_address"])
             await update.message.reply_text(f"Removed {result['label']}")
         else:
             await update.message.reply_text("Wallet not found")
@@ -438,6 +450,7 @@ class WalletManager:
         try:
             query = f"UPDATE tracked_wallets SET {column}=$1 WHERE wallet_address=$2"
             await db.execute(query, value, wallet)
+            await wallet_registry.invalidate(wallet)
             await update.message.reply_text("Updated")
         except Exception as e:
             logger.error(f"[WalletManager] edit error: {e}")
@@ -1,55 +1,49 @@
 # === 5️⃣ src/main.py ===
 # ➜ Location: src/main.py
 import asyncio
-from config.settings import setup_logging, ENABLE_METRICS_SERVER, METRICS_PORT
+import time
+from config.settings import setup_logging, DISABLED_COMPONENTS
 from utils.logger import get_logger
-from execution.telegram_bot import TelegramBot
-from ai_analysis.ensemble_manager import EnsembleManager
-from signal_generation.signal_aggregator import SignalAggregator
-from risk_management.portfolio_monitor import PortfolioMonitor
-from monitoring.system_monitor import SystemMonitor
-from monitoring.api_monitor import ApiMonitor
-from monitoring.metrics_server import MetricsServer
-from data_ingestion.news_aggregator import NewsAggregator
-from execution.paper_trader import PaperTrader
+from utils.metrics import metrics
 from async_task_supervisor import run_with_retry
-from onchain.enhanced_whale_watcher import EnhancedWhaleWatcher
-from onchain.hyperliquid_watcher import HyperliquidWatcher
+from components import COMPONENTS, build_component, enabled_components
 
 setup_logging()
 logger = get_logger(__name__)
 
 class TradingSystem:
-    def __init__(self):
-        self.components = []
+    """Builds the enabled components from the registry and runs them.
 
-    async def initialize_components(self):
-        self.trade_executor = PaperTrader()
-        telegram_bot = TelegramBot()
+    Each component starts as soon as it is built, so early ones are
+    already running while later ones are still importing.
+    """
 
-        self.components = [
-            telegram_bot,
-            EnsembleManager(),
-            SignalAggregator(),
-            NewsAggregator(telegram_bot),
-            PortfolioMonitor(),
-            SystemMonitor(),
-            ApiMonitor(),
-            self.trade_executor,
-            EnhancedWhaleWatcher(telegram_bot),
-            HyperliquidWatcher()
-        ]
-        if ENABLE_METRICS_SERVER:
-            self.components.append(MetricsServer(METRICS_PORT))
+    def __init__(self, registry=COMPONENTS, disabled=DISABLED_COMPONENTS):
+        self.specs = enabled_components(registry, disabled)
+        self.components = []
+        self.by_name = {}
+
+    async def initialize_components(self, tg: asyncio.TaskGroup | None = None):
+        start = time.perf_counter()
+        for spec in self.specs:
+            missing = [name for name in spec.needs if name not in self.by_name]
+            if missing:
+                logger.warning(f"[System] Skipping {spec.name}: needs disabled {', '.join(missing)}")
+                continue
+            component = await build_component(spec, self.by_name)
+            self.by_name[spec.name] = component
+            self.components.append(component)
+            if tg is not None and hasattr(component, 'run'):
+                tg.create_task(run_with_retry(component.run))
+        elapsed = time.perf_counter() - start
+        metrics.set("startup_seconds", elapsed)
+        logger.info(f"[System] {len(self.components)} components up in {elapsed:.2f}s")
 
     async def run(self):
         logger.info("[System] Starting Trading Bot in Lite Mode with Whale Tracker")
-        await self.initialize_components()
         try:
             async with asyncio.TaskGroup() as tg:
-                for component in self.components:
-                    if hasattr(component, 'run'):
-                        tg.create_task(run_with_retry(component.run))
+                await self.initialize_components(tg)
         except (KeyboardInterrupt, SystemExit):
             logger.info("[System] Shutdown initiated.")
         finally:
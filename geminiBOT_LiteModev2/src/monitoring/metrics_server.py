@@ -1,11 +1,39 @@
 import asyncio
-from prometheus_client import Counter, start_http_server
+from prometheus_client import Counter, start_http_server, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, SummaryMetricFamily
 from utils.logger import get_logger
+from utils.metrics import metrics
 
 logger = get_logger(__name__)
 
 REQUESTS_COUNTER = Counter('bot_requests_total', 'Total requests processed')
 
+
+class InternalMetricsCollector:
+    """Expose the in-process :data:`utils.metrics.metrics` registry to Prometheus."""
+
+    prefix = "litebot_"
+
+    def collect(self):
+        for name, value in list(metrics.counters.items()):
+            yield CounterMetricFamily(self.prefix + name, f"LiteBot counter {name}", value=value)
+        for name, value in list(metrics.gauges.items()):
+            yield GaugeMetricFamily(self.prefix + name, f"LiteBot gauge {name}", value=value)
+        for name, stats in list(metrics.timings.items()):
+            yield SummaryMetricFamily(
+                self.prefix + name,
+                f"LiteBot timing {name}",
+                count_value=stats["count"],
+                sum_value=stats["sum"],
+            )
+            yield GaugeMetricFamily(
+                self.prefix + name + "_max", f"LiteBot timing {name} max", value=stats["max"]
+            )
+
+
+REGISTRY.register(InternalMetricsCollector())
+
+
 class MetricsServer:
     def __init__(self, port: int = 8000):
         self.port = port
@@ -19,4 +47,3 @@ class MetricsServer:
         except asyncio.CancelledError:
             logger.info("[MetricsServer] shutdown")
             raise
-
@@ -3,6 +3,7 @@ from datetime import datetime
 from database.db_manager import db
 from utils.logger import get_logger
 from utils.cache import cache
+from signal_generation.whale_flow import whale_flow, sentiment_label
 
 logger = get_logger(__name__)
 
@@ -35,6 +36,11 @@ class WhaleAnalytics:
         return [dict(r) for r in rows]
 
     async def _calculate_whale_sentiment(self) -> Dict:
+        stats = whale_flow.stats("24h")
+        if stats["long_count"] or stats["short_count"]:
+            ratio = stats["long_ratio"]
+            return {'sentiment': sentiment_label(ratio), 'long_ratio': ratio}
+        # Nothing in memory yet (e.g. just restarted): fall back to the table
         result = await db.fetchrow(
             """
             SELECT SUM(CASE WHEN direction='long' THEN size_usd ELSE 0 END) as long_volume,
@@ -46,7 +52,6 @@ class WhaleAnalytics:
             return {'sentiment': 'neutral'}
         total = (result['long_volume'] or 0) + (result['short_volume'] or 0)
         long_ratio = result['long_volume']/total if total else 0.5
-        sentiment = 'bullish' if long_ratio>0.65 else 'bearish' if long_ratio<0.35 else 'neutral'
-        return {'sentiment': sentiment, 'long_ratio': long_ratio}
+        return {'sentiment': sentiment_label(long_ratio), 'long_ratio': long_ratio}
 
 whale_analytics = WhaleAnalytics()
@@ -0,0 +1,50 @@
+# src/onchain/addresses.py
+
+from collections import OrderedDict
+from web3 import Web3
+from config.settings import ADDRESS_CACHE_SIZE
+
+_checksums: OrderedDict[bytes, str] = OrderedDict()
+
+
+def address_key(address) -> bytes:
+    """20-byte index key for a ``0x`` hex address (any case) or raw bytes."""
+    if isinstance(address, (bytes, bytearray)):
+        return bytes(address[-20:])
+    return bytes.fromhex(address[2:] if address.startswith(("0x", "0X")) else address)
+
+
+def topic_address(topic) -> bytes:
+    """20-byte address from an indexed log topic (bytes or hex string)."""
+    if isinstance(topic, str):
+        return bytes.fromhex(topic[-40:])
+    return bytes(topic[-20:])
+
+
+def checksum(address) -> str:
+    """EIP-55 form of ``address``, memoised in a bounded LRU.
+
+    The keccak behind :func:`Web3.to_checksum_address` is paid once per
+    address instead of once per log.
+    """
+    key = address_key(address)
+    value = _checksums.get(key)
+    if value is not None:
+        _checksums.move_to_end(key)
+        return value
+    value = Web3.to_checksum_address(key)
+    _checksums[key] = value
+    if len(_checksums) > ADDRESS_CACHE_SIZE:
+        _checksums.popitem(last=False)
+    return value
+
+
+def lower(address) -> str:
+    """Lower-case ``0x`` form, no hashing needed."""
+    return "0x" + address_key(address).hex()
+
+
+def log_account(log) -> tuple[bytes, str]:
+    """``(key, checksum)`` of the account in the first indexed topic."""
+    key = topic_address(log["topics"][1])
+    return key, checksum(key)
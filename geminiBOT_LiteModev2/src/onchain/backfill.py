@@ -0,0 +1,148 @@
+# src/onchain/backfill.py
+
+import asyncio
+import time
+from collections import deque
+from config.settings import BACKFILL_CHUNK_SIZE, BACKFILL_CONCURRENCY
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Substrings providers use when an eth_getLogs range returns too much data
+_TOO_MANY_RESULTS = (
+    "too many",
+    "more than",
+    "response size",
+    "block range",
+    "limit exceeded",
+    "query timeout",
+)
+
+
+def is_too_many_results(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(hint in message for hint in _TOO_MANY_RESULTS)
+
+
+class BlockCheckpoint:
+    """Last fully processed block for a watcher, persisted in ``watcher_checkpoints``."""
+
+    def __init__(self, db, name: str):
+        self.db = db
+        self.name = name
+        self.block = None
+        self._saved = None
+
+    async def load(self) -> int | None:
+        try:
+            self.block = await self.db.fetchval(
+                "SELECT block_number FROM watcher_checkpoints WHERE name=$1", self.name
+            )
+        except Exception as e:
+            logger.error(f"[BlockCheckpoint] load error: {e}")
+            self.block = None
+        self._saved = self.block
+        return self.block
+
+    def update(self, block: int):
+        if self.block is None or block > self.block:
+            self.block = block
+
+    async def save(self):
+        if self.block is None or self.block == self._saved:
+            return
+        block = self.block
+        try:
+            await self.db.execute(
+                """
+                INSERT INTO watcher_checkpoints(name, block_number) VALUES($1,$2)
+                ON CONFLICT (name) DO UPDATE SET block_number=EXCLUDED.block_number, updated_at=NOW()
+                """,
+                self.name, block,
+            )
+            self._saved = block
+        except Exception as e:
+            logger.error(f"[BlockCheckpoint] save error: {e}")
+
+
+class LogBackfiller:
+    """Fetch a historical block range with ``eth_getLogs``.
+
+    The range is cut into chunks that are fetched concurrently (at most
+    ``concurrency`` requests in flight) but delivered to the handler strictly
+    in block order. A chunk the provider rejects as too large is split in half
+    and retried, and the chunk size for the rest of the range shrinks with it;
+    clean chunks let it grow back, but never past a size that was rejected
+    earlier in the same run.
+    """
+
+    def __init__(self, w3, chunk_size: int = BACKFILL_CHUNK_SIZE, concurrency: int = BACKFILL_CONCURRENCY,
+                 min_chunk: int = 1, max_chunk: int = 50_000):
+        self.w3 = w3
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._ceiling = max_chunk
+
+    async def run(self, log_filter: dict, start: int, end: int, handler, on_chunk=None) -> int:
+        """Deliver every log in ``[start, end]`` to ``handler`` in block order.
+
+        ``on_chunk(last_block)`` is awaited after each chunk has been fully
+        handled, which is where callers advance their checkpoint.
+        """
+        if end < start:
+            return 0
+        began = time.perf_counter()
+        self._ceiling = self.max_chunk
+        total = 0
+        block = start
+        pending = deque()
+        try:
+            while block <= end or pending:
+                while block <= end and len(pending) < self.concurrency:
+                    stop = min(block + self.chunk_size - 1, end)
+                    task = asyncio.create_task(self._fetch(log_filter, block, stop))
+                    pending.append((stop, task))
+                    block = stop + 1
+                stop, task = pending.popleft()
+                logs = await task
+                logs.sort(key=lambda log: (log["blockNumber"], log["logIndex"]))
+                for log in logs:
+                    await handler(log)
+                total += len(logs)
+                metrics.inc("backfill_logs", len(logs))
+                if on_chunk:
+                    await on_chunk(stop)
+        finally:
+            for _, task in pending:
+                task.cancel()
+        elapsed = time.perf_counter() - began
+        metrics.observe("backfill_duration", elapsed)
+        logger.info(
+            f"[LogBackfiller] Blocks {start}-{end}: {total} logs in {elapsed:.1f}s"
+        )
+        return total
+
+    async def _fetch(self, log_filter: dict, start: int, end: int) -> list:
+        try:
+            async with self._semaphore:
+                logs = await self.w3.eth.get_logs({**log_filter, "fromBlock": start, "toBlock": end})
+        except Exception as e:
+            if start == end or not is_too_many_results(e):
+                raise
+            metrics.inc("backfill_splits")
+            self._ceiling = max(self.min_chunk, min(self._ceiling, (end - start + 1) * 4 // 5))
+            self.chunk_size = max(self.min_chunk, min(self.chunk_size, end - start + 1) // 2)
+            mid = (start + end) // 2
+            left, right = await asyncio.gather(
+                self._fetch(log_filter, start, mid),
+                self._fetch(log_filter, mid + 1, end),
+            )
+            return left + right
+        metrics.inc("backfill_requests")
+        if end - start + 1 >= self.chunk_size:
+            self.chunk_size = min(self._ceiling, self.chunk_size + self.chunk_size // 4 + 1)
+        return list(logs)
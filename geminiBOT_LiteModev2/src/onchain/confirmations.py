@@ -0,0 +1,128 @@
+# src/onchain/confirmations.py
+
+import time
+from config.settings import (
+    ARBITRUM_CONFIRMATIONS, AVALANCHE_CONFIRMATIONS, ETHEREUM_CONFIRMATIONS, DEFAULT_CONFIRMATIONS,
+    CONFIRMATION_MAX_LOGS,
+)
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+CHAIN_CONFIRMATIONS = {
+    "arbitrum": ARBITRUM_CONFIRMATIONS,
+    "avalanche": AVALANCHE_CONFIRMATIONS,
+    "ethereum": ETHEREUM_CONFIRMATIONS,
+}
+
+
+def confirmations_for(chain: str) -> int:
+    return CHAIN_CONFIRMATIONS.get(chain.lower(), DEFAULT_CONFIRMATIONS)
+
+
+def log_key(log) -> tuple:
+    return (log.get("transactionHash"), log.get("logIndex"))
+
+
+class ConfirmationBuffer:
+    """Block-indexed ring buffer holding logs until they are ``confirmations`` deep.
+
+    Slot ``block % slots`` holds ``[block, {log_key: (log, received)}]``.
+    Only blocks above :attr:`promoted_through` are held and there are more
+    slots than confirmations, so live blocks never share a slot; a slot
+    still held by another block is released before reuse. If more than
+    ``max_logs`` are held the oldest block is promoted early.
+
+    :meth:`add` and :meth:`advance` return ``(log, received)`` pairs that are
+    ready, oldest block first. ``confirmation_promotion_latency`` records the
+    time each log spent in the buffer.
+    """
+
+    def __init__(self, confirmations: int, max_logs: int = CONFIRMATION_MAX_LOGS, slots: int | None = None):
+        self.confirmations = max(0, confirmations)
+        self.max_logs = max_logs
+        self._slots: list = [None] * max(slots or 64, self.confirmations + 1)
+        self.head = None
+        self.promoted_through = None
+        self.pending = 0
+
+    def __len__(self):
+        return self.pending
+
+    def add(self, log, received: float | None = None) -> list:
+        received = time.time() if received is None else received
+        block = log["blockNumber"]
+        ready = self.advance(block)
+        if self.promoted_through is not None and block <= self.promoted_through:
+            # Already deep enough, e.g. a late arrival or zero confirmations
+            metrics.observe("confirmation_promotion_latency", time.time() - received)
+            ready.append((log, received))
+            return ready
+        idx = block % len(self._slots)
+        entry = self._slots[idx]
+        if entry is not None and entry[0] != block and entry[1]:
+            # Slot still held by another block; release it rather than overwrite it
+            metrics.inc("confirmation_slot_collisions")
+            ready.extend(self._pop_block(entry[0]))
+            entry = None
+        if entry is None or entry[0] != block:
+            entry = self._slots[idx] = [block, {}]
+        if log_key(log) not in entry[1]:
+            self.pending += 1
+        entry[1][log_key(log)] = (log, received)
+        if self.pending > self.max_logs:
+            metrics.inc("confirmation_overflow")
+            ready.extend(self._promote_oldest())
+        metrics.set("confirmation_buffer_logs", self.pending)
+        return ready
+
+    def remove(self, log) -> bool:
+        """Drop a held log (``removed: true``); False if it is not held."""
+        block = log.get("blockNumber")
+        if block is None:
+            return False
+        entry = self._slots[block % len(self._slots)]
+        if entry is None or entry[0] != block or entry[1].pop(log_key(log), None) is None:
+            return False
+        self.pending -= 1
+        metrics.set("confirmation_buffer_logs", self.pending)
+        return True
+
+    def advance(self, head: int) -> list:
+        """Move the head and release every block that is now deep enough."""
+        if self.head is None or head > self.head:
+            self.head = head
+        target = self.head - self.confirmations
+        if self.promoted_through is not None and target <= self.promoted_through:
+            return []
+        # Every held block up to the target, however far the head jumped
+        due = sorted(entry[0] for entry in self._slots if entry is not None and entry[0] <= target)
+        ready = []
+        for block in due:
+            ready.extend(self._pop_block(block))
+        self.promoted_through = target
+        return ready
+
+    def _pop_block(self, block: int) -> list:
+        idx = block % len(self._slots)
+        entry = self._slots[idx]
+        if entry is None or entry[0] != block:
+            return []
+        self._slots[idx] = None
+        logs = sorted(entry[1].values(), key=lambda item: item[0].get("logIndex") or 0)
+        self.pending -= len(logs)
+        now = time.time()
+        for _, received in logs:
+            metrics.observe("confirmation_promotion_latency", now - received)
+        metrics.set("confirmation_buffer_logs", self.pending)
+        return logs
+
+    def _promote_oldest(self) -> list:
+        held = [entry[0] for entry in self._slots if entry is not None and entry[1]]
+        if not held:
+            return []
+        oldest = min(held)
+        logger.warning(f"[ConfirmationBuffer] over {self.max_logs} logs held - promoting block {oldest} early")
+        self.promoted_through = max(oldest, self.promoted_through or oldest)
+        return self._pop_block(oldest)
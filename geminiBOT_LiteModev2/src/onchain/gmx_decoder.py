@@ -2,6 +2,7 @@
 # ➜ Location: src/onchain/gmx_decoder.py
 from web3 import Web3
 from utils.logger import get_logger
+from utils.metrics import metrics
 
 logger = get_logger(__name__)
 
@@ -46,6 +47,97 @@ GMX_VAULT_ABI = [
     },
 ]
 
+
+class EventLayout:
+    """Fixed ABI offsets for one event, precomputed from ``GMX_VAULT_ABI``.
+
+    Every non-indexed field of the vault events is a static 32-byte word, so
+    each one lives at ``32 * position`` in the data payload and can be read
+    straight from a ``memoryview`` without the web3 ABI codec.
+    """
+
+    __slots__ = ("name", "signature", "topic", "indexed", "fields", "data_size")
+
+    def __init__(self, abi_entry: dict):
+        self.name = abi_entry["name"]
+        types = ",".join(i["type"] for i in abi_entry["inputs"])
+        self.signature = f"{self.name}({types})"
+        self.topic = bytes(Web3.keccak(text=self.signature))
+        self.indexed = [i["name"] for i in abi_entry["inputs"] if i["indexed"]]
+        data_inputs = [i for i in abi_entry["inputs"] if not i["indexed"]]
+        self.fields = [(i["name"], 32 * pos, i["type"]) for pos, i in enumerate(data_inputs)]
+        self.data_size = 32 * len(data_inputs)
+
+
+# Vault USD amounts and prices are fixed point with 30 decimals; callers
+# scale with true division (``/``) so sub-dollar amounts are kept as floats
+PRICE_PRECISION = 10 ** 30
+
+EVENT_LAYOUTS = {layout.topic: layout for layout in map(EventLayout, GMX_VAULT_ABI)}
+INCREASE_POSITION = next(v for v in EVENT_LAYOUTS.values() if v.name == "IncreasePosition")
+DECREASE_POSITION = next(v for v in EVENT_LAYOUTS.values() if v.name == "DecreasePosition")
+ALL_FIELDS = list(dict.fromkeys(
+    name for layout in EVENT_LAYOUTS.values()
+    for name in layout.indexed + [f[0] for f in layout.fields]
+))
+
+
+def _as_bytes(value) -> bytes:
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    return value
+
+
+def decode_log(log) -> dict | None:
+    """Decode a raw vault log into a dict of ABI field name -> value.
+
+    Integers are returned unscaled (prices and sizes carry GMX's 1e30
+    precision); indexed addresses are lower-case ``0x`` strings. Returns
+    ``None`` for unknown topics or truncated payloads.
+    """
+    topics = log["topics"]
+    layout = EVENT_LAYOUTS.get(_as_bytes(topics[0]))
+    if layout is None:
+        return None
+    mv = memoryview(_as_bytes(log["data"]))
+    if len(mv) < layout.data_size or len(topics) <= len(layout.indexed):
+        metrics.inc("decode_errors")
+        return None
+    out = {"event": layout.name}
+    for pos, name in enumerate(layout.indexed, start=1):
+        out[name] = "0x" + _as_bytes(topics[pos])[12:32].hex()
+    for name, offset, kind in layout.fields:
+        word = mv[offset:offset + 32]
+        if kind == "bool":
+            out[name] = word[31] != 0
+        elif kind == "int256":
+            out[name] = int.from_bytes(word, "big", signed=True)
+        else:
+            out[name] = int.from_bytes(word, "big")
+    return out
+
+
+def decode_batch(logs) -> dict[str, list]:
+    """Decode many logs into columns keyed by field name.
+
+    Rows line up across columns; fields an event does not carry are
+    ``None``. Undecodable logs are skipped.
+    """
+    columns = {name: [] for name in ["event", "tx_hash", "block_number", "log_index"] + ALL_FIELDS}
+    for log in logs:
+        row = decode_log(log)
+        if row is None:
+            continue
+        tx_hash = log.get("transactionHash")
+        columns["tx_hash"].append(tx_hash.hex() if isinstance(tx_hash, bytes) else tx_hash)
+        columns["block_number"].append(log.get("blockNumber"))
+        columns["log_index"].append(log.get("logIndex"))
+        for name in ALL_FIELDS:
+            columns[name].append(row.get(name))
+        columns["event"].append(row["event"])
+    return columns
+
+
 class GMXDecoder:
     def __init__(self):
         self.w3 = Web3()
@@ -53,7 +145,7 @@ class GMXDecoder:
 
     def decode_position_open(self, log):
         try:
-            decoded = self.vault.events.IncreasePosition().processLog(log)
+            decoded = self.vault.events.IncreasePosition().process_log(log)
             return decoded
         except Exception as e:
             logger.error(f"[GMXDecoder] decode failed: {e}")
@@ -61,9 +153,15 @@ class GMXDecoder:
 
     def decode_position_close(self, log):
         try:
-            decoded = self.vault.events.DecreasePosition().processLog(log)
+            decoded = self.vault.events.DecreasePosition().process_log(log)
             return decoded
         except Exception as e:
             logger.error(f"[GMXDecoder] decode close failed: {e}")
             return None
 
+    def decode(self, log):
+        """Fast path: decode a raw log without the web3 ABI machinery."""
+        return decode_log(log)
+
+    def decode_batch(self, logs):
+        return decode_batch(logs)
@@ -1,20 +1,32 @@
 # === 4️⃣ src/onchain/hyperliquid_decoder.py ===
 # ➜ Location: src/onchain/hyperliquid_decoder.py
 from hyperliquid import HyperliquidAsync
+from config.settings import HYPERLIQUID_USER
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 class HyperliquidDecoder:
-    def __init__(self):
+    def __init__(self, user: str = HYPERLIQUID_USER):
         self.api = HyperliquidAsync()
+        self.params = {"user": user} if user else {}
 
     async def fetch_recent_trades(self, symbol: str = "BTCUSD", limit: int = 50):
         try:
-            data = await self.api.fetch_trades(symbol, limit=limit)
+            data = await self.api.fetch_trades(symbol, limit=limit, params=dict(self.params))
             logger.info(f"[HyperliquidDecoder] Recent trades: {len(data)}")
             return data
         except Exception as e:
             logger.error(f"[HyperliquidDecoder] fetch error: {e}")
             return []
 
+    async def fetch_trades_since(self, symbol: str, since: int | None = None, limit: int = 500):
+        """Trades at or after ``since`` (ms), oldest first; raises on API errors."""
+        data = await self.api.fetch_trades(symbol, since=since, limit=limit, params=dict(self.params))
+        logger.debug(f"[HyperliquidDecoder] {symbol} since {since}: {len(data)} trades")
+        return data
+
+    async def perp_symbols(self) -> list[str]:
+        """Every active perpetual market, e.g. ``BTC/USDC:USDC``."""
+        markets = await self.api.load_markets()
+        return [s for s, m in markets.items() if m.get("swap") and m.get("active", True)]
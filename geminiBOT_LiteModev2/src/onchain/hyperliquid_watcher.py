@@ -1,41 +1,203 @@
 import asyncio
+import re
+import time
 from typing import List, Dict, Any
 
+from config.settings import (
+    HYPERLIQUID_SYMBOLS, HYPERLIQUID_PAGE_SIZE, HYPERLIQUID_MAX_PAGES, HYPERLIQUID_REQUESTS_PER_MIN,
+    HYPERLIQUID_MIN_INTERVAL, HYPERLIQUID_MAX_INTERVAL, HYPERLIQUID_TARGET_TRADES,
+)
 from utils.logger import get_logger
-from signal_generation.signal_aggregator import SignalAggregator
+from utils.metrics import metrics
+from event_bus import EventBus, event_bus, WHALE_TRADES, WhaleTrades
 from onchain.hyperliquid_decoder import HyperliquidDecoder
+from onchain.log_dedup import RecentLogs
 
 logger = get_logger(__name__)
 
+# Weight of the newest observation in each symbol's trade-rate average
+_RATE_ALPHA = 0.3
+
+
+def trade_id(trade: Dict[str, Any]):
+    info = trade.get("info") or {}
+    return trade.get("id") or info.get("tid") or (info.get("hash"), trade.get("timestamp"))
+
+
+def symbol_metric(symbol: str) -> str:
+    """Metric-safe name for a market, e.g. ``btc_usdc_usdc``."""
+    return re.sub(r"\W", "_", symbol).lower()
+
+
+class RequestBudget:
+    """Token bucket shared by every symbol's poll: ``rate`` requests/s, ``burst`` at once."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._last = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            metrics.inc("hyperliquid_budget_waits")
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
 
 class HyperliquidWatcher:
-    """Periodically poll Hyperliquid for recent trades and forward them."""
+    """Poll Hyperliquid for new trades across many markets and publish them.
+
+    Each symbol keeps a high-water mark (the newest trade timestamp seen).
+    A poll asks only for trades from that mark on and keeps paging while
+    pages come back full. Trades sharing the boundary timestamp come back
+    again and are dropped by a bounded seen-set, so each trade is
+    published once.
+
+    Every symbol has its own next-poll time. Due symbols are polled
+    concurrently, all drawing on one :class:`RequestBudget`, and the
+    interval is re-fitted after each poll so that a poll returns about
+    ``target_trades`` trades at the symbol's recent trade rate.
+    """
 
     def __init__(
         self,
         decoder: HyperliquidDecoder | None = None,
-        signal_aggregator: SignalAggregator | None = None,
+        bus: EventBus | None = None,
         poll_interval: float = 30.0,
+        symbols: List[str] | None = None,
+        page_size: int = HYPERLIQUID_PAGE_SIZE,
+        max_pages: int = HYPERLIQUID_MAX_PAGES,
+        requests_per_min: float = HYPERLIQUID_REQUESTS_PER_MIN,
+        min_interval: float = HYPERLIQUID_MIN_INTERVAL,
+        max_interval: float = HYPERLIQUID_MAX_INTERVAL,
+        target_trades: float = HYPERLIQUID_TARGET_TRADES,
     ) -> None:
         self.decoder = decoder or HyperliquidDecoder()
-        self.signal_aggregator = signal_aggregator or SignalAggregator()
+        self.bus = bus if bus is not None else event_bus
+        # First interval for every symbol, before any trade rate is known
         self.poll_interval = poll_interval
+        self.symbols = symbols or HYPERLIQUID_SYMBOLS
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_trades = target_trades
+        rate = requests_per_min / 60
+        self.budget = RequestBudget(rate, burst=max(1.0, rate * 5))
+        self.cursors: Dict[str, int] = {}
+        self.rates: Dict[str, float] = {}
+        self.intervals: Dict[str, float] = {}
+        self.next_poll: Dict[str, float] = {}
+        self._last_poll: Dict[str, float] = {}
+        # keyed by (symbol, trade id); expiry runs on trade time in seconds
+        self._seen = RecentLogs(maxlen=page_size * 20, ttl=3600)
 
     async def run(self) -> None:
-        logger.info("[HyperliquidWatcher] Starting watcher...")
+        if self.symbols == ["*"]:
+            self.symbols = await self.decoder.perp_symbols()
+        logger.info(f"[HyperliquidWatcher] Starting watcher for {len(self.symbols)} symbols...")
         while True:
-            trades = await self.decoder.fetch_recent_trades()
-            await self._process_trades(trades)
-            await asyncio.sleep(self.poll_interval)
+            await self.run_cycle()
+            await asyncio.sleep(self._until_next_poll())
+
+    async def run_cycle(self) -> int:
+        """Poll every due symbol concurrently; publish the trades as one batch."""
+        now = time.monotonic()
+        due = [s for s in self.symbols if self.next_poll.get(s, now) <= now]
+        results = await asyncio.gather(*(self._poll_timed(s) for s in due))
+        batch = [trade for trades in results for trade in trades]
+        await self._process_trades(batch)
+        return len(batch)
+
+    def _until_next_poll(self) -> float:
+        if not self.next_poll:
+            return self.poll_interval
+        return max(0.0, min(self.next_poll.values()) - time.monotonic())
+
+    async def _poll_timed(self, symbol: str) -> List[Dict[str, Any]]:
+        name = symbol_metric(symbol)
+        start = time.monotonic()
+        trades = await self.poll_symbol(symbol)
+        finished = time.monotonic()
+        metrics.observe(f"hyperliquid_latency_{name}", finished - start)
+        self._adapt(symbol, len(trades), finished)
+        metrics.set(f"hyperliquid_interval_{name}", self.intervals[symbol])
+        return trades
+
+    def _adapt(self, symbol: str, count: int, now: float) -> None:
+        """Refit ``symbol``'s interval to its smoothed trades-per-second rate."""
+        last = self._last_poll.get(symbol)
+        self._last_poll[symbol] = now
+        if last is None or now <= last:
+            # First poll returns backlog, not a rate
+            interval = self.poll_interval
+        else:
+            observed = count / (now - last)
+            previous = self.rates.get(symbol, observed)
+            rate = self.rates[symbol] = _RATE_ALPHA * observed + (1 - _RATE_ALPHA) * previous
+            interval = self.target_trades / rate if rate > 0 else self.max_interval
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        self.intervals[symbol] = interval
+        self.next_poll[symbol] = now + interval
+
+    async def poll_symbol(self, symbol: str) -> List[Dict[str, Any]]:
+        """Fetch trades newer than ``symbol``'s high-water mark."""
+        new: List[Dict[str, Any]] = []
+        for _ in range(self.max_pages):
+            since = self.cursors.get(symbol)
+            await self.budget.acquire()
+            try:
+                page = await self.decoder.fetch_trades_since(symbol, since, self.page_size)
+            except Exception as e:
+                logger.error(f"[HyperliquidWatcher] {symbol} fetch error: {e}")
+                metrics.inc("hyperliquid_fetch_errors")
+                break
+            metrics.inc("hyperliquid_requests")
+            metrics.inc(f"hyperliquid_requests_{symbol_metric(symbol)}")
+            fresh = [t for t in page if self._is_new(symbol, t)]
+            new.extend(fresh)
+            newest = max((t.get("timestamp") or 0 for t in page), default=None)
+            if newest is not None and (since is None or newest > since):
+                self.cursors[symbol] = newest
+            elif since is not None and len(page) >= self.page_size:
+                # A full page within one millisecond cannot move the cursor
+                logger.warning(f"[HyperliquidWatcher] {symbol}: over {self.page_size} trades at {since}ms")
+                metrics.inc("hyperliquid_cursor_skips")
+                self.cursors[symbol] = since + 1
+                continue
+            # Caught up: short page, nothing new, or a first poll with no cursor
+            if len(page) < self.page_size or not fresh or since is None:
+                break
+        metrics.inc("hyperliquid_trades", len(new))
+        return new
+
+    def _is_new(self, symbol: str, trade: Dict[str, Any]) -> bool:
+        key = (symbol, trade_id(trade))
+        if key in self._seen:
+            metrics.inc("hyperliquid_duplicates")
+            return False
+        self._seen.add(key, (trade.get("timestamp") or 0) / 1000)
+        return True
 
     async def _process_trades(self, trades: List[Dict[str, Any]]) -> None:
+        symbols: List[str] = []
+        sizes: List[float] = []
+        directions: List[str] = []
         for trade in trades:
             data = self._convert_trade(trade)
             if not data:
                 continue
-            await self.signal_aggregator.process_whale_signal(
-                data["symbol"], data["size_usd"], data["direction"]
-            )
+            symbols.append(data["symbol"])
+            sizes.append(data["size_usd"])
+            directions.append(data["direction"])
+        if symbols:
+            await self.bus.publish(WHALE_TRADES, WhaleTrades("hyperliquid", symbols, sizes, directions))
 
     def _convert_trade(self, trade: Dict[str, Any]) -> Dict[str, Any] | None:
         try:
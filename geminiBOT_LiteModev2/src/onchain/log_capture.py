@@ -0,0 +1,113 @@
+# src/onchain/log_capture.py
+
+import json
+import struct
+from hexbytes import HexBytes
+
+# Binary capture: MAGIC, then per log a fixed header followed by the
+# variable-size topics and data.
+MAGIC = b"WLOG\x01"
+_HEADER = struct.Struct("<QIBB32s32s20sI")  # block, logIndex, removed, n_topics, tx, block hash, address, data len
+
+_BYTES_FIELDS = ("transactionHash", "blockHash", "data")
+
+
+def _is_binary(path: str) -> bool:
+    return not str(path).endswith((".jsonl", ".json"))
+
+
+def _to_json(log) -> dict:
+    out = {}
+    for name, value in log.items():
+        if isinstance(value, (bytes, bytearray)):
+            value = "0x" + bytes(value).hex()
+        elif name == "topics":
+            value = ["0x" + bytes(t).hex() if isinstance(t, (bytes, bytearray)) else t for t in value]
+        out[name] = value
+    return out
+
+
+def _from_json(row: dict) -> dict:
+    for name in _BYTES_FIELDS:
+        if isinstance(row.get(name), str):
+            row[name] = HexBytes(row[name])
+    row["topics"] = [HexBytes(t) for t in row.get("topics", [])]
+    return row
+
+
+def _pack(log) -> bytes:
+    topics = [bytes(HexBytes(t)) for t in log["topics"]]
+    data = bytes(HexBytes(log.get("data") or b""))
+    header = _HEADER.pack(
+        log["blockNumber"], log["logIndex"], bool(log.get("removed")), len(topics),
+        bytes(HexBytes(log["transactionHash"])), bytes(HexBytes(log.get("blockHash") or b"\x00" * 32)),
+        bytes(HexBytes(log["address"])), len(data),
+    )
+    return header + b"".join(topics) + data
+
+
+def _unpack(buf: bytes):
+    offset = len(MAGIC)
+    while offset < len(buf):
+        block, index, removed, n_topics, tx, block_hash, address, size = _HEADER.unpack_from(buf, offset)
+        offset += _HEADER.size
+        topics = [HexBytes(buf[offset + 32 * i:offset + 32 * (i + 1)]) for i in range(n_topics)]
+        offset += 32 * n_topics
+        data = HexBytes(buf[offset:offset + size])
+        offset += size
+        yield {
+            "address": "0x" + address.hex(),
+            "topics": topics,
+            "data": data,
+            "blockNumber": block,
+            "blockHash": HexBytes(block_hash),
+            "transactionHash": HexBytes(tx),
+            "logIndex": index,
+            "removed": bool(removed),
+        }
+
+
+def write_logs(path: str, logs) -> int:
+    """Write raw logs as JSONL (``.jsonl``/``.json``) or the binary format."""
+    count = 0
+    if _is_binary(path):
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            for log in logs:
+                f.write(_pack(log))
+                count += 1
+    else:
+        with open(path, "w") as f:
+            for log in logs:
+                f.write(json.dumps(_to_json(log)) + "\n")
+                count += 1
+    return count
+
+
+def read_logs(path: str):
+    """Yield logs in the shape web3 delivers them (``HexBytes`` topics/hashes)."""
+    if _is_binary(path):
+        with open(path, "rb") as f:
+            buf = f.read()
+        if not buf.startswith(MAGIC):
+            raise ValueError(f"{path} is not a log capture")
+        yield from _unpack(buf)
+        return
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield _from_json(json.loads(line))
+
+
+class LogCapture:
+    """Append every raw log the watcher receives to a JSONL file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", buffering=1 << 16)
+
+    def write(self, log):
+        self._file.write(json.dumps(_to_json(dict(log))) + "\n")
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,45 @@
+# src/onchain/log_dedup.py
+
+from collections import OrderedDict
+from config.settings import WHALE_DEDUP_MAX_LOGS, WHALE_DEDUP_TTL
+
+
+class RecentLogs:
+    """Bounded, time-expiring set of ``(tx_hash, log_index)`` keys.
+
+    Each key remembers when and from which provider it first arrived, so a
+    later copy can be timed against the winner. Keys are kept in arrival
+    order; expired or excess keys are evicted from the front on every add.
+    """
+
+    def __init__(self, maxlen: int = WHALE_DEDUP_MAX_LOGS, ttl: float = WHALE_DEDUP_TTL):
+        self.maxlen = maxlen
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def get(self, key, now: float) -> tuple | None:
+        """``(first_received, source)`` for a live key, else None."""
+        entry = self._entries.get(key)
+        if entry is None or now - entry[0] > self.ttl:
+            return None
+        return entry
+
+    def add(self, key, received: float, source: str | None = None):
+        self._entries[key] = (received, source)
+        self._entries.move_to_end(key)
+        cutoff = received - self.ttl
+        entries = self._entries
+        while entries:
+            oldest = next(iter(entries.values()))
+            if len(entries) <= self.maxlen and oldest[0] >= cutoff:
+                break
+            entries.popitem(last=False)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
@@ -0,0 +1,174 @@
+# src/onchain/position_ledger.py
+
+import time
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# Closes smaller than this many USD of remaining size are treated as full closes
+DUST_USD = 1e-6
+
+_REPLAY_QUERY = """
+    SELECT wallet_address, action, collateral_token, index_token, direction,
+           size_usd, price, pnl
+    FROM wallet_trades
+    WHERE protocol=$1 AND index_token IS NOT NULL
+      AND ($2::bigint IS NULL OR block_number IS NULL OR block_number <= $2)
+    ORDER BY block_number NULLS FIRST, log_index, id
+"""
+
+
+def position_key(account: str, data) -> tuple:
+    """``(account, collateralToken, indexToken, isLong)`` with lowercase addresses."""
+    return (
+        account.lower(),
+        data["collateral_token"].lower(),
+        data["index_token"].lower(),
+        data["direction"] == "long",
+    )
+
+
+class Position:
+    """Open position state: size and average entry in USD, realised PnL so far."""
+
+    __slots__ = ("size_usd", "average_price", "realised_pnl", "opened_at")
+
+    def __init__(self, size_usd=0.0, average_price=0.0, realised_pnl=0.0, opened_at=None):
+        self.size_usd = size_usd
+        self.average_price = average_price
+        self.realised_pnl = realised_pnl
+        self.opened_at = time.time() if opened_at is None else opened_at
+
+
+class PositionLedger:
+    """In-memory GMX positions keyed by ``(account, collateral, index, isLong)``.
+
+    Opens and closes are applied from the decoded vault events, so matching a
+    DecreasePosition to its position is a dict lookup rather than a query.
+    The ledger itself is not a table: every change is already appended to
+    ``wallet_trades`` through the batch writer (with the position key and
+    price columns), and :meth:`rebuild` replays those rows with a single
+    streaming query on startup.
+    """
+
+    def __init__(self):
+        self.positions: dict[tuple, Position] = {}
+        self._open_interest: dict[str, float] = {}
+        self._realised: dict[str, float] = {}
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.positions)
+
+    def get(self, account: str, data) -> Position | None:
+        return self.positions.get(position_key(account, data))
+
+    def increase(self, account: str, data) -> Position:
+        """Apply an open/increase; ``data["price"]`` is the new average price.
+
+        When the event carries no average price the entry is size-weighted
+        with ``data["mark_price"]``.
+        """
+        key = position_key(account, data)
+        size = data["size_usd"] or 0.0
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position()
+        new_size = position.size_usd + size
+        price = data.get("price")
+        if price:
+            position.average_price = price
+        elif new_size > 0:
+            mark = data.get("mark_price") or position.average_price
+            position.average_price = (position.average_price * position.size_usd + mark * size) / new_size
+        position.size_usd = new_size
+        self._add_open_interest(key[0], size)
+        metrics.set("open_positions", len(self.positions))
+        return position
+
+    def decrease(self, account: str, data) -> Position | None:
+        """Apply a close/decrease and return the matched position, if any.
+
+        Fully closed positions are dropped from the ledger; their realised
+        PnL stays in the per-wallet total.
+        """
+        key = position_key(account, data)
+        pnl = data.get("pnl") or 0.0
+        self._realised[key[0]] = self._realised.get(key[0], 0.0) + pnl
+        position = self.positions.get(key)
+        if position is None:
+            metrics.inc("ledger_unmatched_closes")
+            return None
+        size = min(data["size_usd"] or 0.0, position.size_usd)
+        position.size_usd -= size
+        position.realised_pnl += pnl
+        self._add_open_interest(key[0], -size)
+        if position.size_usd <= DUST_USD:
+            del self.positions[key]
+            self._add_open_interest(key[0], -position.size_usd)
+            position.size_usd = 0.0
+        metrics.set("open_positions", len(self.positions))
+        return position
+
+    def revert(self, account: str, data, action: str):
+        """Undo an applied open or close, e.g. after a chain reorg removed it."""
+        if action == "open":
+            self.decrease(account, {**data, "pnl": 0.0})
+            return
+        position = self.increase(account, {**data, "price": None, "mark_price": None})
+        pnl = data.get("pnl") or 0.0
+        position.realised_pnl -= pnl
+        key = account.lower()
+        self._realised[key] = self._realised.get(key, 0.0) - pnl
+
+    def _add_open_interest(self, account: str, delta: float):
+        total = self._open_interest.get(account, 0.0) + delta
+        if total <= DUST_USD:
+            self._open_interest.pop(account, None)
+        else:
+            self._open_interest[account] = total
+
+    def open_interest(self, account: str) -> float:
+        return self._open_interest.get(account.lower(), 0.0)
+
+    def realised_pnl(self, account: str) -> float:
+        return self._realised.get(account.lower(), 0.0)
+
+    def open_interest_by_wallet(self, limit: int | None = None) -> list[tuple[str, float]]:
+        """Wallets ordered by open size, largest first."""
+        ranked = sorted(self._open_interest.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    def positions_for(self, account: str) -> list[tuple[tuple, Position]]:
+        account = account.lower()
+        return [(key, pos) for key, pos in self.positions.items() if key[0] == account]
+
+    def clear(self):
+        self.positions.clear()
+        self._open_interest.clear()
+        self._realised.clear()
+
+    async def rebuild(self, db, protocol: str = "GMX", up_to_block: int | None = None) -> int:
+        """Replay ``wallet_trades`` in order through a server-side cursor.
+
+        Rows above ``up_to_block`` are left for the startup backfill to
+        re-apply, so nothing is counted twice.
+        """
+        start = time.perf_counter()
+        self.clear()
+        rows = 0
+        async for row in db.stream(_REPLAY_QUERY, protocol, up_to_block):
+            if row["action"] == "open":
+                self.increase(row["wallet_address"], row)
+            else:
+                self.decrease(row["wallet_address"], row)
+            rows += 1
+        self.loaded = True
+        elapsed = time.perf_counter() - start
+        metrics.set("open_positions", len(self.positions))
+        metrics.observe("position_ledger_rebuild", elapsed)
+        logger.info(
+            f"[PositionLedger] Replayed {rows} trades into {len(self.positions)} open positions in {elapsed:.2f}s"
+        )
+        return rows
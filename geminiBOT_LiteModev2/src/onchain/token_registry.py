@@ -0,0 +1,122 @@
+# src/onchain/token_registry.py
+
+import asyncio
+import json
+import os
+from eth_abi import decode
+from config.settings import TOKEN_REGISTRY_FILE, TOKEN_RESOLVE_INTERVAL, TOKEN_RESOLVE_BATCH
+from onchain.addresses import address_key, checksum
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+# ERC-20 selectors for symbol() and decimals()
+_SYMBOL = "0x95d89b41"
+_DECIMALS = "0x313ce567"
+
+
+class TokenInfo:
+    """Symbol, decimals and market name (e.g. ``ETH-USD``) of one token."""
+
+    __slots__ = ("symbol", "decimals", "market", "resolved")
+
+    def __init__(self, symbol: str, decimals: int = 18, market: str | None = None, resolved: bool = True):
+        self.symbol = symbol
+        self.decimals = decimals
+        self.market = market or f"{symbol}-USD"
+        self.resolved = resolved
+
+
+def _decode_symbol(raw: bytes) -> str:
+    """ABI ``string`` symbol, or the ``bytes32`` form some older tokens use."""
+    try:
+        return decode(["string"], raw)[0]
+    except Exception:
+        return raw[:32].rstrip(b"\x00").decode("utf-8", "replace")
+
+
+class TokenRegistry:
+    """Address -> :class:`TokenInfo` map, preloaded from ``TOKEN_REGISTRY_FILE``.
+
+    :meth:`lookup` never calls the chain. An unknown address gets a
+    placeholder named after the address and is queued. :meth:`run` then
+    reads ``symbol()``/``decimals()`` for queued tokens in batches and
+    swaps the placeholders out.
+    """
+
+    def __init__(self, path: str | None = TOKEN_REGISTRY_FILE):
+        self._index: dict[bytes, TokenInfo] = {}
+        self._pending: set[bytes] = set()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self._index)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def load(self, path: str) -> int:
+        with open(path) as f:
+            entries = json.load(f)
+        for entry in entries:
+            self.add(entry["address"], TokenInfo(entry["symbol"], entry["decimals"], entry.get("market")))
+        logger.info(f"[TokenRegistry] Loaded {len(entries)} tokens from {path}")
+        return len(entries)
+
+    def add(self, address, info: TokenInfo):
+        key = address_key(address)
+        self._index[key] = info
+        self._pending.discard(key)
+
+    def lookup(self, address) -> TokenInfo:
+        key = address_key(address)
+        info = self._index.get(key)
+        if info is None:
+            metrics.inc("token_registry_misses")
+            info = self._index[key] = TokenInfo("0x" + key.hex()[:8], resolved=False)
+            self._pending.add(key)
+        return info
+
+    async def resolve_pending(self, w3, batch_size: int = TOKEN_RESOLVE_BATCH) -> int:
+        """Read metadata for up to ``batch_size`` queued tokens concurrently."""
+        batch = [self._pending.pop() for _ in range(min(batch_size, len(self._pending)))]
+        if not batch:
+            return 0
+        results = await asyncio.gather(*(self._read_token(w3, key) for key in batch), return_exceptions=True)
+        resolved = 0
+        for key, result in zip(batch, results):
+            if isinstance(result, Exception):
+                # Leave the placeholder in place; retried on a later pass
+                logger.warning(f"[TokenRegistry] could not resolve {checksum(key)}: {result}")
+                self._pending.add(key)
+                continue
+            self.add(key, result)
+            resolved += 1
+        metrics.inc("token_registry_resolved", resolved)
+        return resolved
+
+    async def _read_token(self, w3, key: bytes) -> TokenInfo:
+        address = checksum(key)
+        raw_symbol, raw_decimals = await asyncio.gather(
+            w3.eth.call({"to": address, "data": _SYMBOL}),
+            w3.eth.call({"to": address, "data": _DECIMALS}),
+        )
+        symbol = _decode_symbol(bytes(raw_symbol))
+        logger.info(f"[TokenRegistry] Resolved {address} as {symbol}")
+        return TokenInfo(symbol, int.from_bytes(bytes(raw_decimals)[-32:], "big"))
+
+    async def run(self, w3, interval: float = TOKEN_RESOLVE_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                while self._pending and await self.resolve_pending(w3):
+                    pass
+            except Exception as e:
+                logger.error(f"[TokenRegistry] resolver error: {e}")
+
+
+# Shared by the on-chain watchers
+token_registry = TokenRegistry()
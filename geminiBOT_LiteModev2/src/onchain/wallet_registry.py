@@ -0,0 +1,261 @@
+# src/onchain/wallet_registry.py
+
+import asyncio
+import json
+import time
+from config.settings import WALLET_CACHE_TTL
+from database.db_manager import db
+from onchain.addresses import address_key
+from utils.logger import get_logger
+from utils.metrics import metrics
+
+logger = get_logger(__name__)
+
+WALLET_CHANNEL = "tracked_wallets_changed"
+
+_WALLET_COLUMNS = """
+    id, wallet_address, label, category, tags,
+    min_trade_size, alert_direction, alert_interval, metadata
+"""
+
+
+class TrackedWallet:
+    """Cached ``tracked_wallets`` row: metadata plus per-wallet alert options."""
+
+    __slots__ = (
+        "label", "category", "tags", "min_size", "direction", "interval",
+        "settings", "last_sent", "loaded_at",
+    )
+
+    def __init__(self, label=None, category=None, tags=None, min_size=10000.0, direction="both",
+                 interval=0, settings=None, last_sent=0.0, loaded_at=None):
+        self.label = label
+        self.category = category
+        self.tags = tags
+        self.min_size = min_size
+        self.direction = direction
+        self.interval = interval
+        self.settings = settings
+        self.last_sent = last_sent
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+
+    @classmethod
+    def from_row(cls, row) -> "TrackedWallet":
+        min_size = row["min_trade_size"]
+        return cls(
+            label=row["label"],
+            category=row["category"],
+            tags=row["tags"],
+            min_size=float(min_size) if min_size is not None else 10000.0,
+            direction=row["alert_direction"] or "both",
+            interval=row["alert_interval"] or 0,
+            settings=row["metadata"],
+        )
+
+
+class WalletRegistry:
+    """In-memory cache of enabled tracked wallets.
+
+    The table is loaded once with keyset pagination; afterwards the
+    ``tracked_wallets_changed`` NOTIFY trigger (``scripts/enhanced_schema.sql``)
+    delivers one address per change and only that row is re-read. A full
+    reload only happens when the listener connection has to be re-opened,
+    because notifications sent while it was down are lost.
+
+    Entries older than ``ttl`` are re-read on the next :meth:`lookup`, and
+    the wallet manager commands call :meth:`invalidate` (or :meth:`remove`)
+    directly, so edits show up even where the trigger is not installed.
+
+    The EnhancedWhaleWatcher calls :meth:`start` before it processes logs
+    and then keeps :meth:`run` alive in the background.
+    """
+
+    def __init__(self, db, page_size: int = 5000, channel: str = WALLET_CHANNEL, ttl: float = WALLET_CACHE_TTL):
+        self.db = db
+        self.page_size = page_size
+        self.channel = channel
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.loaded = False
+        self._index: dict[bytes, TrackedWallet] = {}
+        self._listener = None
+        self._deferred: list[str] | None = None
+        # Strong refs so in-flight notification tasks are not collected
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, address) -> bool:
+        return address_key(address) in self._index
+
+    def get(self, address) -> TrackedWallet | None:
+        return self._index.get(address_key(address))
+
+    async def lookup(self, address) -> TrackedWallet | None:
+        """Return the cached record, re-reading it first if it has expired."""
+        start = time.perf_counter()
+        record = self._index.get(address_key(address))
+        if record is not None and time.monotonic() - record.loaded_at < self.ttl:
+            self.hits += 1
+            metrics.inc("wallet_cache_hits")
+        else:
+            self.misses += 1
+            metrics.inc("wallet_cache_misses")
+            try:
+                await self.refresh(address)
+                record = self._index.get(address_key(address))
+            except Exception as e:
+                logger.error(f"[WalletRegistry] refresh error for {address}: {e}")
+        metrics.set("wallet_cache_hit_rate", self.hits / (self.hits + self.misses))
+        metrics.observe("wallet_cache_lookup", time.perf_counter() - start)
+        return record
+
+    async def invalidate(self, address: str):
+        """Expire any cached copy of ``address`` and re-read it now.
+
+        If the re-read fails the entry stays expired, so the next
+        :meth:`lookup` tries again.
+        """
+        record = self._index.get(address_key(address))
+        if record is not None:
+            record.loaded_at = float("-inf")
+        try:
+            await self.refresh(address)
+        except Exception as e:
+            logger.error(f"[WalletRegistry] invalidate error for {address}: {e}")
+
+    def upsert(self, address, record: TrackedWallet):
+        key = address_key(address)
+        previous = self._index.get(key)
+        if previous is not None:
+            # keep rate-limit state across edits
+            record.last_sent = previous.last_sent
+        self._index[key] = record
+
+    def remove(self, address):
+        self._index.pop(address_key(address), None)
+
+    async def load(self) -> int:
+        """Page through enabled wallets by ``id`` and build a fresh index.
+
+        Notifications arriving mid-load are held back and replayed on top of
+        the new index, since the pages they touch may already have been read.
+        """
+        start = time.perf_counter()
+        self._deferred = []
+        try:
+            index = await self._load_pages()
+            for key, old in self._index.items():
+                if key in index:
+                    index[key].last_sent = old.last_sent
+            self._index = index
+            self.loaded = True
+        finally:
+            deferred, self._deferred = self._deferred, None
+            for payload in deferred:
+                await self.apply_notification(payload)
+        elapsed = time.perf_counter() - start
+        metrics.set("tracked_wallets", len(self._index))
+        metrics.observe("wallet_registry_load", elapsed)
+        logger.info(f"[WalletRegistry] Loaded {len(self._index)} wallets in {elapsed:.2f}s")
+        return len(self._index)
+
+    async def _load_pages(self) -> dict[bytes, TrackedWallet]:
+        index: dict[bytes, TrackedWallet] = {}
+        last_id = 0
+        while True:
+            rows = await self.db.fetch(
+                f"""
+                SELECT {_WALLET_COLUMNS} FROM tracked_wallets
+                WHERE tracking_enabled=true AND id > $1
+                ORDER BY id LIMIT $2
+                """,
+                last_id, self.page_size,
+            )
+            for row in rows:
+                index[address_key(row["wallet_address"])] = TrackedWallet.from_row(row)
+            if len(rows) < self.page_size:
+                return index
+            last_id = rows[-1]["id"]
+
+    async def refresh(self, address: str):
+        """Re-read a single wallet after a change notification or TTL expiry.
+
+        Addresses are matched case-insensitively, since ``/add_wallet``
+        stores them as typed. A disabled row evicts the wallet; a missing
+        row does not (deletes arrive as ``DELETE`` notifications or via
+        :meth:`remove`), the cached copy is just kept for another ``ttl``.
+        """
+        row = await self.db.fetchrow(
+            f"SELECT {_WALLET_COLUMNS}, tracking_enabled FROM tracked_wallets "
+            "WHERE lower(wallet_address) = lower($1)",
+            address,
+        )
+        if row is None:
+            record = self._index.get(address_key(address))
+            if record is not None:
+                logger.warning(f"[WalletRegistry] {address} not found on re-read - keeping cached copy")
+                record.loaded_at = time.monotonic()
+        elif not row["tracking_enabled"]:
+            self.remove(address)
+        else:
+            self.upsert(address, TrackedWallet.from_row(row))
+        metrics.inc("wallet_registry_deltas")
+        metrics.set("tracked_wallets", len(self._index))
+
+    async def apply_notification(self, payload: str):
+        try:
+            change = json.loads(payload)
+            if change["op"] == "DELETE":
+                self.remove(change["wallet_address"])
+                metrics.inc("wallet_registry_deltas")
+                metrics.set("tracked_wallets", len(self._index))
+            else:
+                await self.refresh(change["wallet_address"])
+        except Exception as e:
+            logger.error(f"[WalletRegistry] bad notification {payload!r}: {e}")
+
+    def _on_notify(self, conn, pid, channel, payload):
+        if self._deferred is not None:
+            self._deferred.append(payload)
+            return
+        task = asyncio.create_task(self.apply_notification(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _listening(self) -> bool:
+        return self._listener is not None and not self._listener.is_closed()
+
+    async def _listen(self) -> bool:
+        try:
+            self._listener = await self.db.listen(self.channel, self._on_notify)
+            return True
+        except Exception as e:
+            logger.error(f"[WalletRegistry] listen error: {e}")
+            self._listener = None
+            return False
+
+    async def start(self):
+        """LISTEN first, then load, so no change in between is missed."""
+        await self._listen()
+        await self.load()
+
+    async def run(self, check_interval: float = 5.0):
+        """Re-open a dropped listener and reload what may have been missed."""
+        try:
+            while True:
+                await asyncio.sleep(check_interval)
+                if self._listening():
+                    continue
+                logger.warning("[WalletRegistry] listener down - reconnecting")
+                if await self._listen():
+                    await self.load()
+        finally:
+            if self._listening():
+                await self._listener.close()
+
+
+# Shared by the whale watcher and the Telegram wallet manager
+wallet_registry = WalletRegistry(db)
@@ -2,13 +2,30 @@
 # === 1️⃣ WhaleWatcher with WebSocket ===
 import asyncio
 import os
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
 from web3 import AsyncWeb3, Web3
 from web3.providers.persistent.websocket import WebSocketProvider as AsyncWebsocketProvider
 from utils.logger import get_logger
 from utils.metrics import metrics
 from database.db_manager import DBManager
+from database.trade_writer import TradeBatchWriter
+from onchain.gmx_decoder import decode_log, INCREASE_POSITION, DECREASE_POSITION, PRICE_PRECISION
+from onchain.token_registry import token_registry
+from config.settings import (
+    BACKFILL_MAX_BLOCKS, WHALE_CHECKPOINT_INTERVAL, WHALE_WATCHER_MODE, WHALE_POLL_INTERVAL,
+    WHALE_WS_URLS, WHALE_CAPTURE_FILE, WHALE_CHAIN, CONFIRMATION_MODE,
+)
+from onchain.backfill import BlockCheckpoint, LogBackfiller
+from onchain.position_ledger import PositionLedger
+from onchain.log_dedup import RecentLogs
+from onchain.log_capture import LogCapture
+from onchain.addresses import log_account
+from onchain.confirmations import ConfirmationBuffer, confirmations_for, log_key
 from execution.telegram_bot import TelegramBot
-from signal_generation.signal_aggregator import SignalAggregator
+from event_bus import event_bus, WHALE_TRADES, WhaleTrades
 
 logger = get_logger(__name__)
 
@@ -19,21 +36,65 @@ if _vault_addr:
 else:
     GMX_VAULT = None
     logger.warning("[WhaleWatcher] GMX_VAULT_ADDRESS not set")
-SIG_POSITION_OPEN = Web3.keccak(text="IncreasePosition(address,address,address,uint256,uint256,uint256,uint256,uint256,uint256,bool,uint256)").hex()
-SIG_POSITION_CLOSE = Web3.keccak(text="DecreasePosition(...)").hex()
+SIG_POSITION_OPEN = INCREASE_POSITION.topic.hex()
+SIG_POSITION_CLOSE = DECREASE_POSITION.topic.hex()
+
+
+def provider_name(url: str) -> str:
+    """Metric-safe name for an RPC endpoint, e.g. ``arb_mainnet_g_alchemy_com``."""
+    host = urlparse(url).hostname or url
+    return re.sub(r"\W", "_", host)
+
 
 class WhaleWatcher:
-    def __init__(self, tg_bot: TelegramBot):
-        if not ALCHEMY_WS_URL:
+    # Telegram alerts are muted while replaying history on startup
+    alerts_enabled = True
+    # So are bus events: replayed trades would count as live flow and signals
+    publish_enabled = True
+    # Shared token metadata; lookups never hit the chain
+    tokens = token_registry
+    capture = None
+    # Trades go to the signal aggregator (and anyone else) through the bus
+    bus = event_bus
+
+    def __init__(self, tg_bot: TelegramBot, providers: list | None = None, db=None):
+        """``providers`` (``[(name, AsyncWeb3)]``) and ``db`` default to the configured ones."""
+        if providers is None:
+            urls = WHALE_WS_URLS or ([ALCHEMY_WS_URL] if ALCHEMY_WS_URL else [])
+            providers = [(provider_name(url), AsyncWeb3(AsyncWebsocketProvider(url))) for url in urls]
+        self.providers = providers
+        if not providers:
             logger.error("[WhaleWatcher] ALCHEMY_WS_URL not set - disabling watcher")
             self.enabled = False
             self.w3 = None
         else:
-            self.w3 = AsyncWeb3(AsyncWebsocketProvider(ALCHEMY_WS_URL))
+            # The first endpoint also serves backfill and block lookups
+            self.w3 = providers[0][1]
             self.enabled = True
-        self.db = DBManager()
+        self.db = db if db is not None else DBManager()
+        self.trade_writer = TradeBatchWriter(self.db)
+        self.checkpoint = BlockCheckpoint(self.db, "gmx_vault")
+        self.backfiller = LogBackfiller(self.w3)
+        self.ledger = PositionLedger()
+        if WHALE_CAPTURE_FILE:
+            self.capture = LogCapture(WHALE_CAPTURE_FILE)
+        self.confirmation_mode = CONFIRMATION_MODE
+        self.confirmations = ConfirmationBuffer(confirmations_for(WHALE_CHAIN))
+        self._background_tasks = []
         self.tg_bot = tg_bot
-        self.signal_aggregator = SignalAggregator()
+        self.mode = WHALE_WATCHER_MODE
+        self.poll_interval = WHALE_POLL_INTERVAL
+        self.max_resubscribe_delay = 30.0
+        # Highest block seen so far; it may be only partly processed
+        self._last_block = None
+        self._recent = RecentLogs()
+        self._block_times = OrderedDict()
+        # Block -> [(mode, received)] waiting on a background timestamp lookup
+        self._latency_pending = {}
+        self._latency_tasks = set()
+        self._live = False
+        self._live_lock = asyncio.Lock()
+        self._connected_providers = 0
 
     async def run(self):
         if not getattr(self, 'enabled', True):
@@ -45,16 +106,347 @@ class WhaleWatcher:
             )
             return
         await self.db.connect()
-        event_filter = await self.w3.eth.filter({"address": GMX_VAULT})
-        logger.info("[WhaleWatcher] WebSocket listening...")
+        self._start_background_tasks()
+        if self._last_block is None:
+            saved = await self.checkpoint.load()
+            if saved is not None:
+                self._last_block = saved + 1
+        if not self.ledger.loaded:
+            # Trades past the checkpoint are re-applied by the startup backfill
+            try:
+                await self.ledger.rebuild(self.db, "GMX", self.checkpoint.block)
+            except Exception as e:
+                logger.error(f"[WhaleWatcher] position ledger rebuild failed: {e}")
+        if self.mode == "poll":
+            await self._run_polling()
+        else:
+            await self._run_subscription()
+
+    def _start_background_tasks(self):
+        if any(not t.done() for t in self._background_tasks):
+            return
+        self._background_tasks = [
+            asyncio.create_task(self.trade_writer.run()),
+            asyncio.create_task(self._checkpoint_loop()),
+        ]
+        if self._durable():
+            self._background_tasks.append(asyncio.create_task(self._confirmation_loop()))
+        self._background_tasks.append(asyncio.create_task(self.tokens.run(self.w3)))
+
+    async def _checkpoint_loop(self):
+        """Persist the checkpoint once the trades behind it are flushed."""
+        while True:
+            await asyncio.sleep(WHALE_CHECKPOINT_INTERVAL)
+            await self.trade_writer.flush()
+            if self.trade_writer.pending == 0:
+                await self.checkpoint.save()
+
+    async def _confirmation_loop(self):
+        """Promote held logs as the head moves, even when no new logs arrive."""
+        while True:
+            await asyncio.sleep(self.poll_interval or 1)
+            try:
+                head = await self.w3.eth.block_number
+            except Exception as e:
+                logger.debug(f"[WhaleWatcher] head lookup failed: {e}")
+                continue
+            await self._promote(self.confirmations.advance(head))
+
+    def _durable(self) -> bool:
+        return self.confirmation_mode == "durable" and self.confirmations.confirmations > 0
+
+    def _log_filter(self) -> dict:
+        return {
+            "address": GMX_VAULT,
+            "topics": [["0x" + SIG_POSITION_OPEN, "0x" + SIG_POSITION_CLOSE]],
+        }
+
+    async def _run_polling(self):
+        await self._ensure_connected(self.w3)
+        event_filter = await self.w3.eth.filter(self._log_filter())
+        await self._catch_up()
+        logger.info("[WhaleWatcher] Polling for logs...")
         while True:
             try:
                 logs = await event_filter.get_new_entries()
                 for log in logs:
-                    await self.handle_log(log)
+                    await self._dispatch(log, "poll")
             except Exception as e:
                 logger.error(f"[WhaleWatcher] WS error: {e}")
-            await asyncio.sleep(1)
+                try:
+                    await self._ensure_connected(self.w3)
+                except Exception as e:
+                    logger.error(f"[WhaleWatcher] reconnect failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _run_subscription(self):
+        """Consume pushed logs from every provider at once.
+
+        Each provider runs its own resubscribe loop and :meth:`_dispatch`
+        keeps whichever copy of a log arrives first. If one loop fails the
+        others are cancelled with it. Falls back to :meth:`_run_polling`
+        only if every provider fails its first ``eth_subscribe`` call before
+        any of them has subscribed.
+        """
+        self._first_failures = set()
+        self._subscribed_any = False
+        self._subscribe_unavailable = asyncio.Event()
+        if len(self.providers) == 1:
+            name, w3 = self.providers[0]
+            subscribed = await self._subscribe_provider(name, w3)
+        else:
+            async with asyncio.TaskGroup() as tg:
+                loops = [tg.create_task(self._subscribe_provider(name, w3)) for name, w3 in self.providers]
+            subscribed = any(loop.result() for loop in loops)
+        if not subscribed:
+            logger.warning("[WhaleWatcher] eth_subscribe unavailable - falling back to polling")
+            self.mode = "poll"
+            await self._run_polling()
+
+    async def _subscribe_provider(self, name: str, w3) -> bool:
+        """Resubscribe loop for one provider; False if no provider could subscribe.
+
+        A provider whose first ``eth_subscribe`` fails keeps retrying with
+        the same backoff as a dropped subscription. Missed blocks are only
+        backfilled when no other provider stayed connected while this one
+        was down.
+        """
+        subscribed_once = False
+        delay = 1.0
+        while True:
+            try:
+                await self._ensure_connected(w3)
+                sub_id = await w3.eth.subscribe("logs", self._log_filter())
+            except Exception as e:
+                wait = min(delay, self.max_resubscribe_delay)
+                delay = min(delay * 2, self.max_resubscribe_delay)
+                if subscribed_once:
+                    logger.error(f"[WhaleWatcher] {name}: resubscribe failed: {e}. Retrying in {wait}s")
+                    await asyncio.sleep(wait)
+                    continue
+                self._first_failures.add(name)
+                if not self._subscribed_any and len(self._first_failures) == len(self.providers):
+                    self._subscribe_unavailable.set()
+                if self._subscribe_unavailable.is_set():
+                    logger.warning(f"[WhaleWatcher] {name}: eth_subscribe failed ({e})")
+                    return False
+                logger.warning(f"[WhaleWatcher] {name}: eth_subscribe failed ({e}). Retrying in {wait}s")
+                try:
+                    await asyncio.wait_for(self._subscribe_unavailable.wait(), wait)
+                    return False
+                except asyncio.TimeoutError:
+                    continue
+
+            self._subscribed_any = True
+            if subscribed_once:
+                metrics.inc("ws_resubscribes")
+            if not self._live:
+                await self._go_live()
+            elif self._connected_providers == 0:
+                await self._fill_gap()
+            self._connected_providers += 1
+            subscribed_once = True
+            delay = 1.0
+            logger.info(f"[WhaleWatcher] {name}: WebSocket subscribed ({sub_id})")
+
+            try:
+                async for message in w3.socket.process_subscriptions():
+                    if message.get("subscription") != sub_id:
+                        continue
+                    await self._dispatch(message["result"], "subscribe", name)
+                logger.warning(f"[WhaleWatcher] {name}: subscription stream ended")
+            except Exception as e:
+                logger.error(f"[WhaleWatcher] {name}: subscription dropped: {e}")
+            finally:
+                self._connected_providers -= 1
+            await self._disconnect(w3)
+
+    async def _go_live(self):
+        """Catch up once, before the first provider starts consuming."""
+        async with self._live_lock:
+            if not self._live:
+                await self._catch_up()
+                self._live = True
+
+    async def _ensure_connected(self, w3):
+        provider = w3.provider
+        if hasattr(provider, "connect") and not await provider.is_connected():
+            await provider.connect()
+
+    async def _disconnect(self, w3):
+        try:
+            await w3.provider.disconnect()
+        except Exception as e:
+            logger.debug(f"[WhaleWatcher] disconnect error: {e}")
+
+    async def _catch_up(self):
+        """Backfill from the stored checkpoint before live mode, alerts muted."""
+        if self._last_block is None:
+            self._last_block = await self.w3.eth.block_number
+            self.checkpoint.update(self._last_block)
+            return
+        self.alerts_enabled = self.publish_enabled = False
+        try:
+            await self._fill_gap("backfill")
+        finally:
+            self.alerts_enabled = self.publish_enabled = True
+
+    async def _fill_gap(self, mode: str = "gap_fill"):
+        """Fetch logs emitted while we were not listening.
+
+        The last seen block is re-read because we may have stopped half way
+        through it; duplicates are skipped by :meth:`_dispatch`.
+        """
+        if self._last_block is None:
+            return
+        head = await self.w3.eth.block_number
+        start = max(self._last_block, head - BACKFILL_MAX_BLOCKS)
+        if head < start:
+            return
+        if start > self._last_block:
+            logger.warning(f"[WhaleWatcher] Skipping blocks {self._last_block}-{start - 1} beyond backfill limit")
+
+        async def handler(log):
+            await self._dispatch(log, mode)
+
+        async def on_chunk(last_block):
+            # In durable mode the checkpoint follows promotion instead
+            if not self._durable():
+                self.checkpoint.update(last_block)
+
+        await self.backfiller.run(self._log_filter(), start, head, handler, on_chunk)
+        self._last_block = max(self._last_block, head)
+
+    def _is_duplicate(self, log, received: float, source: str | None = None) -> bool:
+        """Remember the first copy of a log and time later copies against it."""
+        key = log_key(log)
+        first = self._recent.get(key, received)
+        if first is None:
+            self._recent.add(key, received, source)
+            if source is not None:
+                metrics.inc(f"provider_first_{source}")
+            return False
+        first_received, winner = first
+        if source is not None and winner is not None and source != winner:
+            lag = received - first_received
+            metrics.observe(f"provider_lag_{source}", lag)
+            metrics.observe(f"provider_lead_{winner}", lag)
+        return True
+
+    async def _dispatch(self, log, mode: str, source: str | None = None):
+        received = time.time()
+        if self.capture is not None:
+            self.capture.write(log)
+        if log.get("removed"):
+            await self._handle_removed(log)
+            return
+        if self._is_duplicate(log, received, source):
+            metrics.inc("logs_duplicate")
+            return
+        block = log.get("blockNumber")
+        durable = self._durable() and block is not None
+        if block is not None and (self._last_block is None or block > self._last_block):
+            if self._last_block is not None and not durable:
+                self.checkpoint.update(block - 1)
+            self._last_block = block
+        if durable:
+            await self._promote(self.confirmations.add(log, received))
+        else:
+            await self.handle_log(log)
+            if block is not None:
+                # Held only so a reorg within the window can be rolled back
+                self.confirmations.add(log, received)
+        if mode != "backfill":
+            self._record_latency(log, mode, received)
+
+    async def _promote(self, ready):
+        """Process logs that reached the confirmation depth (durable mode)."""
+        if not self._durable():
+            return
+        for log, _ in ready:
+            await self.handle_log(log)
+        if self.confirmations.promoted_through is not None:
+            self.checkpoint.update(self.confirmations.promoted_through)
+
+    async def _handle_removed(self, log):
+        """Drop a reorged log if it is still held, otherwise undo its effects."""
+        metrics.inc("logs_removed")
+        key = log_key(log)
+        seen = key in self._recent
+        # Let the log through again if it is re-mined in another block
+        self._recent.discard(key)
+        held = self.confirmations.remove(log)
+        if held and self._durable():
+            metrics.inc("reorg_dropped")
+            logger.info(f"[WhaleWatcher] Dropped reorged log {key} before processing")
+            return
+        if held or seen:
+            await self._rollback(log)
+
+    async def _rollback(self, log, protocol: str = "GMX"):
+        """Undo the ledger entry, trade row and alert of a processed log."""
+        metrics.inc("reorg_rollbacks")
+        try:
+            sig = log["topics"][0].hex()
+            _, wallet = log_account(log)
+            if sig == SIG_POSITION_OPEN:
+                action, data = "open", self.decode_increase_position(log)
+            elif sig == SIG_POSITION_CLOSE:
+                action, data = "close", self.decode_decrease_position(log)
+            else:
+                return
+            self.ledger.revert(wallet, data, action)
+            if not self.trade_writer.discard(data["tx_hash"], data["log_index"]):
+                await self.db.execute(
+                    "DELETE FROM wallet_trades WHERE tx_hash=$1 AND log_index=$2", data["tx_hash"], data["log_index"]
+                )
+            logger.warning(f"[WhaleWatcher] Rolled back reorged {action} {data['tx_hash']} for {wallet}")
+            if action == "open" and self.alerts_enabled:
+                await self.tg_bot.send_alert(
+                    f"⚠️ Reorg: whale {wallet} {data['size_usd']:.2f}$ {data['direction']} open was dropped"
+                )
+        except Exception as e:
+            logger.error(f"[WhaleWatcher] rollback error: {e}")
+
+    def _record_latency(self, log, mode: str, received: float):
+        """Observe block-time to arrival latency under ``whale_event_latency_<mode>``.
+
+        Uses the log's ``blockTimestamp`` when the node sends one. Otherwise
+        the block is fetched in the background, once per block, so dispatch
+        never waits on the RPC.
+        """
+        block = log.get("blockNumber")
+        if block is None:
+            return
+        ts = log.get("blockTimestamp")
+        if ts is not None:
+            self._remember_block_time(block, int(ts, 16) if isinstance(ts, str) else ts)
+        ts = self._block_times.get(block)
+        if ts is not None:
+            metrics.observe(f"whale_event_latency_{mode}", max(0.0, received - ts))
+            return
+        waiting = self._latency_pending.setdefault(block, [])
+        waiting.append((mode, received))
+        if len(waiting) == 1:
+            task = asyncio.create_task(self._lookup_block_time(block))
+            self._latency_tasks.add(task)
+            task.add_done_callback(self._latency_tasks.discard)
+
+    async def _lookup_block_time(self, block):
+        try:
+            ts = (await self.w3.eth.get_block(block))["timestamp"]
+        except Exception as e:
+            logger.debug(f"[WhaleWatcher] block time lookup failed: {e}")
+            self._latency_pending.pop(block, None)
+            return
+        self._remember_block_time(block, ts)
+        for mode, received in self._latency_pending.pop(block, ()):
+            metrics.observe(f"whale_event_latency_{mode}", max(0.0, received - ts))
+
+    def _remember_block_time(self, block, ts):
+        self._block_times[block] = ts
+        if len(self._block_times) > 256:
+            self._block_times.popitem(last=False)
 
     async def handle_log(self, log):
         try:
@@ -64,70 +456,87 @@ class WhaleWatcher:
 
     async def _process_log(self, log, protocol: str):
         sig = log["topics"][0].hex()
-        wallet = Web3.to_checksum_address('0x' + log["topics"][1].hex()[-40:])
+        _, wallet = log_account(log)
         metrics.inc("logs_processed")
         if sig == SIG_POSITION_OPEN:
             data = self.decode_increase_position(log)
+            self.ledger.increase(wallet, data)
             await self.write_trade(wallet, protocol, "open", data)
             metrics.inc("trades_opened")
-            await self.tg_bot.send_alert(
-                f"🐋 Whale {wallet} opened {data['size_usd']:.2f}$ {data['direction']}"
-            )
-            await self.signal_aggregator.process_whale_signal(
-                data['symbol'], data['size_usd'], data['direction']
-            )
+            if self.alerts_enabled:
+                await self.tg_bot.send_alert(
+                    f"🐋 Whale {wallet} opened {data['size_usd']:.2f}$ {data['direction']}"
+                )
+            if self.publish_enabled:
+                await self.bus.publish(
+                    WHALE_TRADES, WhaleTrades.one(protocol.lower(), data['symbol'], data['size_usd'], data['direction'])
+                )
         elif sig == SIG_POSITION_CLOSE:
-            await self.link_pnl(wallet, log)
+            await self.link_pnl(wallet, log, protocol)
             metrics.inc("trades_closed")
 
     def decode_increase_position(self, log):
-        data = log["data"]
-        size_usd = int(data[2:66], 16) / 1e30
-        leverage = int(data[66:130], 16) / 1e30
-        direction = "long"
+        fields = decode_log(log)
+        size_usd = fields["sizeDelta"] / PRICE_PRECISION
+        collateral_usd = fields["collateralDelta"] / PRICE_PRECISION
+        mark_price = fields["markPrice"] / PRICE_PRECISION
+        index = self.tokens.lookup(fields["indexToken"])
+        collateral = self.tokens.lookup(fields["collateralToken"])
         return {
-            "symbol": "BTC-USD",
+            "symbol": index.market,
             "size_usd": size_usd,
-            "leverage": leverage,
-            "direction": direction,
+            "size_tokens": size_usd / mark_price if mark_price else 0.0,
+            "leverage": size_usd / collateral_usd if collateral_usd else 0.0,
+            "direction": "long" if fields["isLong"] else "short",
+            "collateral_token": fields["collateralToken"],
+            "collateral_symbol": collateral.symbol,
+            "index_token": fields["indexToken"],
+            "price": fields["averagePrice"] / PRICE_PRECISION,
+            "mark_price": mark_price,
+            "block_number": log.get("blockNumber"),
+            "log_index": log.get("logIndex", 0),
+            "fields": fields,
             "tx_hash": log["transactionHash"].hex()
         }
 
     def decode_decrease_position(self, log):
-        data = log["data"]
-        size_usd = int(data[2:66], 16) / 1e30
-        pnl = int(data[130:194], 16) / 1e30
+        fields = decode_log(log)
+        size_usd = fields["sizeDelta"] / PRICE_PRECISION
+        mark_price = fields["markPrice"] / PRICE_PRECISION
+        index = self.tokens.lookup(fields["indexToken"])
+        collateral = self.tokens.lookup(fields["collateralToken"])
         return {
-            "pnl": pnl,
+            "symbol": index.market,
+            "pnl": fields["realisedPnl"] / PRICE_PRECISION,
             "size_usd": size_usd,
+            "size_tokens": size_usd / mark_price if mark_price else 0.0,
+            "direction": "long" if fields["isLong"] else "short",
+            "collateral_token": fields["collateralToken"],
+            "collateral_symbol": collateral.symbol,
+            "index_token": fields["indexToken"],
+            "price": mark_price,
+            "entry_price": fields["averagePrice"] / PRICE_PRECISION,
+            "block_number": log.get("blockNumber"),
+            "log_index": log.get("logIndex", 0),
+            "fields": fields,
             "tx_hash": log["transactionHash"].hex()
         }
 
     async def write_trade(self, wallet, protocol, action, data):
-        try:
-            await self.db.pool.execute(
-                """
-                INSERT INTO wallet_trades(wallet_address, protocol, action, symbol, size_usd, leverage, direction, tx_hash)
-                VALUES($1,$2,$3,$4,$5,$6,$7,$8) ON CONFLICT DO NOTHING
-                """,
-                wallet, protocol, action,
-                data["symbol"], data["size_usd"], data["leverage"], data["direction"], data["tx_hash"]
-            )
-            metrics.inc("trades_recorded")
-            logger.info(f"[WhaleWatcher] {protocol} {action} {data}")
-        except Exception as e:
-            logger.error(f"[WhaleWatcher] write_trade error: {e}")
+        """Queue a trade row; :class:`TradeBatchWriter` flushes it in bulk."""
+        self.trade_writer.add_trade(wallet, protocol, action, data)
+        metrics.inc("trades_queued")
+        logger.debug(f"[WhaleWatcher] {protocol} {action} {data}")
+
+    async def link_pnl(self, wallet, log, protocol: str = "GMX"):
+        """Match a DecreasePosition to its open position and record the close.
 
-    async def link_pnl(self, wallet, log):
+        The match is a ledger lookup on the full position key; the close is
+        queued as its own ``wallet_trades`` row carrying the realised PnL.
+        """
         data = self.decode_decrease_position(log)
+        position = self.ledger.decrease(wallet, data)
+        if position is None:
+            logger.debug(f"[WhaleWatcher] No open position for {wallet} close {data['tx_hash']}")
         logger.info(f"[WhaleWatcher] Linking PnL for {wallet} -> {data['pnl']}")
-        row = await self.db.fetchrow(
-            "SELECT id FROM wallet_trades WHERE wallet_address=$1 AND action='open' ORDER BY timestamp DESC LIMIT 1",
-            wallet,
-        )
-        if row:
-            await self.db.execute(
-                "UPDATE wallet_trades SET pnl=$1, action='close' WHERE id=$2",
-                data["pnl"], row["id"],
-            )
-
+        await self.write_trade(wallet, protocol, "close", data)
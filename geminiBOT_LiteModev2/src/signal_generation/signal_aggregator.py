@@ -1,33 +1,82 @@
 # src/signal_generation/signal_aggregator.py
 
 import asyncio
+import logging
+from config.settings import WHALE_SIGNAL_LOG_EVERY
 from utils.logger import get_logger
 from ai_analysis.sentiment_mobilebert import SentimentAnalyzer
+from signal_generation.whale_flow import WhaleFlow, whale_flow
+from event_bus import (
+    EventBus, event_bus, COALESCE, WHALE_TRADES, NEWS_ITEMS, SENTIMENT_RESULTS, SIGNALS,
+    SentimentResult, Signal,
+)
 
 logger = get_logger(__name__)
 
 
 class SignalAggregator:
-    def __init__(self, summary_interval: int = 300):
-        self.sentiment_analyzer = SentimentAnalyzer()
+    """Turns whale trades and news from the event bus into signals.
+
+    Whale trades are read from a coalescing queue, so a backlog is
+    tallied as one merged batch rather than stalling the watchers.
+    """
+
+    def __init__(self, summary_interval: int = 300, log_every: int = WHALE_SIGNAL_LOG_EVERY,
+                 flow: WhaleFlow | None = None, bus: EventBus | None = None,
+                 sentiment_analyzer: SentimentAnalyzer | None = None):
+        self.sentiment_analyzer = sentiment_analyzer or SentimentAnalyzer()
+        self.bus = bus if bus is not None else event_bus
         self.trade_tally: dict[str, dict[str, int]] = {}
+        # Rolling per-window history; the tally above only covers one summary
+        self.flow = flow if flow is not None else whale_flow
         self._summary_interval = summary_interval
+        self._log_every = max(1, log_every)
+        self._signals_seen = 0
 
     async def run(self):
-        asyncio.create_task(self.sentiment_analyzer.run())
-        asyncio.create_task(self._whale_summary_loop())
+        """Run the consumer loops until one of them fails.
+
+        The loops are children of this call, so a failure cancels the rest
+        and reaches the supervisor, and a restart never leaves an old
+        consumer reading the same bus queue.
+        """
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self.sentiment_analyzer.run())
+            tg.create_task(self._whale_summary_loop())
+            tg.create_task(self._whale_trade_loop())
+            tg.create_task(self._news_loop())
+            while True:
+                signals = [
+                    {"symbol": "AAPL", "text": "Apple beats earnings estimates."},
+                    {"symbol": "BTC-USD", "text": "Bitcoin hits new local high."}
+                ]
+                combined = []
+                for sig in signals:
+                    sentiment = await self.sentiment_analyzer.analyze(sig['text'])
+                    sig['sentiment'] = sentiment
+                    combined.append(sig)
+                    await self.bus.publish(SIGNALS, Signal(sig['symbol'], "sentiment", sentiment))
+                logger.info(f"[SignalAggregator] Signals: {combined}")
+                await asyncio.sleep(60)
+
+    async def _whale_trade_loop(self):
+        trades = self.bus.subscribe(WHALE_TRADES, "signal_aggregator", maxsize=256, policy=COALESCE)
+        async for batch in trades:
+            await self.process_whale_signals(batch.symbols, batch.sizes, batch.directions)
+
+    async def _news_loop(self):
+        news = self.bus.subscribe(NEWS_ITEMS, "signal_aggregator", maxsize=200)
         while True:
-            signals = [
-                {"symbol": "AAPL", "text": "Apple beats earnings estimates."},
-                {"symbol": "BTC-USD", "text": "Bitcoin hits new local high."}
-            ]
-            combined = []
-            for sig in signals:
-                sentiment = await self.sentiment_analyzer.analyze(sig['text'])
-                sig['sentiment'] = sentiment
-                combined.append(sig)
-            logger.info(f"[SignalAggregator] Signals: {combined}")
-            await asyncio.sleep(60)
+            # Whatever piled up is scored with one cache round-trip
+            items = [await news.get()] + news.drain()
+            try:
+                results = await self.sentiment_analyzer.analyze_many([i.title for i in items])
+                for item, result in zip(items, results):
+                    await self.bus.publish(
+                        SENTIMENT_RESULTS, SentimentResult(item.title, result["label"], result["score"])
+                    )
+            except Exception as e:
+                logger.error(f"[SignalAggregator] news sentiment error: {e}")
 
     async def _whale_summary_loop(self):
         while True:
@@ -48,21 +97,34 @@ class SignalAggregator:
         self.trade_tally.clear()
 
     async def process_whale_signal(self, symbol: str, size_usd: float, direction: str):
-        """Process large whale trade events.
+        """Tally one large whale trade; see :meth:`process_whale_signals`."""
+        await self.process_whale_signals((symbol,), (size_usd,), (direction,))
+
+    async def process_whale_signals(self, symbols, sizes, directions):
+        """Tally whale trades given as parallel columns, in one pass.
 
-        This placeholder simply logs the received trade details so that
-        :class:`~onchain.whale_watcher.WhaleWatcher` can pass data here
-        without raising errors. More complex aggregation logic can be
-        implemented later.
+        Each trade is logged at DEBUG. At INFO only one in ``log_every``
+        is, so logging stays cheap at high trade volume.
         """
         try:
-            logger.info(
-                f"[SignalAggregator] Whale trade {symbol} {direction} "
-                f"${size_usd:,.2f}"
-            )
-            tally = self.trade_tally.setdefault(symbol, {"long": 0, "short": 0})
-            if direction not in tally:
-                tally[direction] = 0
-            tally[direction] += 1
+            tallies = self.trade_tally
+            for symbol, direction in zip(symbols, directions):
+                tally = tallies.get(symbol)
+                if tally is None:
+                    tally = tallies[symbol] = {"long": 0, "short": 0}
+                tally[direction] = tally.get(direction, 0) + 1
+            self.flow.add_many(symbols, sizes, directions)
+            count = len(symbols)
+            if logger.isEnabledFor(logging.DEBUG):
+                for symbol, size_usd, direction in zip(symbols, sizes, directions):
+                    logger.debug(f"[SignalAggregator] Whale trade {symbol} {direction} ${size_usd:,.2f}")
+            seen = self._signals_seen
+            self._signals_seen = seen + count
+            sample = self._log_every - 1 - seen % self._log_every
+            if sample < count:
+                logger.info(
+                    f"[SignalAggregator] Whale trade {symbols[sample]} {directions[sample]} "
+                    f"${sizes[sample]:,.2f} (1 in {self._log_every}, {self._signals_seen:,} total)"
+                )
         except Exception as e:
-            logger.error(f"[SignalAggregator] process_whale_signal error: {e}")
+            logger.error(f"[SignalAggregator] process_whale_signals error: {e}")
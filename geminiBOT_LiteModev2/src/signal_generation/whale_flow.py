@@ -0,0 +1,149 @@
+# src/signal_generation/whale_flow.py
+
+import re
+import time
+from array import array
+from typing import Dict, Iterable
+
+# name -> (span in seconds, buckets). Bucket width is span / buckets.
+WHALE_FLOW_WINDOWS = {
+    "1m": (60, 60),
+    "5m": (300, 60),
+    "1h": (3600, 60),
+    "24h": (86400, 96),
+}
+
+# Per-bucket columns, stored interleaved in one array('d')
+_LONG_COUNT, _SHORT_COUNT, _LONG_USD, _SHORT_USD = range(4)
+_COLUMNS = 4
+
+
+def base_asset(symbol: str) -> str:
+    """``ETH`` for ``ETH-USD``, ``eth/usdc:usdc`` or ``ETH``."""
+    return re.split(r"[-/:]", symbol, maxsplit=1)[0].upper()
+
+
+def sentiment_label(long_ratio: float) -> str:
+    return "bullish" if long_ratio > 0.65 else "bearish" if long_ratio < 0.35 else "neutral"
+
+
+class FlowRing:
+    """Long/short counts and USD volume for one symbol over one window.
+
+    ``buckets`` slots of ``width`` seconds each. A slot remembers which
+    bucket number it holds, so a stale slot is zeroed when it is
+    reused and skipped by queries.
+    """
+
+    __slots__ = ("width", "buckets", "stamps", "values")
+
+    def __init__(self, span: int, buckets: int):
+        self.width = span / buckets
+        self.buckets = buckets
+        self.stamps = array("q", [-1]) * buckets
+        self.values = array("d", bytes(8 * _COLUMNS * buckets))
+
+    def add(self, now: float, long: bool, size_usd: float) -> None:
+        number = int(now // self.width)
+        slot = number % self.buckets
+        base = slot * _COLUMNS
+        values = self.values
+        if self.stamps[slot] != number:
+            self.stamps[slot] = number
+            values[base] = values[base + 1] = values[base + 2] = values[base + 3] = 0.0
+        if long:
+            values[base + _LONG_COUNT] += 1
+            values[base + _LONG_USD] += size_usd
+        else:
+            values[base + _SHORT_COUNT] += 1
+            values[base + _SHORT_USD] += size_usd
+
+    def totals(self, now: float, out: list) -> list:
+        """Add this window's sums into ``out`` (``[long_n, short_n, long_usd, short_usd]``)."""
+        oldest = int(now // self.width) - self.buckets
+        values = self.values
+        for slot, number in enumerate(self.stamps):
+            if number > oldest:
+                base = slot * _COLUMNS
+                out[0] += values[base]
+                out[1] += values[base + 1]
+                out[2] += values[base + 2]
+                out[3] += values[base + 3]
+        return out
+
+
+class WhaleFlow:
+    """Rolling whale flow per symbol over every window in ``windows``.
+
+    :meth:`add` costs one bucket update per window. :meth:`stats` walks
+    one window's buckets. Nothing is ever rescanned from the database.
+    """
+
+    def __init__(self, windows: Dict[str, tuple] = WHALE_FLOW_WINDOWS):
+        self.windows = dict(windows)
+        self._rings: Dict[str, tuple] = {}
+
+    def __len__(self):
+        return len(self._rings)
+
+    @property
+    def symbols(self):
+        return list(self._rings)
+
+    def _rings_for(self, symbol: str) -> tuple:
+        rings = self._rings.get(symbol)
+        if rings is None:
+            rings = self._rings[symbol] = tuple(FlowRing(*spec) for spec in self.windows.values())
+        return rings
+
+    def matching(self, query: str) -> list:
+        """Stored symbols for ``query``: the exact market if tracked, else every market on its base asset.
+
+        Watchers name markets differently (``BTC-USD`` on GMX,
+        ``BTC/USDC:USDC`` on Hyperliquid), so ``btc`` matches both.
+        """
+        exact = [name for name in self._rings if name.upper() == query.upper()]
+        if exact:
+            return exact
+        base = base_asset(query)
+        return [name for name in self._rings if base_asset(name) == base]
+
+    def add(self, symbol: str, size_usd: float, direction: str, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        long = direction == "long"
+        for ring in self._rings_for(symbol):
+            ring.add(now, long, size_usd)
+
+    def add_many(self, symbols: Iterable[str], sizes: Iterable[float], directions: Iterable[str],
+                 now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        for symbol, size_usd, direction in zip(symbols, sizes, directions):
+            long = direction == "long"
+            for ring in self._rings_for(symbol):
+                ring.add(now, long, size_usd)
+
+    def stats(self, window: str, symbol: str | None = None, now: float | None = None) -> Dict[str, float]:
+        """Counts, USD volume and long ratio for ``symbol`` (see :meth:`matching`; all symbols if None)."""
+        now = time.time() if now is None else now
+        index = list(self.windows).index(window)
+        out = [0, 0, 0.0, 0.0]
+        symbols = self.matching(symbol) if symbol is not None else self._rings
+        for name in symbols:
+            rings = self._rings.get(name)
+            if rings is not None:
+                rings[index].totals(now, out)
+        total = out[2] + out[3]
+        return {
+            "long_count": int(out[0]),
+            "short_count": int(out[1]),
+            "long_usd": out[2],
+            "short_usd": out[3],
+            "long_ratio": out[2] / total if total else 0.5,
+        }
+
+    def long_ratio(self, window: str, symbol: str | None = None, now: float | None = None) -> float:
+        return self.stats(window, symbol, now)["long_ratio"]
+
+
+# Fed by every SignalAggregator, read by analytics and the Telegram bot
+whale_flow = WhaleFlow()
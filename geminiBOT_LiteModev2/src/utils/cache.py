@@ -1,4 +1,6 @@
 import asyncio
+import time
+from collections import OrderedDict
 from typing import Any, Dict
 
 class InMemoryCache:
@@ -23,4 +25,37 @@ class InMemoryCache:
                 return None
             return self.store.get(key)
 
+
+class LRUCache:
+    """Bounded, synchronous LRU map whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires, value = entry
+        if self.ttl and expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
 cache = InMemoryCache()
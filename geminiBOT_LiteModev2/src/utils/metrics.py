@@ -1,11 +1,33 @@
 class Metrics:
     def __init__(self):
         self.counters = {}
+        self.gauges = {}
+        self.timings = {}
 
-    def inc(self, name: str):
-        self.counters[name] = self.counters.get(name, 0) + 1
+    def inc(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
 
     def get(self, name: str):
         return self.counters.get(name, 0)
 
+    def set(self, name: str, value: float):
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float):
+        """Record a sample (usually seconds) for ``name``."""
+        stats = self.timings.get(name)
+        if stats is None:
+            stats = self.timings[name] = {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0}
+        stats["count"] += 1
+        stats["sum"] += value
+        stats["last"] = value
+        if value > stats["max"]:
+            stats["max"] = value
+
+    def summary(self, name: str) -> dict:
+        stats = self.timings.get(name)
+        if not stats:
+            return {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0, "avg": 0.0}
+        return {**stats, "avg": stats["sum"] / stats["count"]}
+
 metrics = Metrics()
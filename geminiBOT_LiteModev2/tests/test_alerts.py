@@ -22,10 +22,12 @@ def patch_heavy_modules(monkeypatch):
 
 class DummyDB:
     async def fetchrow(self, query, wallet):
-        return {"label": "Test"}
+        raise AssertionError("alert path must be served from the wallet cache")
 
 dummy_db = DummyDB()
 
+WALLET = "0x" + "ab" * 20
+
 class DummyTG:
     def __init__(self):
         self.messages = []
@@ -35,34 +37,35 @@ class DummyTG:
 @pytest.mark.asyncio
 async def test_tracked_wallet_alert(monkeypatch, patch_heavy_modules):
     from onchain.enhanced_whale_watcher import EnhancedWhaleWatcher
+    from onchain.wallet_registry import WalletRegistry, TrackedWallet
     tg = DummyTG()
     monkeypatch.setattr(
         "onchain.whale_watcher.WhaleWatcher.__init__",
         lambda self, tg_bot: setattr(self, "tg_bot", tg_bot)
     )
     watcher = EnhancedWhaleWatcher(tg)
-    monkeypatch.setattr("onchain.enhanced_whale_watcher.db", dummy_db)
+    watcher.wallets = WalletRegistry(dummy_db)
+    watcher.wallets.upsert(WALLET, TrackedWallet(label="Test"))
     trade_data = {"direction": "long", "size_usd": 15000}
-    await watcher._send_tracked_wallet_alert("0xabc", trade_data, "GMX")
+    await watcher._send_tracked_wallet_alert(watcher.wallets.get(WALLET), trade_data, "GMX")
     assert tg.messages == ["Tracked Wallet Test long $15,000 on GMX"]
 
 
 @pytest.mark.asyncio
 async def test_alert_respects_settings(monkeypatch, patch_heavy_modules):
     from onchain.enhanced_whale_watcher import EnhancedWhaleWatcher
+    from onchain.wallet_registry import WalletRegistry, TrackedWallet
     tg = DummyTG()
     monkeypatch.setattr(
         "onchain.whale_watcher.WhaleWatcher.__init__",
         lambda self, tg_bot: setattr(self, "tg_bot", tg_bot),
     )
     watcher = EnhancedWhaleWatcher(tg)
-    monkeypatch.setattr("onchain.enhanced_whale_watcher.db", dummy_db)
-    watcher.wallet_alerts["0xabc"] = {
-        "direction": "long",
-        "interval": 10,
-        "last_sent": -100,
-        "min_size": 10000,
-    }
+    watcher.wallets = WalletRegistry(dummy_db)
+    watcher.wallets.upsert(
+        WALLET,
+        TrackedWallet(label="Test", direction="long", interval=10, last_sent=-100, min_size=10000),
+    )
     class FakeLoop:
         def __init__(self):
             self.t = 0
@@ -72,13 +75,14 @@ async def test_alert_respects_settings(monkeypatch, patch_heavy_modules):
     loop = FakeLoop()
     monkeypatch.setattr(asyncio, "get_event_loop", lambda: loop)
     trade_data = {"direction": "long", "size_usd": 15000}
-    await watcher._send_tracked_wallet_alert("0xabc", trade_data, "GMX")
+    record = watcher.wallets.get(WALLET)
+    await watcher._send_tracked_wallet_alert(record, trade_data, "GMX")
     assert tg.messages == ["Tracked Wallet Test long $15,000 on GMX"]
     loop.t = 5
-    await watcher._send_tracked_wallet_alert("0xabc", trade_data, "GMX")
+    await watcher._send_tracked_wallet_alert(record, trade_data, "GMX")
     assert len(tg.messages) == 1  # interval not passed
     loop.t = 15
-    await watcher._send_tracked_wallet_alert("0xabc", trade_data, "GMX")
+    await watcher._send_tracked_wallet_alert(record, trade_data, "GMX")
     assert len(tg.messages) == 2
 
 # Remove stub modules so other tests can import the real implementations
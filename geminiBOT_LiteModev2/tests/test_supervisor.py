@@ -77,3 +77,15 @@ async def test_backoff_resets_after_success(monkeypatch):
         await run_with_retry(task, base_delay=1, max_delay=4, reset_time=5)
 
     assert sleeps == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_finished_task_is_not_restarted():
+    calls = 0
+
+    async def task():
+        nonlocal calls
+        calls += 1
+
+    await asyncio.wait_for(run_with_retry(task), 1)
+    assert calls == 1
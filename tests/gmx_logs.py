@@ -0,0 +1,29 @@
+"""Encoded GMX vault logs shared by the decoder, ledger and watcher tests."""
+from eth_abi import encode
+from hexbytes import HexBytes
+
+ACCOUNT = '0x' + 'ab' * 20
+COLLATERAL = '0x' + 'cd' * 20
+INDEX = '0x' + 'ef' * 20
+
+
+def _topic(addr):
+    return HexBytes(b'\x00' * 12 + bytes.fromhex(addr[2:]))
+
+
+def make_log(layout, values, log_index=0):
+    types = [f[2] for f in layout.fields]
+    return {
+        'address': '0x' + '11' * 20,
+        'topics': [HexBytes(layout.topic), _topic(ACCOUNT), _topic(COLLATERAL), _topic(INDEX)],
+        'data': HexBytes(encode(types, values)),
+        'blockHash': HexBytes(b'\x01' * 32),
+        'blockNumber': 10,
+        'transactionHash': HexBytes(b'\x02' * 32),
+        'transactionIndex': 0,
+        'logIndex': log_index,
+    }
+
+
+INCREASE_VALUES = [50_000 * 10**30, 5_000 * 10**30, 3000 * 10**30, 7, 11, 3010 * 10**30, False, 25 * 10**30]
+DECREASE_VALUES = [20_000 * 10**30, 0, 3000 * 10**30, 7, 11, 2900 * 10**30, 10 * 10**30, -1234 * 10**30, True, 99]
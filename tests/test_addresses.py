@@ -0,0 +1,38 @@
+import os
+import sys
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain import addresses
+
+RAW = bytes.fromhex('52908400098527886e0f7030069857d2e4169ee7')
+
+
+def test_checksum_matches_web3_for_any_input_form():
+    expected = Web3.to_checksum_address('0x' + RAW.hex())
+    assert addresses.checksum(RAW) == expected
+    assert addresses.checksum('0x' + RAW.hex().upper()) == expected
+    assert addresses.lower(expected) == '0x' + RAW.hex()
+
+
+def test_log_account_reads_topic_once(monkeypatch):
+    calls = []
+    real = Web3.to_checksum_address
+    monkeypatch.setattr(addresses.Web3, 'to_checksum_address', lambda v: calls.append(v) or real(v))
+    addresses._checksums.clear()
+    log = {'topics': [HexBytes(b'\x00' * 32), HexBytes(b'\x00' * 12 + RAW)]}
+
+    assert addresses.log_account(log) == (RAW, real(RAW))
+    assert addresses.log_account({'topics': [None, '0x' + '00' * 12 + RAW.hex()]})[0] == RAW
+    assert len(calls) == 1
+
+
+def test_checksum_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(addresses, 'ADDRESS_CACHE_SIZE', 4)
+    addresses._checksums.clear()
+    for i in range(10):
+        addresses.checksum(i.to_bytes(20, 'big'))
+    assert list(addresses._checksums) == [i.to_bytes(20, 'big') for i in range(6, 10)]
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain.backfill import BlockCheckpoint, LogBackfiller
+
+
+class FakeEth:
+    """One log per block; ranges wider than ``max_results`` are rejected."""
+
+    def __init__(self, max_results=None):
+        self.max_results = max_results
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get_logs(self, params):
+        start, end = params['fromBlock'], params['toBlock']
+        self.calls.append((start, end))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            # later ranges finish first to exercise ordered delivery
+            await asyncio.sleep(0.001 * (10 - start % 10))
+            if self.max_results and end - start + 1 > self.max_results:
+                raise ValueError({'code': -32005, 'message': 'query returned more than 10000 results'})
+            return [{'blockNumber': b, 'logIndex': 0} for b in range(start, end + 1)]
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_backfill_delivers_in_block_order_with_bounded_concurrency():
+    eth = FakeEth()
+    backfiller = LogBackfiller(SimpleNamespace(eth=eth), chunk_size=5, concurrency=3)
+    seen, checkpoints = [], []
+
+    async def handler(log):
+        seen.append(log['blockNumber'])
+
+    async def on_chunk(block):
+        checkpoints.append(block)
+
+    total = await backfiller.run({'address': '0x1'}, 1, 40, handler, on_chunk)
+
+    assert total == 40
+    assert seen == list(range(1, 41))
+    assert checkpoints == sorted(checkpoints) and checkpoints[-1] == 40
+    assert eth.peak <= 3
+
+
+@pytest.mark.asyncio
+async def test_backfill_splits_and_shrinks_on_too_many_results():
+    eth = FakeEth(max_results=4)
+    backfiller = LogBackfiller(SimpleNamespace(eth=eth), chunk_size=16, concurrency=2)
+    seen = []
+
+    async def handler(log):
+        seen.append(log['blockNumber'])
+
+    await backfiller.run({}, 0, 63, handler)
+
+    assert seen == list(range(64))
+    assert backfiller.chunk_size <= 8
+
+
+@pytest.mark.asyncio
+async def test_backfill_propagates_other_errors():
+    eth = SimpleNamespace(get_logs=AsyncMock(side_effect=RuntimeError('connection reset')))
+    backfiller = LogBackfiller(SimpleNamespace(eth=eth), chunk_size=10)
+    with pytest.raises(RuntimeError):
+        await backfiller.run({}, 0, 100, AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_only_saves_forward_progress():
+    db = SimpleNamespace(fetchval=AsyncMock(return_value=10), execute=AsyncMock())
+    checkpoint = BlockCheckpoint(db, 'gmx_vault')
+    assert await checkpoint.load() == 10
+    await checkpoint.save()
+    db.execute.assert_not_awaited()
+    checkpoint.update(8)
+    await checkpoint.save()
+    db.execute.assert_not_awaited()
+    checkpoint.update(12)
+    await checkpoint.save()
+    assert db.execute.await_args.args[1:] == ('gmx_vault', 12)
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from components import COMPONENTS, ComponentSpec, enabled_components
+from main import TradingSystem
+
+
+class Bot:
+    pass
+
+
+class Needy:
+    def __init__(self, bot, flag=None):
+        self.bot = bot
+        self.flag = flag
+
+
+@pytest.fixture
+def fake_module(monkeypatch):
+    module = types.ModuleType('fake_components')
+    module.Bot = Bot
+    module.Needy = Needy
+    monkeypatch.setitem(sys.modules, 'fake_components', module)
+    return module
+
+
+def test_registry_is_well_formed():
+    for spec in COMPONENTS:
+        module, _, attr = spec.target.partition(':')
+        assert module and attr, spec.name
+    names = [spec.name for spec in COMPONENTS]
+    assert len(names) == len(set(names))
+    # Dependencies are built before their dependents
+    for spec in COMPONENTS:
+        assert all(names.index(n) < names.index(spec.name) for n in spec.needs)
+
+
+def test_flags_and_disabled_names_filter_the_registry():
+    registry = [ComponentSpec('a', 'x:A'), ComponentSpec('b', 'x:B', enabled=False), ComponentSpec('c', 'x:C')]
+    assert [s.name for s in enabled_components(registry, set())] == ['a', 'c']
+    assert [s.name for s in enabled_components(registry, {'c'})] == ['a']
+
+
+@pytest.mark.asyncio
+async def test_components_are_built_with_their_dependencies(fake_module):
+    registry = [
+        ComponentSpec('bot', 'fake_components:Bot'),
+        ComponentSpec('needy', 'fake_components:Needy', needs=('bot',), kwargs={'flag': 1}),
+    ]
+    system = TradingSystem(registry, disabled=set())
+    await system.initialize_components()
+    bot, needy = system.components
+    assert needy.bot is bot and needy.flag == 1
+    assert system.by_name == {'bot': bot, 'needy': needy}
+
+
+@pytest.mark.asyncio
+async def test_dependents_of_disabled_components_are_skipped(fake_module):
+    registry = [
+        ComponentSpec('bot', 'fake_components:Bot'),
+        ComponentSpec('needy', 'fake_components:Needy', needs=('bot',)),
+    ]
+    system = TradingSystem(registry, disabled={'bot'})
+    await system.initialize_components()
+    assert system.components == []
+
+
+@pytest.mark.asyncio
+async def test_disabled_component_modules_are_never_imported(fake_module):
+    registry = [ComponentSpec('bot', 'fake_components:Bot'), ComponentSpec('gone', 'not_a_real_module:X')]
+    system = TradingSystem(registry, disabled={'gone'})
+    await system.initialize_components()
+    assert 'not_a_real_module' not in sys.modules
+
+
+@pytest.mark.asyncio
+async def test_early_components_run_while_later_ones_build(fake_module):
+    events = []
+
+    class Early:
+        async def run(self):
+            events.append('early running')
+            await asyncio.Event().wait()
+
+    def late():
+        events.append('late built')
+        return types.SimpleNamespace()
+
+    fake_module.Early = Early
+    fake_module.late = late
+    registry = [ComponentSpec('early', 'fake_components:Early'), ComponentSpec('late', 'fake_components:late')]
+    system = TradingSystem(registry, disabled=set())
+    tasks = []
+    tg = types.SimpleNamespace(create_task=lambda coro: tasks.append(asyncio.create_task(coro)))
+    await system.initialize_components(tg)
+    for task in tasks:
+        task.cancel()
+    assert events == ['early running', 'late built']
@@ -0,0 +1,184 @@
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain.confirmations import ConfirmationBuffer
+from onchain.position_ledger import PositionLedger
+from utils.metrics import metrics
+
+
+def log(block, index=0, tx=None, removed=False):
+    return {'blockNumber': block, 'logIndex': index, 'transactionHash': tx or f'tx{block}-{index}',
+            'removed': removed}
+
+
+def blocks(ready):
+    return [(entry[0]['blockNumber'], entry[0]['logIndex']) for entry in ready]
+
+
+def test_logs_are_released_after_n_confirmations_in_order():
+    buf = ConfirmationBuffer(2)
+    assert buf.add(log(100, 1)) == []
+    assert buf.add(log(100, 0)) == []
+    assert buf.add(log(101)) == []
+    assert len(buf) == 3
+
+    ready = buf.add(log(102))
+    assert blocks(ready) == [(100, 0), (100, 1)]
+    assert blocks(buf.advance(105)) == [(101, 0), (102, 0)]
+    assert len(buf) == 0
+    assert buf.promoted_through == 103
+
+
+def test_zero_confirmations_and_late_logs_pass_straight_through():
+    buf = ConfirmationBuffer(0)
+    assert blocks(buf.add(log(7))) == [(7, 0)]
+
+    buf = ConfirmationBuffer(3)
+    buf.advance(50)
+    assert blocks(buf.add(log(40))) == [(40, 0)]
+
+
+def test_removed_logs_are_dropped_before_promotion():
+    buf = ConfirmationBuffer(2)
+    buf.add(log(10, 0))
+    buf.add(log(10, 1))
+    assert buf.remove(log(10, 0, removed=True))
+    assert not buf.remove(log(10, 0, removed=True))
+    assert blocks(buf.advance(12)) == [(10, 1)]
+    # already promoted logs are not held any more
+    assert not buf.remove(log(10, 1, removed=True))
+
+
+def test_head_jump_past_the_ring_releases_every_held_block():
+    buf = ConfirmationBuffer(2, slots=8)
+    buf.add(log(100))
+    buf.add(log(101))
+    assert blocks(buf.advance(300)) == [(100, 0), (101, 0)]
+    assert len(buf) == 0
+    assert buf.promoted_through == 298
+
+
+def test_slot_held_by_another_block_is_released_not_overwritten():
+    buf = ConfirmationBuffer(2, slots=8)
+    # Not reachable through add/advance; guards against a slot being clobbered
+    buf._slots[0] = [112, {('tx', 0): (log(112), 0.0)}]
+    buf.pending = 1
+    ready = buf.add(log(104))
+    assert blocks(ready) == [(112, 0)]
+    assert len(buf) == 1
+    assert blocks(buf.advance(106)) == [(104, 0)]
+
+
+def test_buffer_stays_bounded_and_records_latency():
+    before = metrics.summary('confirmation_promotion_latency')['count']
+    buf = ConfirmationBuffer(1000, max_logs=5, slots=8)
+    released = []
+    for block in range(20):
+        released += buf.add(log(block))
+    assert len(buf) == 5
+    assert blocks(released) == [(b, 0) for b in range(15)]
+    assert len(buf._slots) == 1001
+    assert metrics.summary('confirmation_promotion_latency')['count'] - before == 15
+
+
+def _make_watcher(monkeypatch, mode, confirmations):
+    from onchain import whale_watcher as ww
+    monkeypatch.setattr(ww.WhaleWatcher, '__init__', lambda self, tg_bot=None: None)
+    watcher = ww.WhaleWatcher(None)
+    watcher.confirmation_mode = mode
+    watcher.confirmations = ConfirmationBuffer(confirmations)
+    watcher.checkpoint = ww.BlockCheckpoint(SimpleNamespace(), 'gmx_vault')
+    watcher.ledger = PositionLedger()
+    watcher._last_block = None
+    watcher._recent = ww.RecentLogs(16)
+    watcher.handle_log = AsyncMock()
+    watcher._record_latency = MagicMock()
+    return watcher
+
+
+@pytest.mark.asyncio
+async def test_durable_mode_processes_after_confirmations_and_drops_reorged(monkeypatch):
+    watcher = _make_watcher(monkeypatch, 'durable', 2)
+
+    await watcher._dispatch(log(100, 0), 'subscribe')
+    await watcher._dispatch(log(100, 1), 'subscribe')
+    await watcher._dispatch(log(100, 1, removed=True), 'subscribe')
+    watcher.handle_log.assert_not_awaited()
+
+    await watcher._dispatch(log(102), 'subscribe')
+    assert [c.args[0]['logIndex'] for c in watcher.handle_log.await_args_list] == [0]
+    assert watcher.checkpoint.block == 100
+
+    # the removed log may come back in a re-mined block
+    await watcher._dispatch(log(101, 1, tx='tx100-1'), 'subscribe')
+    await watcher._promote(watcher.confirmations.advance(103))
+    assert watcher.handle_log.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_fast_mode_rolls_back_processed_log(monkeypatch):
+    watcher = _make_watcher(monkeypatch, 'fast', 2)
+    watcher._rollback = AsyncMock()
+
+    first = log(100)
+    await watcher._dispatch(first, 'subscribe')
+    watcher.handle_log.assert_awaited_once_with(first)
+
+    await watcher._dispatch({**first, 'removed': True}, 'subscribe')
+    watcher._rollback.assert_awaited_once()
+    assert len(watcher.confirmations) == 0
+
+
+@pytest.mark.asyncio
+async def test_rollback_reverts_ledger_and_pending_row(monkeypatch):
+    from gmx_logs import make_log, INCREASE_VALUES, ACCOUNT
+    from database.trade_writer import TradeBatchWriter
+    import onchain.gmx_decoder as gd
+
+    watcher = _make_watcher(monkeypatch, 'fast', 2)
+    watcher.alerts_enabled = True
+    watcher.tg_bot = SimpleNamespace(send_alert=AsyncMock())
+    watcher.db = SimpleNamespace(execute=AsyncMock())
+    watcher.trade_writer = TradeBatchWriter(watcher.db)
+
+    opened = make_log(gd.INCREASE_POSITION, INCREASE_VALUES)
+    data = watcher.decode_increase_position(opened)
+    watcher.ledger.increase(ACCOUNT, data)
+    watcher.trade_writer.add_trade(ACCOUNT, 'GMX', 'open', data)
+
+    await watcher._rollback({**opened, 'removed': True})
+
+    assert watcher.ledger.open_interest(ACCOUNT) == 0
+    assert watcher.trade_writer.pending == 0
+    watcher.db.execute.assert_not_awaited()
+    watcher.tg_bot.send_alert.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_rollback_only_removes_the_reorged_log_of_a_transaction(monkeypatch):
+    from gmx_logs import make_log, INCREASE_VALUES, ACCOUNT
+    from database.trade_writer import TradeBatchWriter
+    import onchain.gmx_decoder as gd
+
+    watcher = _make_watcher(monkeypatch, 'fast', 2)
+    watcher.alerts_enabled = False
+    watcher.db = SimpleNamespace(execute=AsyncMock())
+    watcher.trade_writer = TradeBatchWriter(watcher.db)
+    first, second = (make_log(gd.INCREASE_POSITION, INCREASE_VALUES, log_index=i) for i in (3, 4))
+    for log in (first, second):
+        watcher.trade_writer.add_trade(ACCOUNT, 'GMX', 'open', watcher.decode_increase_position(log))
+
+    await watcher._rollback({**second, 'removed': True})
+    assert [row[-2] for row in watcher.trade_writer._trades] == [3]
+
+    # Once flushed, the row is deleted by (tx_hash, log_index)
+    watcher.trade_writer._trades.clear()
+    await watcher._rollback({**first, 'removed': True})
+    watcher.db.execute.assert_awaited_once()
+    assert watcher.db.execute.await_args.args[1:] == (first['transactionHash'].hex(), 3)
@@ -77,3 +77,32 @@ async def test_query_methods(monkeypatch):
     result = await dbm.execute('DELETE 1')
     conn.execute.assert_awaited_once_with('DELETE 1')
     assert result == 'OK'
+
+
+@pytest.mark.asyncio
+async def test_stream_reads_through_cursor_in_transaction():
+    events = []
+
+    class CursorConn:
+        @asynccontextmanager
+        async def transaction(self):
+            events.append('begin')
+            yield
+            events.append('commit')
+
+        def cursor(self, query, *args, prefetch):
+            events.append(('cursor', query, args, prefetch))
+
+            async def rows():
+                for i in range(3):
+                    yield {'id': i}
+            return rows()
+
+    dbm = DBManager()
+    dbm.pool = DummyPool(CursorConn())
+    dbm.connect = AsyncMock()
+
+    rows = [row async for row in dbm.stream('SELECT id FROM t WHERE x=$1', 5, prefetch=2)]
+
+    assert rows == [{'id': 0}, {'id': 1}, {'id': 2}]
+    assert events == ['begin', ('cursor', 'SELECT id FROM t WHERE x=$1', (5,), 2), 'commit']
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from event_bus import (
+    EventBus, BLOCK, COALESCE, WHALE_TRADES, NEWS_ITEMS, SIGNALS, NewsItem, Signal, WhaleTrades,
+)
+from signal_generation.signal_aggregator import SignalAggregator
+from signal_generation.whale_flow import WhaleFlow
+from utils.metrics import metrics
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_keeps_newest_and_exports_depth():
+    bus = EventBus()
+    slow = bus.subscribe(NEWS_ITEMS, 'slow', maxsize=2)
+    fast = bus.subscribe(NEWS_ITEMS, 'fast', maxsize=10)
+    dropped = metrics.get('bus_dropped_news_items')
+    for title in 'abc':
+        await bus.publish(NEWS_ITEMS, NewsItem(title))
+
+    assert [i.title for i in slow.drain()] == ['b', 'c']
+    assert [i.title for i in fast.drain()] == ['a', 'b', 'c']
+    assert metrics.get('bus_dropped_news_items') == dropped + 1
+    assert metrics.gauges['bus_depth_news_items'] == 5
+    assert metrics.gauges['bus_depth_news_items_slow'] == 0
+
+
+@pytest.mark.asyncio
+async def test_coalesce_merges_without_touching_other_queues():
+    bus = EventBus()
+    merged = bus.subscribe(WHALE_TRADES, 'merged', maxsize=1, policy=COALESCE)
+    plain = bus.subscribe(WHALE_TRADES, 'plain')
+    await bus.publish(WHALE_TRADES, WhaleTrades.one('gmx', 'BTC-USD', 10.0, 'long'))
+    await bus.publish(WHALE_TRADES, WhaleTrades.one('hyperliquid', 'ETH-USD', 5.0, 'short'))
+
+    batch = merged.get_nowait()
+    assert (batch.source, batch.symbols, batch.sizes) == ('mixed', ['BTC-USD', 'ETH-USD'], [10.0, 5.0])
+    assert [len(b) for b in plain.drain()] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_block_waits_for_the_consumer():
+    bus = EventBus()
+    sub = bus.subscribe(SIGNALS, 'strict', maxsize=1, policy=BLOCK)
+    await bus.publish(SIGNALS, Signal('BTC', 'x', 1))
+    second = asyncio.create_task(bus.publish(SIGNALS, Signal('BTC', 'x', 2)))
+    await asyncio.sleep(0)
+    assert not second.done()
+    assert (await sub.get()).value == 1
+    await second
+    assert (await sub.get()).value == 2
+
+
+@pytest.mark.asyncio
+async def test_publish_checks_event_type_and_subscribe_is_idempotent():
+    bus = EventBus()
+    with pytest.raises(TypeError):
+        await bus.publish(SIGNALS, NewsItem('wrong topic'))
+    assert bus.subscribe(SIGNALS, 'a') is bus.subscribe(SIGNALS, 'a', maxsize=5)
+    assert bus.subscribers(SIGNALS) == ('a',)
+    with pytest.raises(ValueError):
+        bus.subscribe(NEWS_ITEMS, 'b', policy='lossless')
+
+
+@pytest.mark.asyncio
+async def test_aggregator_tallies_trades_from_the_bus():
+    bus = EventBus()
+    aggregator = SignalAggregator(bus=bus, flow=WhaleFlow())
+    task = asyncio.create_task(aggregator._whale_trade_loop())
+    await asyncio.sleep(0)
+    await bus.publish(WHALE_TRADES, WhaleTrades('hyperliquid', ['BTC-USD', 'BTC-USD'], [1.0, 2.0], ['long', 'short']))
+    await bus.publish(WHALE_TRADES, WhaleTrades.one('gmx', 'ETH-USD', 3.0, 'long'))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    task.cancel()
+    assert aggregator.trade_tally == {'BTC-USD': {'long': 1, 'short': 1}, 'ETH-USD': {'long': 1, 'short': 0}}
+
+
+@pytest.mark.asyncio
+async def test_coalesce_copies_once_and_caps_the_merged_batch():
+    bus = EventBus()
+    merged = bus.subscribe(WHALE_TRADES, 'merged', maxsize=1, policy=COALESCE, merge_limit=3)
+    first = WhaleTrades.one('gmx', 'BTC-USD', 1.0, 'long')
+    await bus.publish(WHALE_TRADES, first)
+    for size in (2.0, 3.0, 4.0):
+        await bus.publish(WHALE_TRADES, WhaleTrades.one('gmx', 'ETH-USD', size, 'short'))
+
+    batch = merged.get_nowait()
+    assert batch is not first and len(first) == 1
+    assert batch.sizes == [1.0, 2.0, 3.0]
+    assert merged.dropped == 1
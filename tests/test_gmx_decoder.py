@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+from hexbytes import HexBytes
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain import gmx_decoder as gd
+from gmx_logs import make_log, INCREASE_VALUES, DECREASE_VALUES
+
+@pytest.mark.parametrize('layout,values,slow', [
+    (gd.INCREASE_POSITION, INCREASE_VALUES, 'decode_position_open'),
+    (gd.DECREASE_POSITION, DECREASE_VALUES, 'decode_position_close'),
+])
+def test_decode_log_matches_process_log(layout, values, slow):
+    log = make_log(layout, values)
+    fast = gd.decode_log(log)
+    reference = getattr(gd.GMXDecoder(), slow)(log)['args']
+    assert fast['event'] == layout.name
+    for name, value in reference.items():
+        expected = value.lower() if isinstance(value, str) else value
+        assert fast[name] == expected
+
+
+def test_decode_log_accepts_hex_strings_and_rejects_short_payloads():
+    log = make_log(gd.INCREASE_POSITION, INCREASE_VALUES)
+    as_str = dict(log, data='0x' + bytes(log['data']).hex(), topics=['0x' + bytes(t).hex() for t in log['topics']])
+    assert gd.decode_log(as_str)['sizeDelta'] == INCREASE_VALUES[0]
+    assert gd.decode_log(dict(log, data=log['data'][:64])) is None
+    assert gd.decode_log(dict(log, topics=[HexBytes(b'\x00' * 32)] + log['topics'][1:])) is None
+
+
+def test_decode_batch_is_columnar():
+    logs = [
+        make_log(gd.INCREASE_POSITION, INCREASE_VALUES, 0),
+        make_log(gd.DECREASE_POSITION, DECREASE_VALUES, 1),
+    ]
+    cols = gd.decode_batch(logs)
+    assert cols['event'] == ['IncreasePosition', 'DecreasePosition']
+    assert cols['log_index'] == [0, 1]
+    assert cols['realisedPnl'] == [None, -1234 * 10**30]
+    assert cols['isLong'] == [False, True]
+    assert all(len(v) == 2 for v in cols.values())
+
+
+def test_whale_watcher_uses_decoded_direction_and_leverage(monkeypatch):
+    from onchain import whale_watcher as ww
+    monkeypatch.setattr(ww.WhaleWatcher, '__init__', lambda self, tg_bot=None: None)
+    watcher = ww.WhaleWatcher(None)
+    data = watcher.decode_increase_position(make_log(gd.INCREASE_POSITION, INCREASE_VALUES))
+    assert data['direction'] == 'short'
+    assert data['size_usd'] == 50_000
+    assert data['leverage'] == 10
+    closed = watcher.decode_decrease_position(make_log(gd.DECREASE_POSITION, DECREASE_VALUES))
+    assert closed['pnl'] == -1234
+    assert closed['direction'] == 'long'
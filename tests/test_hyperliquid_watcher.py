@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 from types import SimpleNamespace
@@ -7,7 +8,9 @@ import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
 
-from onchain.hyperliquid_watcher import HyperliquidWatcher
+from event_bus import EventBus, WHALE_TRADES
+from onchain.hyperliquid_watcher import HyperliquidWatcher, RequestBudget
+from utils.metrics import metrics
 
 
 @pytest.mark.asyncio
@@ -29,9 +32,10 @@ async def test_trades_parsed_and_forwarded(monkeypatch):
         }
     ]
 
-    decoder = SimpleNamespace(fetch_recent_trades=AsyncMock(return_value=sample_trades))
-    aggregator = SimpleNamespace(process_whale_signal=AsyncMock())
-    watcher = HyperliquidWatcher(decoder=decoder, signal_aggregator=aggregator, poll_interval=0)
+    decoder = SimpleNamespace(fetch_trades_since=AsyncMock(return_value=sample_trades))
+    bus = EventBus()
+    trades = bus.subscribe(WHALE_TRADES, 'test')
+    watcher = HyperliquidWatcher(decoder=decoder, bus=bus, poll_interval=0)
 
     async def fake_sleep(_):
         raise KeyboardInterrupt
@@ -41,5 +45,132 @@ async def test_trades_parsed_and_forwarded(monkeypatch):
     with pytest.raises(KeyboardInterrupt):
         await watcher.run()
 
-    aggregator.process_whale_signal.assert_any_await('BTC-USD', 3000.0, 'long')
-    aggregator.process_whale_signal.assert_any_await('ETH-USD', 2000.0, 'short')
+    # one batch per cycle, in columns
+    batch = trades.get_nowait()
+    assert (batch.symbols, batch.sizes, batch.directions) == (
+        ['BTC-USD', 'ETH-USD'], [3000.0, 2000.0], ['long', 'short']
+    )
+    assert len(trades) == 0
+
+
+def _trade(tid, ts, symbol='BTC/USDC:USDC'):
+    return {'id': str(tid), 'timestamp': ts, 'symbol': symbol, 'side': 'buy',
+            'price': '100', 'amount': '1', 'info': {'hash': f'0x{tid}'}}
+
+
+class PagedDecoder:
+    """Serves trades at or after ``since`` (ms), ``limit`` at a time, like the API."""
+
+    def __init__(self, trades):
+        self.trades = trades
+        self.calls = []
+
+    async def fetch_trades_since(self, symbol, since, limit):
+        self.calls.append(since)
+        if since is None:
+            return self.trades[-limit:]
+        return [t for t in self.trades if t['timestamp'] >= since][:limit]
+
+
+@pytest.mark.asyncio
+async def test_poll_pages_until_caught_up_and_forwards_each_trade_once():
+    # a full page shares ts=1000, so the cursor has to step past it
+    trades = [_trade(i, 1000 if i < 3 else 1000 + i) for i in range(10)]
+    decoder = PagedDecoder(trades[:2])
+    watcher = HyperliquidWatcher(decoder=decoder, bus=EventBus(), page_size=3)
+
+    first = await watcher.poll_symbol('BTC/USDC:USDC')
+    assert [t['id'] for t in first] == ['0', '1']
+
+    decoder.trades = trades
+    second = await watcher.poll_symbol('BTC/USDC:USDC')
+    assert [t['id'] for t in second] == [str(i) for i in range(2, 10)]
+    assert watcher.cursors['BTC/USDC:USDC'] == 1009
+
+    # quiet market: one request, nothing forwarded again
+    decoder.calls.clear()
+    assert await watcher.poll_symbol('BTC/USDC:USDC') == []
+    assert decoder.calls == [1009]
+
+
+@pytest.mark.asyncio
+async def test_fetch_errors_keep_the_cursor():
+    decoder = SimpleNamespace(fetch_trades_since=AsyncMock(side_effect=RuntimeError('429')))
+    watcher = HyperliquidWatcher(decoder=decoder, bus=EventBus())
+    watcher.cursors['ETH/USDC:USDC'] = 5
+    assert await watcher.poll_symbol('ETH/USDC:USDC') == []
+    assert watcher.cursors['ETH/USDC:USDC'] == 5
+
+
+def test_seen_set_is_bounded():
+    watcher = HyperliquidWatcher(decoder=SimpleNamespace(), bus=EventBus(), page_size=2)
+    for i in range(200):
+        watcher._is_new('BTC', _trade(i, i))
+    assert len(watcher._seen) == 40
+
+
+@pytest.mark.asyncio
+async def test_cycle_polls_due_symbols_concurrently_and_batches():
+    in_flight = []
+    peak = 0
+
+    async def fetch(symbol, since, limit):
+        nonlocal peak
+        in_flight.append(symbol)
+        peak = max(peak, len(in_flight))
+        await asyncio.sleep(0)
+        in_flight.remove(symbol)
+        return [_trade(f'{symbol}-1', 1000, symbol)]
+
+    symbols = ['BTC/USDC:USDC', 'ETH/USDC:USDC', 'SOL/USDC:USDC']
+    bus = EventBus()
+    published = bus.subscribe(WHALE_TRADES, 'test')
+    watcher = HyperliquidWatcher(decoder=SimpleNamespace(fetch_trades_since=fetch),
+                                 bus=bus, symbols=symbols, requests_per_min=600)
+    before = metrics.get('hyperliquid_requests_eth_usdc_usdc')
+
+    assert await watcher.run_cycle() == 3
+    assert peak == 3
+    assert published.get_nowait().symbols == ['BTC-USDC:USDC', 'ETH-USDC:USDC', 'SOL-USDC:USDC']
+    assert metrics.get('hyperliquid_requests_eth_usdc_usdc') == before + 1
+    assert metrics.summary('hyperliquid_latency_sol_usdc_usdc')['count'] >= 1
+
+    # nothing is due again until its interval has passed
+    assert await watcher.run_cycle() == 0
+    assert len(published) == 0
+
+
+def test_interval_follows_trade_rate():
+    watcher = HyperliquidWatcher(decoder=SimpleNamespace(), bus=EventBus(),
+                                 poll_interval=30, min_interval=2, max_interval=300, target_trades=20)
+    watcher._adapt('HOT', 500, 0.0)
+    assert watcher.intervals['HOT'] == 30  # backlog on the first poll says nothing about rate
+    watcher._adapt('HOT', 300, 30.0)  # 10 trades/s
+    assert watcher.intervals['HOT'] == 2
+    watcher._adapt('DEAD', 0, 0.0)
+    watcher._adapt('DEAD', 0, 30.0)
+    assert watcher.intervals['DEAD'] == 300
+    assert watcher.next_poll['DEAD'] == 330.0
+
+    watcher._adapt('WARM', 0, 0.0)
+    watcher._adapt('WARM', 3, 30.0)  # 0.1 trades/s -> 200 s
+    assert watcher.intervals['WARM'] == pytest.approx(200)
+    watcher._adapt('WARM', 0, 230.0)  # a quiet poll only lengthens it gradually
+    assert 200 < watcher.intervals['WARM'] < 300
+
+
+@pytest.mark.asyncio
+async def test_request_budget_waits_when_empty(monkeypatch):
+    budget = RequestBudget(rate=2.0, burst=2)
+    waits = []
+
+    async def fake_sleep(seconds):
+        waits.append(seconds)
+        budget.tokens += seconds * budget.rate
+
+    monkeypatch.setattr('onchain.hyperliquid_watcher.asyncio.sleep', fake_sleep)
+    monkeypatch.setattr('onchain.hyperliquid_watcher.time.monotonic', lambda: 0.0)
+    budget._last = 0.0
+    for _ in range(3):
+        await budget.acquire()
+    assert waits == [pytest.approx(0.5)]
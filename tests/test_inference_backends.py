@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from ai_analysis import inference_backends as ib
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match='onnx'):
+        ib.load_backend('tensorrt', 'some/model', '/tmp')
+
+
+def test_backend_setting_picks_the_loader(monkeypatch):
+    calls = []
+    monkeypatch.setitem(ib.BACKENDS, 'int8', lambda name, cache: calls.append((name, cache)) or 'model')
+    assert ib.load_backend('int8', 'textattack/mobilebert-uncased-SST-2', '/cache') == 'model'
+    assert calls == [('textattack/mobilebert-uncased-SST-2', '/cache')]
+
+
+def test_artifacts_are_cached_per_model_and_backend():
+    path = ib._artifact_dir('/cache', 'textattack/mobilebert-uncased-SST-2', 'onnx')
+    assert str(path) == '/cache/textattack_mobilebert-uncased-SST-2-onnx'
@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from ai_analysis.inference_batcher import InferenceBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_batches():
+    batches = []
+
+    def predict(texts):
+        batches.append(list(texts))
+        return [t.upper() for t in texts]
+
+    batcher = InferenceBatcher(predict, max_batch=4, max_wait=0.05)
+    results = await asyncio.gather(*(batcher.submit(t) for t in 'abcdefghij'))
+    assert results == list('ABCDEFGHIJ')
+    assert [len(b) for b in batches] == [4, 4, 2]
+
+
+@pytest.mark.asyncio
+async def test_lone_request_waits_at_most_max_wait():
+    batcher = InferenceBatcher(lambda texts: [len(t) for t in texts], max_batch=8, max_wait=0.01)
+    start = time.perf_counter()
+    assert await batcher.submit('abc') == 3
+    assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller_and_worker_survives():
+    calls = []
+
+    def predict(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise RuntimeError('model crashed')
+        return texts
+
+    batcher = InferenceBatcher(predict, max_batch=2, max_wait=0.05)
+    results = await asyncio.gather(batcher.submit('a'), batcher.submit('b'), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await batcher.submit('c') == 'c'
+
+
+@pytest.mark.asyncio
+async def test_inference_does_not_block_the_loop():
+    def predict(texts):
+        time.sleep(0.2)
+        return texts
+
+    batcher = InferenceBatcher(predict, max_batch=1, max_wait=0)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await batcher.submit('x')
+    task.cancel()
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_concurrency_keeps_several_batches_in_flight():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def predict(texts):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return texts
+
+    batcher = InferenceBatcher(predict, max_batch=2, max_wait=0, concurrency=3)
+    results = await asyncio.gather(*(batcher.submit(str(i)) for i in range(6)))
+    assert results == [str(i) for i in range(6)]
+    assert peak == 3
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+from hexbytes import HexBytes
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain.log_capture import LogCapture, read_logs, write_logs
+
+
+def raw_log(i):
+    return {
+        'address': '0x' + '11' * 20,
+        'topics': [HexBytes(bytes([i]) * 32), HexBytes(b'\x00' * 12 + b'\xab' * 20)],
+        'data': HexBytes(bytes(range(64))),
+        'blockNumber': 1000 + i,
+        'blockHash': HexBytes(b'\x01' * 32),
+        'transactionHash': HexBytes(bytes([i + 1]) * 32),
+        'logIndex': i,
+        'removed': False,
+    }
+
+
+@pytest.mark.parametrize('name', ['logs.jsonl', 'logs.bin'])
+def test_capture_round_trips_in_both_formats(tmp_path, name):
+    path = str(tmp_path / name)
+    logs = [raw_log(i) for i in range(3)]
+    assert write_logs(path, logs) == 3
+
+    replayed = list(read_logs(path))
+
+    assert replayed == logs
+    assert isinstance(replayed[0]['topics'][0], HexBytes)
+    assert replayed[1]['transactionHash'].hex() == logs[1]['transactionHash'].hex()
+
+
+def test_binary_capture_is_smaller_than_jsonl(tmp_path):
+    logs = [raw_log(i) for i in range(50)]
+    write_logs(str(tmp_path / 'a.jsonl'), logs)
+    write_logs(str(tmp_path / 'a.bin'), logs)
+    assert (tmp_path / 'a.bin').stat().st_size * 2 < (tmp_path / 'a.jsonl').stat().st_size
+
+
+def test_rejects_foreign_binary_file(tmp_path):
+    path = tmp_path / 'junk.bin'
+    path.write_bytes(b'not a capture')
+    with pytest.raises(ValueError):
+        list(read_logs(str(path)))
+
+
+def test_live_capture_appends_jsonl(tmp_path):
+    path = str(tmp_path / 'live.jsonl')
+    capture = LogCapture(path)
+    capture.write(raw_log(0))
+    capture.write(raw_log(1))
+    capture.close()
+    assert [log['logIndex'] for log in read_logs(path)] == [0, 1]
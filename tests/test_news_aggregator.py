@@ -1,5 +1,7 @@
+import asyncio
 import os
 import sys
+import time
 from types import SimpleNamespace
 from unittest.mock import AsyncMock
 import types
@@ -15,36 +17,292 @@ sys.modules['aioredis'] = types.SimpleNamespace(
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
 
 from data_ingestion import news_aggregator as na
+from event_bus import EventBus, NEWS_ITEMS, NewsItem
+
+
+class FakeRedis:
+    """Just the sorted-set, stream and string commands the aggregator uses."""
+
+    def __init__(self):
+        self.zsets = {}
+        self.streams = {}
+        self.strings = {}
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipe:
+            def __init__(self):
+                self.calls = []
+
+            def __getattr__(self, name):
+                return lambda *a, **k: self.calls.append((name, a, k))
+
+            async def execute(self):
+                redis.round_trips += 1
+                return [getattr(redis, '_' + name)(*a, **k) for name, a, k in self.calls]
+        return Pipe()
+
+    def _zadd(self, key, mapping, nx=False):
+        zset = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            if nx and member in zset:
+                continue
+            added += member not in zset
+            zset[member] = score
+        return added
+
+    def _zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+    def _zremrangebyrank(self, key, start, stop):
+        zset = self.zsets.get(key, {})
+        ranked = sorted(zset, key=zset.get)
+        doomed = ranked[start:len(ranked) + stop + 1 if stop < 0 else stop + 1]
+        for member in doomed:
+            del zset[member]
+        return len(doomed)
+
+    def _xadd(self, key, fields, maxlen=None, approximate=True):
+        stream = self.streams.setdefault(key, [])
+        entry_id = f'{len(stream) + 1}-0'.encode()
+        stream.append((entry_id, {k.encode(): str(v).encode() for k, v in fields.items()}))
+        if maxlen:
+            del stream[:-maxlen]
+        return entry_id
+
+    async def xrange(self, key, min='-', max='+', count=None):
+        self.round_trips += 1
+        after = int(min[1:].split('-')[0]) if min.startswith('(') else 0
+        entries = [e for e in self.streams.get(key, []) if int(e[0].split(b'-')[0]) > after]
+        return entries[:count]
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value):
+        self.strings[key] = value.encode()
+
+
+def items(*titles):
+    return [NewsItem(t, 'feed', f'https://x/{t}', 1.0, na.item_hash(t, f'https://x/{t}')) for t in titles]
 
 
 @pytest.mark.asyncio
-async def test_update_news_sets_cache(monkeypatch):
-    aggregator = na.NewsAggregator()
-    set_mock = AsyncMock()
-    aggregator.redis = SimpleNamespace(set=set_mock)
-    monkeypatch.setattr(aggregator, 'fetch_all', AsyncMock(return_value='a\nb'))
+async def test_update_news_stores_and_publishes_only_new_items(monkeypatch):
+    bus = EventBus()
+    news = bus.subscribe(NEWS_ITEMS, 'test')
+    aggregator = na.NewsAggregator(bus=bus)
+    aggregator.redis = FakeRedis()
+    monkeypatch.setattr(aggregator, 'fetch_all', AsyncMock(return_value=items('a', 'b')))
     await aggregator.update_news()
-    set_mock.assert_awaited_once()
+    aggregator.fetch_all.return_value = items('b', 'c')
+    await aggregator.update_news()
+    published = news.drain()
+    assert [i.title for i in published] == ['a', 'b', 'c']
+    assert [i.id for i in published] == ['1-0', '2-0', '3-0']
+    assert len(aggregator.redis.streams[na.STREAM_KEY]) == 3
 
 
 @pytest.mark.asyncio
-async def test_fetch_all_collects_titles(monkeypatch):
-    entries1 = [SimpleNamespace(title='A'), SimpleNamespace(title='B')]
-    entries2 = [SimpleNamespace(title='C')]
+async def test_seen_filter_is_bounded_and_survives_restarts():
+    redis = FakeRedis()
+    first = na.NewsAggregator(seen_size=2)
+    first.redis = redis
+    new = await first.filter_new(items('a', 'b', 'c'))
+    assert len(new) == 3
+    await first.store(new)
+    assert len(redis.zsets[na.SEEN_KEY]) == 2
+    # A new process has an empty LRU; Redis still knows the recent hashes
+    second = na.NewsAggregator(seen_size=2)
+    second.redis = redis
+    new = await second.filter_new(items('c', 'd'))
+    assert [i.title for i in new] == ['d']
+    await second.store(new)
+    # Served from the LRU without a Redis round-trip
+    trips = redis.round_trips
+    assert await second.filter_new(items('d')) == []
+    assert redis.round_trips == trips
 
-    def fake_parse(url):
-        return SimpleNamespace(entries=entries1 if 'bbc' in url else entries2)
 
-    monkeypatch.setattr(na.feedparser, 'parse', fake_parse)
+@pytest.mark.asyncio
+async def test_items_that_fail_to_store_are_not_marked_seen(monkeypatch):
+    aggregator = na.NewsAggregator(bus=EventBus())
+    aggregator.redis = FakeRedis()
+    monkeypatch.setattr(aggregator, 'fetch_all', AsyncMock(return_value=items('a')))
+    monkeypatch.setattr(aggregator, 'store', AsyncMock(side_effect=ConnectionError('redis down')))
+    await aggregator.update_news()
+    assert na.SEEN_KEY not in aggregator.redis.zsets
+    assert [i.title for i in await aggregator.filter_new(items('a'))] == ['a']
+
+
+@pytest.mark.asyncio
+async def test_items_since_pages_through_the_stream():
     aggregator = na.NewsAggregator()
+    aggregator.redis = FakeRedis()
+    await aggregator.store(items('a', 'b', 'c'))
+    page, cursor = await aggregator.items_since('0', count=2)
+    assert [i.title for i in page] == ['a', 'b'] and cursor == '2-0'
+    assert page[0] == NewsItem('a', 'feed', 'https://x/a', 1.0, na.item_hash('a', 'https://x/a'), '1-0')
+    page, cursor = await aggregator.items_since(cursor)
+    assert [i.title for i in page] == ['c'] and cursor == '3-0'
+    assert await aggregator.items_since(cursor) == ([], '3-0')
+
+
+class FakeResponse:
+    def __init__(self, status, body=b'', headers=None, delay=0.0):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.delay = delay
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f'HTTP {self.status}')
+
+    async def read(self):
+        return self.body
+
+
+class FakeSession:
+    """Serves ``responses[url]``; a 304 whenever the request's ETag matches."""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append((url, dict(headers or {})))
+        response = self.responses[url]
+        if isinstance(response, Exception):
+            raise response
+        etag = response.headers.get('ETag')
+        if etag and (headers or {}).get('If-None-Match') == etag:
+            return FakeResponse(304, delay=response.delay)
+        return response
+
+    async def close(self):
+        pass
+
+
+def fake_parse(body, response_headers=None):
+    return SimpleNamespace(entries=[na.feedparser.FeedParserDict(title=t) for t in body.decode().split(',')])
+
+
+def titles(items):
+    return '\n'.join(item.title for item in items)
+
+
+def feeds(monkeypatch, **bodies):
+    monkeypatch.setattr(na.feedparser, 'parse', fake_parse)
+    monkeypatch.setattr(na.NewsAggregator, 'FEEDS', list(bodies))
+    return {url: FakeResponse(200, body.encode(), {'ETag': f'"{url}"'}) for url, body in bodies.items()}
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_collects_titles(monkeypatch):
+    responses = feeds(monkeypatch, bbc='A,B', coindesk='C')
+    aggregator = na.NewsAggregator(session=FakeSession(responses))
     data = await aggregator.fetch_all()
-    assert 'A' in data and 'C' in data
+    assert [(i.title, i.source) for i in data] == [('A', 'bbc'), ('B', 'bbc'), ('C', 'coindesk')]
+    assert data[0].hash == na.item_hash('A')
+
+
+@pytest.mark.asyncio
+async def test_unchanged_feeds_answer_304_and_skip_parsing(monkeypatch):
+    responses = feeds(monkeypatch, bbc='A,B')
+    parses = []
+    monkeypatch.setattr(na.feedparser, 'parse', lambda body, **kw: parses.append(body) or fake_parse(body))
+    session = FakeSession(responses)
+    aggregator = na.NewsAggregator(session=session)
+    assert titles(await aggregator.fetch_all()) == 'A\nB'
+    assert titles(await aggregator.fetch_all()) == 'A\nB'
+    assert len(parses) == 1
+    assert session.requests[1] == ('bbc', {'If-None-Match': '"bbc"'})
+
+
+@pytest.mark.asyncio
+async def test_feeds_are_fetched_concurrently(monkeypatch):
+    responses = feeds(monkeypatch, a='A', b='B', c='C')
+    for response in responses.values():
+        response.delay = 0.2
+    aggregator = na.NewsAggregator(session=FakeSession(responses))
+    start = time.perf_counter()
+    await aggregator.fetch_all()
+    assert time.perf_counter() - start < 0.4
+
+
+@pytest.mark.asyncio
+async def test_failing_feed_does_not_drop_the_others(monkeypatch):
+    responses = feeds(monkeypatch, good='A', bad='B')
+    responses['bad'] = asyncio.TimeoutError()
+    aggregator = na.NewsAggregator(session=FakeSession(responses))
+    assert titles(await aggregator.fetch_all()) == 'A'
 
 
 @pytest.mark.asyncio
-async def test_alert_cached_news_sends(monkeypatch):
-    send_mock = AsyncMock()
+async def test_alert_sends_only_items_since_the_last_alert():
+    send_mock = AsyncMock(return_value=True)
     aggregator = na.NewsAggregator(tg_bot=SimpleNamespace(send_alert=send_mock))
-    aggregator.redis = SimpleNamespace(get=AsyncMock(return_value='abc'))
+    aggregator.redis = FakeRedis()
+    await aggregator.store(items('a', 'b'))
+    await aggregator.alert_cached_news()
+    await aggregator.store(items('c'))
+    await aggregator.alert_cached_news()
+    await aggregator.alert_cached_news()
+    assert [c.args[0] for c in send_mock.await_args_list] == ['a\nb', 'c']
+
+
+@pytest.mark.asyncio
+async def test_new_items_reach_sentiment_in_one_batch(monkeypatch):
+    from signal_generation.signal_aggregator import SignalAggregator
+
+    bus = EventBus()
+    batches = []
+
+    async def analyze_many(texts):
+        batches.append(texts)
+        return [{'label': 'POS', 'score': 0.9} for _ in texts]
+
+    signals = SignalAggregator(bus=bus, sentiment_analyzer=SimpleNamespace(analyze_many=analyze_many))
+    loop = asyncio.create_task(signals._news_loop())
+    await asyncio.sleep(0)
+    aggregator = na.NewsAggregator(bus=bus)
+    aggregator.redis = FakeRedis()
+    monkeypatch.setattr(aggregator, 'fetch_all', AsyncMock(return_value=items('a', 'b', 'c')))
+    await aggregator.update_news()
+    await asyncio.sleep(0.01)
+    loop.cancel()
+    assert batches == [['a', 'b', 'c']]
+
+
+def test_alert_chunks_stay_under_the_telegram_limit():
+    batch = items('a' * 6, 'b' * 6, 'c' * 6, 'd' * 20)
+    for i, item in enumerate(batch):
+        item.id = f'{i + 1}-0'
+    chunks = na.alert_chunks(batch, limit=13)
+    assert chunks == [('aaaaaa\nbbbbbb', '2-0'), ('cccccc', '3-0'), ('d' * 13, '4-0')]
+
+
+@pytest.mark.asyncio
+async def test_cursor_only_advances_past_delivered_messages(monkeypatch):
+    send_mock = AsyncMock(side_effect=[True, False, True, True])
+    aggregator = na.NewsAggregator(tg_bot=SimpleNamespace(send_alert=send_mock))
+    aggregator.alert_max_chars = 2
+    aggregator.redis = FakeRedis()
+    await aggregator.store(items('a', 'b', 'c'))
+
+    await aggregator.alert_cached_news()
+    assert aggregator.redis.strings[na.ALERT_CURSOR_KEY] == b'1-0'
     await aggregator.alert_cached_news()
-    send_mock.assert_awaited_once_with('abc')
+    assert [c.args[0] for c in send_mock.await_args_list] == ['a', 'b', 'b', 'c']
+    assert aggregator.redis.strings[na.ALERT_CURSOR_KEY] == b'3-0'
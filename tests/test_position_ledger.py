@@ -0,0 +1,113 @@
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain.position_ledger import PositionLedger, position_key
+
+WALLET = '0x' + 'AB' * 20
+ETH = '0x' + 'ee' * 20
+BTC = '0x' + 'bb' * 20
+USDC = '0x' + 'cc' * 20
+
+
+def trade(index, direction, size, price=None, pnl=None, collateral=USDC, mark=None):
+    return {'collateral_token': collateral, 'index_token': index, 'direction': direction,
+            'size_usd': size, 'price': price, 'pnl': pnl, 'mark_price': mark}
+
+
+def test_positions_are_keyed_by_collateral_index_and_side():
+    ledger = PositionLedger()
+    ledger.increase(WALLET, trade(ETH, 'long', 1000, price=2000))
+    ledger.increase(WALLET, trade(BTC, 'short', 5000, price=60000))
+    ledger.increase(WALLET, trade(ETH, 'short', 300, price=2100))
+
+    assert len(ledger) == 3
+    assert ledger.open_interest(WALLET) == 6300
+
+    # closing the BTC short must not touch the more recent ETH positions
+    closed = ledger.decrease(WALLET, trade(BTC, 'short', 5000, pnl=250))
+    assert closed.realised_pnl == 250
+    assert ledger.get(WALLET, trade(BTC, 'short', 0)) is None
+    assert ledger.get(WALLET, trade(ETH, 'short', 0)).size_usd == 300
+    assert ledger.open_interest(WALLET) == 1300
+    assert ledger.realised_pnl(WALLET) == 250
+
+
+def test_partial_close_and_weighted_average_price():
+    ledger = PositionLedger()
+    ledger.increase(WALLET, trade(ETH, 'long', 1000, mark=2000))
+    position = ledger.increase(WALLET, trade(ETH, 'long', 1000, mark=3000))
+    assert position.average_price == 2500
+
+    ledger.decrease(WALLET, trade(ETH, 'long', 400, pnl=-10))
+    assert position.size_usd == 1600
+    assert position.realised_pnl == -10
+    assert ledger.open_interest_by_wallet() == [(WALLET.lower(), 1600)]
+
+    ledger.decrease(WALLET, trade(ETH, 'long', 5000, pnl=30))
+    assert len(ledger) == 0
+    assert ledger.open_interest(WALLET) == 0
+    assert ledger.realised_pnl(WALLET) == 20
+
+
+def test_unmatched_close_still_counts_realised_pnl():
+    ledger = PositionLedger()
+    assert ledger.decrease(WALLET, trade(ETH, 'long', 100, pnl=5)) is None
+    assert ledger.realised_pnl(WALLET) == 5
+    assert ledger.open_interest(WALLET) == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_replays_trades_from_one_stream():
+    rows = [
+        {'wallet_address': WALLET, 'action': 'open', **trade(ETH, 'long', 1000, price=2000)},
+        {'wallet_address': WALLET, 'action': 'open', **trade(BTC, 'long', 800, price=60000)},
+        {'wallet_address': WALLET, 'action': 'close', **trade(ETH, 'long', 1000, price=2100, pnl=50)},
+    ]
+    calls = []
+
+    async def stream(query, *args):
+        calls.append(args)
+        for row in rows:
+            yield row
+
+    ledger = PositionLedger()
+    ledger.increase(WALLET, trade(ETH, 'short', 1, price=1))  # stale state is discarded
+    replayed = await ledger.rebuild(SimpleNamespace(stream=stream), 'GMX', 95)
+
+    assert replayed == 3
+    assert calls == [('GMX', 95)]
+    assert ledger.loaded
+    assert list(ledger.positions) == [position_key(WALLET, trade(BTC, 'long', 0))]
+    assert ledger.open_interest(WALLET) == 800
+    assert ledger.realised_pnl(WALLET) == 50
+
+
+@pytest.mark.asyncio
+async def test_whale_watcher_close_matches_ledger_without_queries(monkeypatch):
+    from onchain import whale_watcher as ww
+    from gmx_logs import make_log, INCREASE_VALUES, DECREASE_VALUES, ACCOUNT
+    import onchain.gmx_decoder as gd
+
+    monkeypatch.setattr(ww.WhaleWatcher, '__init__', lambda self, tg_bot=None: None)
+    watcher = ww.WhaleWatcher(None)
+    watcher.db = SimpleNamespace(fetchrow=AsyncMock(), execute=AsyncMock())
+    watcher.ledger = PositionLedger()
+    queued = []
+    watcher.trade_writer = SimpleNamespace(add_trade=lambda *args: queued.append(args))
+
+    opened = watcher.decode_increase_position(make_log(gd.INCREASE_POSITION, INCREASE_VALUES))
+    watcher.ledger.increase(ACCOUNT, {**opened, 'direction': 'long'})
+    await watcher.link_pnl(ACCOUNT, make_log(gd.DECREASE_POSITION, DECREASE_VALUES, log_index=1))
+
+    watcher.db.fetchrow.assert_not_awaited()
+    watcher.db.execute.assert_not_awaited()
+    assert watcher.ledger.open_interest(ACCOUNT) == 30_000
+    assert watcher.ledger.realised_pnl(ACCOUNT) == -1234
+    wallet, protocol, action, data = queued[0]
+    assert (protocol, action, data['pnl'], data['price']) == ('GMX', 'close', -1234, 2900)
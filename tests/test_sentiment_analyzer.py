@@ -62,3 +62,111 @@ async def test_analyze_cached(monkeypatch):
     assert result == cached
     analyzer.pipeline.assert_not_called()
     set_mock.assert_not_awaited()
+
+
+class FakePipe:
+    def __init__(self, store):
+        self.store = store
+        self.pending = []
+        self.executed = 0
+
+    def set(self, key, value, ex=None):
+        self.pending.append((key, value))
+        return self
+
+    async def execute(self):
+        self.executed += 1
+        self.store.update(self.pending)
+
+
+class FakeRedis:
+    def __init__(self, store=None):
+        self.store = dict(store or {})
+        self.mget_calls = []
+        self.pipes = []
+        self.get = AsyncMock(side_effect=lambda k: self.store.get(k))
+        self.set = AsyncMock()
+
+    async def mget(self, *keys):
+        self.mget_calls.append(keys)
+        return [self.store.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        self.pipes.append(FakePipe(self.store))
+        return self.pipes[-1]
+
+
+def test_cache_key_folds_case_and_whitespace():
+    from ai_analysis.sentiment_mobilebert import cache_key
+
+    assert cache_key('  Bitcoin   RALLIES\n') == cache_key('bitcoin rallies')
+    assert cache_key('bitcoin rallies').startswith('sentiment:')
+    assert cache_key('bitcoin rallies') != cache_key('bitcoin falls')
+
+
+@pytest.mark.asyncio
+async def test_analyze_uses_local_tier_before_redis():
+    analyzer = SentimentAnalyzer()
+    analyzer._loaded = True
+    analyzer.pipeline = MagicMock(return_value=[{'label': 'POS', 'score': 0.9}])
+    analyzer.redis = FakeRedis()
+
+    await analyzer.analyze('Great  news')
+    assert await analyzer.analyze('great news') == {'label': 'POS', 'score': 0.9}
+    analyzer.redis.get.assert_awaited_once()
+    analyzer.pipeline.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_analyze_many_one_mget_and_one_pipelined_set():
+    from ai_analysis.sentiment_mobilebert import cache_key
+    from utils.metrics import metrics
+
+    analyzer = SentimentAnalyzer()
+    analyzer._loaded = True
+    analyzer.pipeline = MagicMock(side_effect=lambda texts, **kw: [{'label': 'POS', 'score': 0.7} for _ in texts])
+    analyzer.redis = FakeRedis({cache_key('in redis'): json.dumps({'label': 'NEG', 'score': 0.2})})
+    analyzer.local.set(cache_key('local'), {'label': 'NEUTRAL', 'score': 0.5})
+
+    results = await analyzer.analyze_many(['local', 'In Redis', 'new one', 'NEW one', 'new two'])
+
+    assert [r['label'] for r in results] == ['NEUTRAL', 'NEG', 'POS', 'POS', 'POS']
+    assert len(analyzer.redis.mget_calls) == 1 and len(analyzer.redis.mget_calls[0]) == 3
+    assert len(analyzer.redis.pipes) == 1 and analyzer.redis.pipes[0].executed == 1
+    assert len(analyzer.redis.pipes[0].pending) == 2
+    analyzer.pipeline.assert_called_once()  # both new texts in one forward pass
+    analyzer.redis.set.assert_not_awaited()
+
+    again = await analyzer.analyze_many(['new two', 'in redis'])
+    assert [r['label'] for r in again] == ['POS', 'NEG']
+    assert len(analyzer.redis.mget_calls) == 1
+    assert 0 < metrics.gauges['sentiment_cache_local_hit_rate'] < 1
+    assert 0 < metrics.gauges['sentiment_cache_redis_hit_rate'] < 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_load_the_model_once(monkeypatch):
+    import asyncio
+    import threading
+    import ai_analysis.sentiment_mobilebert as module
+
+    loads = []
+    release = threading.Event()
+
+    def slow_load(*args):
+        loads.append(args)
+        release.wait(5)
+        return lambda texts, **kw: [{'label': 'POS', 'score': 0.9} for _ in texts]
+
+    monkeypatch.setattr(module, 'ENABLE_MOBILEBERT', True)
+    monkeypatch.setattr(module, 'load_backend', slow_load)
+    analyzer = SentimentAnalyzer(workers=0)
+    analyzer.redis = FakeRedis()
+
+    calls = [asyncio.create_task(analyzer.analyze(f'text {i}')) for i in range(4)]
+    await asyncio.sleep(0.05)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert len(loads) == 1
+    assert all(r['label'] == 'POS' for r in results)
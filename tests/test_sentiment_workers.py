@@ -0,0 +1,72 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from ai_analysis.sentiment_workers import SentimentWorkerPool
+
+
+def fake_loader():
+    """Stands in for the transformers pipeline inside the worker process."""
+    pid = os.getpid()
+
+    def model(texts, batch_size=None, **kwargs):
+        if 'boom' in texts:
+            raise ValueError('bad input')
+        return [{'label': 'POSITIVE' if 'good' in t else 'NEGATIVE', 'score': pid} for t in texts]
+    return model
+
+
+@pytest.fixture
+def pool():
+    pool = SentimentWorkerPool(2, fake_loader, threads=1, idle_timeout=0, start_timeout=60)
+    yield pool
+    pool.close()
+
+
+def test_pool_scores_in_worker_processes(pool):
+    pool.start()
+    assert pool.alive == 2
+    results = pool(['good news', 'bad news'], batch_size=2)
+    assert [r['label'] for r in results] == ['POSITIVE', 'NEGATIVE']
+    assert results[0]['score'] != os.getpid()
+
+
+def test_batch_errors_are_raised_and_worker_survives(pool):
+    with pytest.raises(RuntimeError, match='bad input'):
+        pool(['boom'])
+    assert pool(['good'])[0]['label'] == 'POSITIVE'
+
+
+def test_idle_workers_are_recycled_and_restarted_on_demand(pool):
+    pool.start()
+    assert pool.reap_idle() == 2
+    assert pool.alive == 0
+    assert pool(['good'])[0]['label'] == 'POSITIVE'
+    assert pool.alive == 1
+
+
+def test_workers_are_stopped_outside_the_pool_lock(pool, monkeypatch):
+    pool.start()
+    stop = pool._stop
+    lock_free = []
+
+    def try_lock():
+        # From another thread: _cond's RLock is re-entrant for the reaper itself
+        acquired = pool._cond.acquire(blocking=False)
+        lock_free.append(acquired)
+        if acquired:
+            pool._cond.release()
+
+    def checked_stop(process, conn):
+        probe = threading.Thread(target=try_lock)
+        probe.start()
+        probe.join()
+        stop(process, conn)
+
+    monkeypatch.setattr(pool, '_stop', checked_stop)
+    assert pool.reap_idle() == 2
+    assert lock_free == [True, True]
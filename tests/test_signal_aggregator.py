@@ -1,10 +1,14 @@
+import asyncio
 import os
 import sys
 import logging
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
 
+from event_bus import EventBus
 from signal_generation.signal_aggregator import SignalAggregator
 
 @pytest.mark.asyncio
@@ -32,3 +36,37 @@ async def test_log_whale_summary_resets(caplog):
 
     assert any('Whale trade summary' in rec.message for rec in caplog.records)
     assert aggregator.trade_tally == {}
+
+
+@pytest.mark.asyncio
+async def test_process_whale_signals_batches_and_samples_logging(caplog):
+    aggregator = SignalAggregator(log_every=3)
+    with caplog.at_level(logging.INFO):
+        await aggregator.process_whale_signals(
+            ['BTC-USD', 'ETH-USD', 'BTC-USD', 'BTC-USD'], [1.0, 2.0, 3.0, 4.0], ['long', 'short', 'short', 'long']
+        )
+        await aggregator.process_whale_signals(['ETH-USD', 'ETH-USD'], [5.0, 6.0], ['long', 'long'])
+
+    assert aggregator.trade_tally == {
+        'BTC-USD': {'long': 2, 'short': 1},
+        'ETH-USD': {'long': 2, 'short': 1},
+    }
+    sampled = [r.message for r in caplog.records if 'Whale trade ' in r.message]
+    assert len(sampled) == 2
+    assert '$3.00' in sampled[0] and '$6.00' in sampled[1]
+
+
+@pytest.mark.asyncio
+async def test_run_fails_as_a_whole_and_leaves_no_consumers_behind():
+    async def analyzer_run():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('model crashed')
+
+    analyzer = SimpleNamespace(run=analyzer_run, analyze=AsyncMock(return_value={'label': 'POSITIVE'}))
+    aggregator = SignalAggregator(bus=EventBus(), sentiment_analyzer=analyzer)
+
+    with pytest.raises(ExceptionGroup) as excinfo:
+        await aggregator.run()
+    assert excinfo.group_contains(RuntimeError, match='model crashed')
+    await asyncio.sleep(0)
+    assert [t for t in asyncio.all_tasks() if t is not asyncio.current_task()] == []
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.modules.setdefault('aioredis', types.SimpleNamespace(
+    RedisError=Exception,
+    from_url=lambda *a, **k: SimpleNamespace()
+))
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from ai_analysis.text_windows import TokenWindows, combine
+from ai_analysis.sentiment_mobilebert import SentimentAnalyzer
+
+
+class WordTokenizer:
+    """One token per word; ids are the words' positions in a vocabulary."""
+
+    def __init__(self):
+        self.vocab = []
+        self.calls = 0
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens=True):
+        self.calls += 1
+        ids = []
+        for word in text.split():
+            if word not in self.vocab:
+                self.vocab.append(word)
+            ids.append(self.vocab.index(word))
+        return {'input_ids': ids}
+
+    def decode(self, ids):
+        return ' '.join(self.vocab[i] for i in ids)
+
+
+def words(n):
+    return ' '.join(f'w{i}' for i in range(n))
+
+
+def test_short_text_is_one_window():
+    windows = TokenWindows(WordTokenizer(), max_tokens=12, overlap=2)
+    assert windows.split('a b c') == (['a b c'], [3])
+
+
+def test_long_text_becomes_overlapping_windows():
+    windows = TokenWindows(WordTokenizer(), max_tokens=12, overlap=2)
+    texts, tokens = windows.split(words(25))
+    # 10 tokens per window, each starting 8 after the last
+    assert [t.split()[0] for t in texts] == ['w0', 'w8', 'w16']
+    assert texts[0] == words(10)
+    assert tokens == [10, 10, 9]
+
+
+def test_windows_are_capped_and_spread_over_the_text():
+    windows = TokenWindows(WordTokenizer(), max_tokens=12, overlap=2, max_windows=3)
+    texts, _ = windows.split(words(100))
+    assert [t.split()[0] for t in texts] == ['w0', 'w48', 'w96']
+
+
+def test_repeated_texts_are_tokenized_once():
+    tokenizer = WordTokenizer()
+    windows = TokenWindows(tokenizer, max_tokens=12, overlap=2)
+    first = windows.split(words(30))
+    calls = tokenizer.calls
+    assert windows.split(words(30)) == first
+    assert tokenizer.calls == calls
+
+
+def test_reencoded_windows_stay_within_the_model_limit(tmp_path):
+    transformers = pytest.importorskip('transformers')
+    vocab = tmp_path / 'vocab.txt'
+    vocab.write_text('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', '#', 'bit', '##coin', 'up']))
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(vocab))
+    windows = TokenWindows(tokenizer, max_tokens=12, overlap=3)
+
+    # Windows start every 7 tokens, so most begin on "##coin", which decodes
+    # to text that re-encodes as "#", "#", "[UNK]"
+    texts, tokens = windows.split(' '.join(['bitcoin up'] * 20))
+    assert len(texts) > 1
+    for text, count in zip(texts, tokens):
+        encoded = tokenizer(text)['input_ids']
+        assert len(encoded) <= 12
+        assert count == len(encoded) - 2
+
+
+def test_split_is_safe_across_threads():
+    class SlowTokenizer(WordTokenizer):
+        def __init__(self):
+            super().__init__()
+            self.inside = 0
+            self.overlapped = False
+
+        def __call__(self, text, add_special_tokens=True):
+            self.inside += 1
+            self.overlapped |= self.inside > 1
+            time.sleep(0.001)
+            try:
+                return super().__call__(text, add_special_tokens)
+            finally:
+                self.inside -= 1
+
+    tokenizer = SlowTokenizer()
+    windows = TokenWindows(tokenizer, max_tokens=12, overlap=2, cache_size=4)
+    texts = [words(n) for n in range(5, 40)] * 2
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(windows.split, texts))
+    assert not tokenizer.overlapped
+    assert results[:35] == results[35:]
+
+
+def test_combine_weights_windows_by_confidence_and_length():
+    results = [{'label': 'POS', 'score': 0.9}, {'label': 'NEG', 'score': 0.6}, {'label': 'NEG', 'score': 0.7}]
+    assert combine(results, [10, 10, 6]) == {'label': 'NEG', 'score': pytest.approx((6 + 4.2) / 26)}
+    assert combine(results, [10, 10, 4])['label'] == 'POS'
+    assert combine(results[:1], [10]) == results[0]
+
+
+def test_predict_scores_all_windows_in_one_pass():
+    analyzer = SentimentAnalyzer()
+    analyzer.windows = TokenWindows(WordTokenizer(), max_tokens=12, overlap=2)
+    analyzer.pipeline = MagicMock(side_effect=lambda texts, **kw: [
+        {'label': 'NEG' if 'w20' in t else 'POS', 'score': 0.8} for t in texts
+    ])
+    results = analyzer._predict(['short one', words(25)])
+    analyzer.pipeline.assert_called_once()
+    assert len(analyzer.pipeline.call_args.args[0]) == 4
+    assert results[0] == {'label': 'POS', 'score': 0.8}
+    # Two POS windows outweigh the last one, which holds w20
+    assert results[1]['label'] == 'POS'
+    assert results[1]['score'] == pytest.approx(0.8 * 20 / 29)
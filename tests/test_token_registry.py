@@ -0,0 +1,82 @@
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from eth_abi import encode
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain.token_registry import TokenRegistry, TokenInfo, token_registry
+
+WETH = '0x82aF49447D8a07e3bd95BD0d56f35241523fBab1'
+UNKNOWN = '0x' + '12' * 20
+OLD_STYLE = '0x' + '34' * 20
+
+
+def test_default_file_is_preloaded():
+    weth = token_registry.lookup(WETH.lower())
+    assert (weth.symbol, weth.decimals, weth.market, weth.resolved) == ('WETH', 18, 'ETH-USD', True)
+    assert token_registry.lookup('0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f').market == 'BTC-USD'
+
+
+def test_unknown_token_gets_placeholder_and_is_queued_once(tmp_path):
+    path = tmp_path / 'tokens.json'
+    path.write_text(json.dumps([{'address': WETH, 'symbol': 'WETH', 'decimals': 18}]))
+    registry = TokenRegistry(str(path))
+
+    first = registry.lookup(UNKNOWN)
+    assert first.symbol == '0x12121212' and not first.resolved
+    assert registry.lookup(UNKNOWN) is first
+    assert registry.pending == 1
+    assert registry.lookup(WETH).market == 'WETH-USD'
+
+
+@pytest.mark.asyncio
+async def test_resolver_fills_unknown_tokens_in_batches():
+    registry = TokenRegistry(None)
+    registry.lookup(UNKNOWN)
+    registry.lookup(OLD_STYLE)
+    registry.lookup('0x' + '56' * 20)
+
+    answers = {
+        (UNKNOWN.lower(), '0x95d89b41'): encode(['string'], ['ARB']),
+        (UNKNOWN.lower(), '0x313ce567'): encode(['uint8'], [18]),
+        (OLD_STYLE.lower(), '0x95d89b41'): b'MKR'.ljust(32, b'\x00'),
+        (OLD_STYLE.lower(), '0x313ce567'): encode(['uint8'], [6]),
+    }
+
+    async def call(tx):
+        key = (tx['to'].lower(), tx['data'])
+        if key not in answers:
+            raise ValueError('execution reverted')
+        return answers[key]
+
+    w3 = SimpleNamespace(eth=SimpleNamespace(call=AsyncMock(side_effect=call)))
+
+    assert await registry.resolve_pending(w3, batch_size=10) == 2
+    assert registry.lookup(UNKNOWN).market == 'ARB-USD'
+    assert (registry.lookup(OLD_STYLE).symbol, registry.lookup(OLD_STYLE).decimals) == ('MKR', 6)
+    # the failing token keeps its placeholder and stays queued
+    assert registry.pending == 1
+
+
+def test_decoded_trades_use_registry_symbol_and_price_scaling(monkeypatch):
+    from onchain import whale_watcher as ww
+    from gmx_logs import make_log, INCREASE_VALUES, DECREASE_VALUES, INDEX
+    import onchain.gmx_decoder as gd
+
+    registry = TokenRegistry(None)
+    registry.add(INDEX, TokenInfo('WETH', 18, 'ETH-USD'))
+    monkeypatch.setattr(ww.WhaleWatcher, '__init__', lambda self, tg_bot=None: None)
+    monkeypatch.setattr(ww.WhaleWatcher, 'tokens', registry)
+    watcher = ww.WhaleWatcher(None)
+
+    opened = watcher.decode_increase_position(make_log(gd.INCREASE_POSITION, INCREASE_VALUES))
+    assert opened['symbol'] == 'ETH-USD'
+    assert (opened['price'], opened['mark_price']) == (3000, 3010)
+    assert opened['size_tokens'] == pytest.approx(50_000 / 3010)
+    closed = watcher.decode_decrease_position(make_log(gd.DECREASE_POSITION, DECREASE_VALUES))
+    assert (closed['symbol'], closed['price'], closed['entry_price']) == ('ETH-USD', 2900, 3000)
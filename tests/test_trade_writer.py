@@ -0,0 +1,157 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import asyncpg
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from database.trade_writer import TradeBatchWriter, TRADE_COLUMNS
+from utils.metrics import metrics
+
+
+class DummyConn:
+    """Rows whose tx_hash is in ``bad`` make the COPY fail; ``existing`` hit ON CONFLICT."""
+
+    def __init__(self, fail=False, bad=(), existing=()):
+        self.bad = set(bad)
+        self.existing = set(existing)
+        self.staged = []
+        self.execute = AsyncMock(side_effect=RuntimeError('db down') if fail else self._execute)
+        self.copy_records_to_table = AsyncMock(side_effect=self._copy)
+
+    async def _copy(self, table, records, columns):
+        if any(r[-1] in self.bad for r in records):
+            raise asyncpg.exceptions.StringDataRightTruncationError('value too long')
+        self.staged = list(records)
+
+    async def _execute(self, query, *args):
+        if 'INSERT INTO wallet_trades' in query:
+            new = [r for r in self.staged if r[-1] not in self.existing]
+            self.existing.update(r[-1] for r in new)
+            return f'INSERT 0 {len(new)}'
+        return 'UPDATE 1'
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class DummyPool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def make_writer(conn, **kwargs):
+    db = SimpleNamespace(connect=AsyncMock(), pool=DummyPool(conn))
+    return TradeBatchWriter(db, **kwargs)
+
+
+def trade(tx):
+    return {'symbol': 'ETH-USD', 'size_usd': 1.0, 'leverage': 2.0, 'direction': 'long', 'tx_hash': tx}
+
+
+@pytest.mark.asyncio
+async def test_flush_copies_batch_and_coalesces_wallets():
+    conn = DummyConn()
+    writer = make_writer(conn, max_batch=10)
+    writer.add_trade('0xa', 'GMX', 'open', trade('t1'))
+    writer.add_trade('0xb', 'GMX', 'open', trade('t2'))
+    for _ in range(3):
+        writer.touch_wallet('0xa')
+
+    flushed = await writer.flush()
+
+    assert flushed == 2
+    conn.copy_records_to_table.assert_awaited_once()
+    args, kwargs = conn.copy_records_to_table.await_args
+    assert args == ('wallet_trades_staging',)
+    assert kwargs['columns'] == TRADE_COLUMNS
+    assert [r[-1] for r in kwargs['records']] == ['t1', 't2']
+    statements = [c.args[0] for c in conn.execute.await_args_list]
+    assert any('INSERT INTO wallet_trades' in q for q in statements)
+    touch = [c for c in conn.execute.await_args_list if 'last_activity' in c.args[0]]
+    assert len(touch) == 1 and touch[0].args[1] == ['0xa']
+    assert writer.pending == 0
+    assert metrics.summary('trade_flush_size')['last'] == 2
+
+
+@pytest.mark.asyncio
+async def test_size_threshold_signals_flush():
+    writer = make_writer(DummyConn(), max_batch=2)
+    writer.add_trade('0xa', 'GMX', 'open', trade('t1'))
+    assert not writer._flush_event.is_set()
+    writer.add_trade('0xa', 'GMX', 'open', trade('t2'))
+    assert writer._flush_event.is_set()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_up_to_limit():
+    writer = make_writer(DummyConn(fail=True), max_batch=10, max_pending=2)
+    for i in range(3):
+        writer.add_trade('0xa', 'GMX', 'open', trade(f't{i}'))
+
+    assert await writer.flush() == 0
+    assert [r[-1] for r in writer._trades] == ['t1', 't2']
+
+
+@pytest.mark.asyncio
+async def test_rows_skipped_on_conflict_are_not_counted():
+    writer = make_writer(DummyConn(existing={'t1'}), max_batch=10)
+    before = metrics.get('trades_recorded')
+    writer.add_trade('0xa', 'GMX', 'open', trade('t1'))
+    writer.add_trade('0xa', 'GMX', 'open', trade('t2'))
+
+    assert await writer.flush() == 1
+    assert metrics.get('trades_recorded') - before == 1
+
+
+@pytest.mark.asyncio
+async def test_bad_rows_are_isolated_and_the_rest_written():
+    conn = DummyConn(bad={'t2', 't5'})
+    writer = make_writer(conn, max_batch=10)
+    for i in range(8):
+        writer.add_trade('0xa', 'GMX', 'open', trade(f't{i}'))
+    writer.touch_wallet('0xa')
+
+    assert await writer.flush() == 6
+    assert conn.existing == {f't{i}' for i in range(8)} - {'t2', 't5'}
+    assert writer.pending == 0 and not writer._wallets
+    touch = [c for c in conn.execute.await_args_list if 'last_activity' in c.args[0]]
+    assert len(touch) == 1
+
+
+@pytest.mark.asyncio
+async def test_unparseable_merge_status_raises_instead_of_dropping_rows():
+    conn = DummyConn()
+    conn.execute = AsyncMock(return_value='OK')
+    writer = make_writer(conn, max_batch=10)
+    before = metrics.get('trades_rejected')
+    for i in range(4):
+        writer.add_trade('0xa', 'GMX', 'open', trade(f't{i}'))
+
+    with pytest.raises(ValueError):
+        await writer.flush()
+    conn.copy_records_to_table.assert_awaited_once()
+    assert metrics.get('trades_rejected') == before
+
+
+@pytest.mark.asyncio
+async def test_client_side_errors_requeue_the_batch():
+    conn = DummyConn()
+    conn.copy_records_to_table = AsyncMock(side_effect=TypeError('bug'))
+    writer = make_writer(conn, max_batch=10)
+    before = metrics.get('trades_rejected')
+    for i in range(4):
+        writer.add_trade('0xa', 'GMX', 'open', trade(f't{i}'))
+
+    assert await writer.flush() == 0
+    assert [r[-1] for r in writer._trades] == ['t0', 't1', 't2', 't3']
+    assert metrics.get('trades_rejected') == before
@@ -9,6 +9,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_Lite
 
 from execution.telegram_wallet_manager import WalletManager, FIELD_MAP
 from database import db_manager as db_module
+from execution import telegram_wallet_manager as wm_module
 
 
 class DummyBot:
@@ -53,6 +54,8 @@ async def test_edit_wallet_value_builds_query(monkeypatch, field, value):
 
     exec_mock = AsyncMock()
     monkeypatch.setattr(db_module.db, 'execute', exec_mock)
+    invalidate_mock = AsyncMock()
+    monkeypatch.setattr(wm_module.wallet_registry, 'invalidate', invalidate_mock)
 
     update = DummyUpdate(value)
     context = DummyContext({'edit_field': field, 'edit_wallet': '0xabc'})
@@ -66,6 +69,7 @@ async def test_edit_wallet_value_builds_query(monkeypatch, field, value):
         '0xabc'
     )
     assert update.message.replies[0][0] == "Updated"
+    invalidate_mock.assert_awaited_once_with('0xabc')
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import AsyncMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from onchain.wallet_registry import WalletRegistry, TrackedWallet, address_key
+
+
+def addr(i):
+    return '0x' + f'{i:040x}'
+
+
+def row(i, **overrides):
+    data = {
+        'id': i, 'wallet_address': addr(i), 'label': f'w{i}', 'category': 'whale', 'tags': ['vip'],
+        'min_trade_size': 5000, 'alert_direction': 'long',
+        'alert_interval': 30, 'metadata': None, 'tracking_enabled': True,
+    }
+    data.update(overrides)
+    return data
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = {r['wallet_address']: r for r in rows}
+        self.pages = 0
+        self.on_page = None
+
+    async def fetch(self, query, last_id, limit):
+        self.pages += 1
+        if self.on_page:
+            await self.on_page()
+        enabled = sorted((r for r in self.rows.values() if r['tracking_enabled']), key=lambda r: r['id'])
+        return [r for r in enabled if r['id'] > last_id][:limit]
+
+    async def fetchrow(self, query, address):
+        # lower(wallet_address) = lower($1)
+        return next((r for a, r in self.rows.items() if a.lower() == address.lower()), None)
+
+
+@pytest.mark.asyncio
+async def test_load_pages_with_keyset():
+    db = FakeDB([row(i) for i in range(1, 26)] + [row(26, tracking_enabled=False)])
+    registry = WalletRegistry(db, page_size=10)
+    assert await registry.load() == 25
+    assert db.pages == 3
+    assert addr(7) in registry and addr(7).upper().replace('0X', '0x') in registry
+    assert addr(26) not in registry
+    settings = registry.get(addr(3))
+    assert isinstance(settings, TrackedWallet)
+    assert (settings.min_size, settings.direction, settings.interval) == (5000.0, 'long', 30)
+    assert not hasattr(settings, '__dict__')
+
+
+@pytest.mark.asyncio
+async def test_notifications_apply_single_row_deltas():
+    db = FakeDB([row(1), row(2)])
+    registry = WalletRegistry(db)
+    await registry.load()
+    registry.get(addr(1)).last_sent = 42.0
+
+    db.rows[addr(1)] = row(1, min_trade_size=1)
+    await registry.apply_notification(json.dumps({'op': 'UPDATE', 'wallet_address': addr(1)}))
+    assert registry.get(addr(1)).min_size == 1.0
+    assert registry.get(addr(1)).last_sent == 42.0
+
+    db.rows[addr(3)] = row(3)
+    await registry.apply_notification(json.dumps({'op': 'INSERT', 'wallet_address': addr(3)}))
+    db.rows[addr(2)] = row(2, tracking_enabled=False)
+    await registry.apply_notification(json.dumps({'op': 'UPDATE', 'wallet_address': addr(2)}))
+    await registry.apply_notification(json.dumps({'op': 'DELETE', 'wallet_address': addr(1)}))
+
+    assert sorted(registry._index) == [address_key(addr(3))]
+    assert db.pages == 1
+
+
+@pytest.mark.asyncio
+async def test_notifications_during_load_are_replayed():
+    db = FakeDB([row(1)])
+    registry = WalletRegistry(db)
+
+    async def change_mid_load():
+        if db.pages == 1:
+            db.rows[addr(2)] = row(2, id=0)  # id below the cursor: the page scan misses it
+            registry._on_notify(None, 0, 'tracked_wallets_changed',
+                                json.dumps({'op': 'INSERT', 'wallet_address': addr(2)}))
+
+    db.on_page = change_mid_load
+    await registry.load()
+    assert addr(2) in registry
+
+
+@pytest.mark.asyncio
+async def test_start_listens_before_loading():
+    calls = []
+    db = FakeDB([row(1)])
+    listener = type('L', (), {'is_closed': lambda self: False})()
+    db.listen = AsyncMock(side_effect=lambda *a: calls.append('listen') or listener)
+    original_fetch = db.fetch
+
+    async def fetch(*a):
+        calls.append('fetch')
+        return await original_fetch(*a)
+
+    db.fetch = fetch
+    registry = WalletRegistry(db)
+    await registry.start()
+    assert calls[0] == 'listen' and 'fetch' in calls
+    assert len(registry) == 1
+
+
+@pytest.mark.asyncio
+async def test_lookup_serves_hits_and_refreshes_expired_entries():
+    db = FakeDB([row(1)])
+    db.fetchrow = AsyncMock(side_effect=lambda q, a: db.rows.get(a))
+    registry = WalletRegistry(db, ttl=60)
+    await registry.load()
+
+    record = await registry.lookup(addr(1))
+    assert (record.label, record.category, record.tags) == ('w1', 'whale', ['vip'])
+    db.fetchrow.assert_not_awaited()
+
+    db.rows[addr(1)] = row(1, label='renamed')
+    record.loaded_at -= 61
+    assert (await registry.lookup(addr(1))).label == 'renamed'
+    assert registry.hits == 1 and registry.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidate_rereads_and_keeps_entry_stale_on_error():
+    db = FakeDB([row(1)])
+    registry = WalletRegistry(db)
+    await registry.load()
+
+    db.rows[addr(1)] = row(1, alert_direction='short')
+    await registry.invalidate(addr(1))
+    assert registry.get(addr(1)).direction == 'short'
+
+    db.fetchrow = AsyncMock(side_effect=RuntimeError('db down'))
+    await registry.invalidate(addr(1))
+    assert registry.get(addr(1)).loaded_at == float('-inf')
+
+
+@pytest.mark.asyncio
+async def test_expired_lookup_matches_case_and_never_evicts_on_missing_row():
+    typed = '0x' + 'AbCd' * 10
+    db = FakeDB([row(1, wallet_address=typed)])
+    registry = WalletRegistry(db, ttl=60)
+    await registry.load()
+
+    registry.get(typed).loaded_at -= 61
+    record = await registry.lookup(typed.lower())
+    assert record is not None and record.label == 'w1'
+
+    # Row gone without a DELETE notification: keep alerting from the cache
+    del db.rows[typed]
+    registry.get(typed).loaded_at -= 61
+    assert await registry.lookup(typed) is not None
+
+    # Disabling does evict
+    db.rows[typed] = row(1, wallet_address=typed, tracking_enabled=False)
+    registry.get(typed).loaded_at -= 61
+    assert await registry.lookup(typed) is None
+
+
+@pytest.mark.asyncio
+async def test_notification_tasks_are_held_until_done():
+    db = FakeDB([row(1)])
+    registry = WalletRegistry(db)
+    await registry.load()
+    db.rows[addr(1)] = row(1, label='renamed')
+    registry._on_notify(None, 0, 'tracked_wallets_changed',
+                        json.dumps({'op': 'UPDATE', 'wallet_address': addr(1)}))
+    assert len(registry._tasks) == 1
+    await asyncio.gather(*registry._tasks)
+    assert registry._tasks == set()
+    assert registry.get(addr(1)).label == 'renamed'
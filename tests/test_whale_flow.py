@@ -0,0 +1,87 @@
+import os
+import sys
+from unittest.mock import AsyncMock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
+
+from signal_generation.whale_flow import WhaleFlow, FlowRing
+from signal_generation.signal_aggregator import SignalAggregator
+
+
+def test_windows_roll_independently():
+    flow = WhaleFlow()
+    flow.add('BTC-USD', 1000, 'long', now=0)
+    flow.add('BTC-USD', 3000, 'short', now=30)
+    flow.add('ETH-USD', 500, 'long', now=90)
+
+    assert flow.stats('1m', 'BTC-USD', now=60) == {
+        'long_count': 0, 'short_count': 1, 'long_usd': 0.0, 'short_usd': 3000.0, 'long_ratio': 0.0,
+    }
+    five = flow.stats('5m', 'BTC-USD', now=90)
+    assert (five['long_count'], five['short_count']) == (1, 1)
+    assert five['long_ratio'] == pytest.approx(0.25)
+
+    everything = flow.stats('1h', now=90)
+    assert everything['long_usd'] == 1500.0
+    assert flow.stats('5m', now=350)['long_count'] == 1  # only the ETH trade is left
+    assert flow.stats('24h', 'SOL-USD', now=90)['long_ratio'] == 0.5
+
+
+def test_reused_bucket_is_reset():
+    ring = FlowRing(60, 60)
+    ring.add(5.2, True, 100.0)
+    ring.add(65.0, False, 40.0)  # same slot a minute later
+    assert ring.totals(65.0, [0, 0, 0.0, 0.0]) == [0, 1, 0.0, 40.0]
+
+
+@pytest.mark.asyncio
+async def test_aggregator_feeds_flow():
+    flow = WhaleFlow()
+    aggregator = SignalAggregator(flow=flow)
+    await aggregator.process_whale_signals(['BTC-USD', 'BTC-USD'], [100.0, 300.0], ['long', 'short'])
+    await aggregator.process_whale_signal('BTC-USD', 600.0, 'long')
+    assert flow.long_ratio('1m', 'BTC-USD') == pytest.approx(0.7)
+
+
+@pytest.mark.asyncio
+async def test_whale_sentiment_reads_memory(monkeypatch):
+    from monitoring import whale_analytics as wa
+
+    flow = WhaleFlow()
+    flow.add('BTC-USD', 900, 'long')
+    flow.add('ETH-USD', 100, 'short')
+    fetchrow = AsyncMock()
+    monkeypatch.setattr(wa, 'whale_flow', flow)
+    monkeypatch.setattr(wa.db, 'fetchrow', fetchrow)
+
+    result = await wa.WhaleAnalytics()._calculate_whale_sentiment()
+    assert result == {'sentiment': 'bullish', 'long_ratio': pytest.approx(0.9)}
+    fetchrow.assert_not_awaited()
+
+
+def test_flow_text_lists_every_window():
+    from execution.telegram_bot import flow_text
+
+    flow = WhaleFlow()
+    flow.add('ETH-USD', 2500, 'short')
+    text = flow_text('ETH-USD', flow)
+    assert '1m: 0% long (bearish) 0L/1S $2,500' in text
+    assert len(text.splitlines()) == 1 + len(flow.windows)
+
+
+def test_flow_matches_markets_by_base_asset():
+    from execution.telegram_bot import flow_text
+
+    flow = WhaleFlow()
+    flow.add('BTC-USD', 1000, 'long', now=100)
+    flow.add('BTC/USDC:USDC', 3000, 'short', now=100)
+    flow.add('ETH-USD', 500, 'long', now=100)
+
+    assert flow.matching('btc') == ['BTC-USD', 'BTC/USDC:USDC']
+    assert flow.matching('btc-usd') == ['BTC-USD']
+    assert flow.stats('1h', 'BTC', now=110)['long_usd'] == 1000
+    assert flow.stats('1h', 'BTC', now=110)['short_usd'] == 3000
+    assert flow_text('btc', flow).splitlines()[0] == '🐋 Whale flow btc (BTC-USD, BTC/USDC:USDC)'
+    assert 'no trades yet' in flow_text('SOL', flow)
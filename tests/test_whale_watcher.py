@@ -1,7 +1,8 @@
+import json
 import os
 import sys
 from types import SimpleNamespace
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'geminiBOT_LiteModev2', 'src'))
@@ -47,3 +48,380 @@ async def test_run_exits_when_ws_url_missing(monkeypatch):
     await watcher.run()
 
     connect_mock.assert_not_awaited()
+
+
+class _FakeProvider:
+    def __init__(self):
+        self.connects = 0
+        self.disconnects = 0
+
+    async def is_connected(self):
+        return False
+
+    async def connect(self):
+        self.connects += 1
+
+    async def disconnect(self):
+        self.disconnects += 1
+
+
+def _make_subscription_watcher(monkeypatch, streams, logs_for_gap=(), head=100, checkpoint=None):
+    """A real WhaleWatcher on one stand-in provider and a fake database."""
+    monkeypatch.setattr(ww, 'GMX_VAULT', '0x' + '1' * 40)
+    monkeypatch.setattr(ww, 'CONFIRMATION_MODE', 'fast')
+    monkeypatch.setattr(ww, 'confirmations_for', lambda chain: 0)
+    streams = list(streams)
+
+    def process_subscriptions():
+        if not streams:
+            raise KeyboardInterrupt
+        messages = streams.pop(0)
+
+        async def gen():
+            for m in messages:
+                if isinstance(m, Exception):
+                    raise m
+                yield m
+        return gen()
+
+    async def block_number():
+        return head
+
+    class _Eth:
+        subscribe = AsyncMock(return_value='sub1')
+        get_logs = AsyncMock(return_value=list(logs_for_gap))
+        get_block = AsyncMock(return_value={'timestamp': 0})
+
+        @property
+        def block_number(self):
+            return block_number()
+
+    w3 = SimpleNamespace(
+        provider=_FakeProvider(),
+        eth=_Eth(),
+        socket=SimpleNamespace(process_subscriptions=process_subscriptions),
+    )
+    db = SimpleNamespace(connect=AsyncMock(), fetchval=AsyncMock(return_value=checkpoint), execute=AsyncMock())
+    watcher = ww.WhaleWatcher(None, providers=[('primary', w3)], db=db)
+    watcher.ledger.loaded = True
+    watcher._start_background_tasks = lambda: None
+    watcher.poll_interval = 0
+    watcher.max_resubscribe_delay = 0
+    watcher._recent = ww.RecentLogs(16)
+    watcher.handle_log = AsyncMock()
+    return watcher
+
+
+def _log(block, tx, idx=0):
+    return {'blockNumber': block, 'transactionHash': tx, 'logIndex': idx}
+
+
+@pytest.mark.asyncio
+async def test_subscription_dispatches_pushed_logs(monkeypatch):
+    pushed = [
+        {'subscription': 'sub1', 'result': _log(101, 'a')},
+        {'subscription': 'other', 'result': _log(101, 'x')},
+        {'subscription': 'sub1', 'result': _log(102, 'b')},
+    ]
+    watcher = _make_subscription_watcher(monkeypatch, [pushed])
+
+    with pytest.raises(KeyboardInterrupt):
+        await watcher.run()
+
+    args = watcher.w3.eth.subscribe.await_args.args
+    assert args[0] == 'logs'
+    assert args[1]['topics'] == [['0x' + ww.SIG_POSITION_OPEN, '0x' + ww.SIG_POSITION_CLOSE]]
+    handled = [c.args[0]['transactionHash'] for c in watcher.handle_log.await_args_list]
+    assert handled == ['a', 'b']
+    assert watcher._last_block == 102
+    await ww.asyncio.gather(*watcher._latency_tasks)
+    assert ww.metrics.summary('whale_event_latency_subscribe')['count'] >= 2
+
+
+@pytest.mark.asyncio
+async def test_resubscribe_fills_gap_without_duplicates(monkeypatch):
+    first = [{'subscription': 'sub1', 'result': _log(101, 'a')}, ConnectionError('socket closed')]
+    gap = [_log(101, 'a'), _log(101, 'b', 1), _log(103, 'c')]
+    watcher = _make_subscription_watcher(monkeypatch, [first, []], logs_for_gap=gap, head=103)
+
+    with pytest.raises(KeyboardInterrupt):
+        await watcher.run()
+
+    assert watcher.w3.eth.subscribe.await_count == 3
+    gap_filter = watcher.w3.eth.get_logs.await_args.args[0]
+    assert gap_filter['toBlock'] == 103
+    handled = [c.args[0]['transactionHash'] for c in watcher.handle_log.await_args_list]
+    assert handled == ['a', 'b', 'c']
+    assert watcher.w3.provider.disconnects >= 1
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_polling_when_subscribe_unsupported(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    watcher.w3.eth.subscribe = AsyncMock(side_effect=ValueError('method not found'))
+    event_filter = SimpleNamespace(get_new_entries=AsyncMock(return_value=[_log(5, 'p')]))
+    watcher.w3.eth.filter = AsyncMock(return_value=event_filter)
+
+    async def fake_sleep(_):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ww.asyncio, 'sleep', fake_sleep)
+
+    with pytest.raises(KeyboardInterrupt):
+        await watcher.run()
+
+    assert watcher.mode == 'poll'
+    watcher.handle_log.assert_awaited_once_with(_log(5, 'p'))
+
+
+@pytest.mark.asyncio
+async def test_polling_mode_connects_and_reconnects_after_errors(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    watcher.mode = 'poll'
+    event_filter = SimpleNamespace(get_new_entries=AsyncMock(side_effect=ConnectionError('socket closed')))
+    watcher.w3.eth.filter = AsyncMock(return_value=event_filter)
+
+    async def fake_sleep(_):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ww.asyncio, 'sleep', fake_sleep)
+
+    with pytest.raises(KeyboardInterrupt):
+        await watcher.run()
+
+    assert watcher.w3.provider.connects == 2
+    watcher.w3.eth.subscribe.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_startup_backfills_from_checkpoint_with_alerts_muted(monkeypatch):
+    history = [_log(96, 'h1'), _log(99, 'h2')]
+    watcher = _make_subscription_watcher(monkeypatch, [], logs_for_gap=history, head=100, checkpoint=95)
+    alert_states = []
+    watcher.handle_log = AsyncMock(
+        side_effect=lambda log: alert_states.append((watcher.alerts_enabled, watcher.publish_enabled))
+    )
+
+    with pytest.raises(KeyboardInterrupt):
+        await watcher.run()
+
+    gap_filter = watcher.w3.eth.get_logs.await_args.args[0]
+    assert (gap_filter['fromBlock'], gap_filter['toBlock']) == (96, 100)
+    assert alert_states == [(False, False), (False, False)]
+    assert watcher.alerts_enabled is True and watcher.publish_enabled is True
+    assert watcher.checkpoint.block == 100
+
+
+@pytest.mark.asyncio
+async def test_replayed_trades_are_not_published(monkeypatch):
+    from gmx_logs import make_log, INCREASE_VALUES
+    import onchain.gmx_decoder as gd
+
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    watcher.bus = SimpleNamespace(publish=AsyncMock())
+    watcher.tg_bot = SimpleNamespace(send_alert=AsyncMock())
+    opened = make_log(gd.INCREASE_POSITION, INCREASE_VALUES)
+
+    watcher.publish_enabled = False
+    await watcher._process_log(opened, 'GMX')
+    watcher.bus.publish.assert_not_awaited()
+    watcher.publish_enabled = True
+    await watcher._process_log(opened, 'GMX')
+    watcher.bus.publish.assert_awaited_once()
+
+
+def _fake_w3(name, messages, delay):
+    """In-process stand-in for an AsyncWeb3 client; no socket is opened.
+
+    ``process_subscriptions`` yields ``messages`` ``delay`` seconds apart
+    and then idles. See ``test_fan_in_over_local_websocket_servers`` for
+    the same path through real providers.
+    """
+    async def stream():
+        for message in messages:
+            await ww.asyncio.sleep(delay)
+            yield message
+        await ww.asyncio.Event().wait()
+
+    return SimpleNamespace(
+        provider=_FakeProvider(),
+        eth=SimpleNamespace(subscribe=AsyncMock(return_value=f'sub-{name}')),
+        socket=SimpleNamespace(process_subscriptions=stream),
+    )
+
+
+@pytest.mark.asyncio
+async def test_fan_in_keeps_first_copy_and_records_lead_lag(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    fast = _fake_w3('fast', [{'subscription': 'sub-fast', 'result': _log(101, 'a')},
+                             {'subscription': 'sub-fast', 'result': _log(101, 'b', 1)}], 0.01)
+    slow = _fake_w3('slow', [{'subscription': 'sub-slow', 'result': _log(101, 'a')},
+                             {'subscription': 'sub-slow', 'result': _log(102, 'c')}], 0.05)
+    watcher.providers = [('fast', fast), ('slow', slow)]
+    watcher._catch_up = AsyncMock()
+    watcher._record_latency = MagicMock()
+    lag_before = ww.metrics.summary('provider_lag_slow')['count']
+
+    task = ww.asyncio.create_task(watcher._run_subscription())
+    for _ in range(100):
+        if watcher.handle_log.await_count == 3:
+            break
+        await ww.asyncio.sleep(0.01)
+    await ww.asyncio.sleep(0.05)
+    task.cancel()
+
+    handled = sorted(c.args[0]['transactionHash'] for c in watcher.handle_log.await_args_list)
+    assert handled == ['a', 'b', 'c']
+    watcher._catch_up.assert_awaited_once()
+    assert ww.metrics.summary('provider_lag_slow')['count'] == lag_before + 1
+    assert ww.metrics.summary('provider_lag_slow')['last'] > 0
+    assert ww.metrics.summary('provider_lead_fast')['last'] > 0
+
+
+@pytest.mark.asyncio
+async def test_fan_in_falls_back_to_polling_only_when_every_provider_fails(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    broken = SimpleNamespace(provider=_FakeProvider(),
+                             eth=SimpleNamespace(subscribe=AsyncMock(side_effect=ValueError('nope'))))
+    watcher.providers = [('a', broken), ('b', broken)]
+    watcher._run_polling = AsyncMock()
+
+    await watcher._run_subscription()
+
+    watcher._run_polling.assert_awaited_once()
+    assert watcher.mode == 'poll'
+
+
+@pytest.mark.asyncio
+async def test_provider_failing_its_first_subscribe_is_retried(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    live = _fake_w3('live', [], 0)
+    late = _fake_w3('late', [{'subscription': 'sub-late', 'result': _log(101, 'a')}], 0)
+    late.eth.subscribe = AsyncMock(side_effect=[ValueError('not yet'), ValueError('not yet'), 'sub-late'])
+    watcher.providers = [('live', live), ('late', late)]
+    watcher._catch_up = AsyncMock()
+    watcher._record_latency = MagicMock()
+    watcher._run_polling = AsyncMock()
+
+    task = ww.asyncio.create_task(watcher._run_subscription())
+    for _ in range(100):
+        if watcher.handle_log.await_count:
+            break
+        await ww.asyncio.sleep(0.01)
+    task.cancel()
+    await ww.asyncio.gather(task, return_exceptions=True)
+
+    assert late.eth.subscribe.await_count == 3
+    watcher.handle_log.assert_awaited_once()
+    watcher._run_polling.assert_not_awaited()
+    assert watcher.mode != 'poll'
+
+
+@pytest.mark.asyncio
+async def test_failing_provider_loop_cancels_the_others(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    watcher.providers = [('a', _fake_w3('a', [], 0)), ('b', _fake_w3('b', [], 0))]
+
+    calls = []
+
+    async def catch_up():
+        # Only the first attempt fails; with gather the other loop carried on
+        calls.append(1)
+        await ww.asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError('catch-up failed')
+    watcher._catch_up = catch_up
+
+    with pytest.raises(ExceptionGroup):
+        await watcher._run_subscription()
+    await ww.asyncio.sleep(0)
+    assert [t for t in ww.asyncio.all_tasks() if t is not ww.asyncio.current_task()] == []
+
+
+async def _serve_logs(websockets, messages, delay):
+    """Local JSON-RPC WebSocket endpoint: answers eth_subscribe, then pushes ``messages``."""
+    async def handler(ws):
+        async for raw in ws:
+            request = json.loads(raw)
+            await ws.send(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': '0xsub'}))
+            if request['method'] == 'eth_subscribe':
+                for log in messages:
+                    await ww.asyncio.sleep(delay)
+                    await ws.send(json.dumps({'jsonrpc': '2.0', 'method': 'eth_subscription',
+                                              'params': {'subscription': '0xsub', 'result': log}}))
+    server = await websockets.serve(handler, '127.0.0.1', 0)
+    return server, f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def _rpc_log(block, tx_byte, idx=0):
+    return {'address': '0x' + '1' * 40, 'topics': [], 'data': '0x', 'blockNumber': hex(block),
+            'transactionHash': '0x' + tx_byte * 32, 'transactionIndex': '0x0',
+            'blockHash': '0x' + 'cd' * 32, 'logIndex': hex(idx), 'removed': False}
+
+
+@pytest.mark.asyncio
+async def test_fan_in_over_local_websocket_servers(monkeypatch):
+    websockets = pytest.importorskip('websockets')
+    fast_server, fast_url = await _serve_logs(websockets, [_rpc_log(101, 'aa'), _rpc_log(101, 'bb', 1)], 0.01)
+    slow_server, slow_url = await _serve_logs(websockets, [_rpc_log(101, 'aa')], 0.1)
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    watcher.providers = [(name, ww.AsyncWeb3(ww.AsyncWebsocketProvider(url)))
+                         for name, url in (('local_fast', fast_url), ('local_slow', slow_url))]
+    watcher._catch_up = AsyncMock()
+    watcher._record_latency = MagicMock()
+    lag_before = ww.metrics.summary('provider_lag_local_slow')['count']
+
+    task = ww.asyncio.create_task(watcher._run_subscription())
+    try:
+        for _ in range(200):
+            if ww.metrics.summary('provider_lag_local_slow')['count'] > lag_before:
+                break
+            await ww.asyncio.sleep(0.01)
+    finally:
+        task.cancel()
+        await ww.asyncio.gather(task, return_exceptions=True)
+        for server in (fast_server, slow_server):
+            server.close()
+            await server.wait_closed()
+
+    handled = [c.args[0]['transactionHash'].hex() for c in watcher.handle_log.await_args_list]
+    assert sorted(handled) == ['aa' * 32, 'bb' * 32]
+    assert ww.metrics.summary('provider_lag_local_slow')['count'] == lag_before + 1
+
+
+@pytest.mark.asyncio
+async def test_latency_never_waits_on_the_block_lookup(monkeypatch):
+    watcher = _make_subscription_watcher(monkeypatch, [])
+    release = ww.asyncio.Event()
+
+    async def slow_get_block(block):
+        await release.wait()
+        return {'timestamp': 1000}
+    watcher.w3.eth.get_block = AsyncMock(side_effect=slow_get_block)
+    before = ww.metrics.summary('whale_event_latency_subscribe')['count']
+
+    watcher._record_latency(_log(101, 'a'), 'subscribe', 1002.0)
+    watcher._record_latency(_log(101, 'b', 1), 'subscribe', 1003.0)
+    watcher._record_latency({**_log(102, 'c'), 'blockTimestamp': hex(1001)}, 'subscribe', 1004.0)
+    assert ww.metrics.summary('whale_event_latency_subscribe')['count'] == before + 1
+
+    release.set()
+    await ww.asyncio.gather(*watcher._latency_tasks)
+    watcher.w3.eth.get_block.assert_awaited_once_with(101)
+    assert ww.metrics.summary('whale_event_latency_subscribe')['count'] == before + 3
+    assert watcher._latency_pending == {}
+
+
+def test_recent_logs_expire_and_stay_bounded():
+    recent = ww.RecentLogs(maxlen=3, ttl=10)
+    for i in range(5):
+        recent.add(('tx', i), received=100 + i, source='p')
+    assert len(recent) == 3 and ('tx', 1) not in recent
+    assert recent.get(('tx', 4), now=105) == (104, 'p')
+    assert recent.get(('tx', 2), now=113) is None
+    recent.add(('tx', 9), received=113)
+    assert ('tx', 2) not in recent and ('tx', 3) in recent
+
+
+def test_provider_name_is_metric_safe():
+    assert ww.provider_name('wss://arb-mainnet.g.alchemy.com/v2/key') == 'arb_mainnet_g_alchemy_com'